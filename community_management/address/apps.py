@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class AddressConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'address'
+
+    def ready(self):
+        from community_management import cache
+        # 地址数据变更时使地址及商户页面缓存失效
+        cache.invalidate_on_change(self, cache.ADDRESS_PAGES, cache.MERCHANT_PAGES)
+        # 注册完整地址的级联刷新信号
+        from . import signals  # noqa: F401
@@ -0,0 +1,46 @@
+"""
+完整地址标签的批量刷新
+
+楼栋、单元、户号的完整地址冗余存储在各自的 full_address 字段中，
+上级名称变更时用一条 UPDATE ... SET full_address = (子查询拼接) 刷新整批下级记录。
+函数只依赖传入查询集的模型。迁移不导入本模块，而是复制所需的逻辑，以免格式修改改变历史迁移的结果。
+"""
+from django.db.models import CharField, F, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Concat
+
+
+def _related_model(queryset, field_name):
+    return queryset.model._meta.get_field(field_name).related_model
+
+
+def refresh_apartment_addresses(apartments):
+    """刷新楼栋的完整地址：小区名 - 楼栋N"""
+    community = _related_model(apartments, 'community')
+    community_name = community.objects.filter(pk=OuterRef('community_id')).values('community_name')[:1]
+    return apartments.update(full_address=Concat(
+        Subquery(community_name), Value(' - 楼栋'), Cast('apartment_number', CharField()),
+        output_field=CharField(),
+    ))
+
+
+def refresh_unit_addresses(units):
+    """刷新单元的完整地址：小区名 - N栋-M单元"""
+    apartment = _related_model(units, 'apartment')
+    apartment_label = apartment.objects.filter(pk=OuterRef('apartment_id')).values(label=Concat(
+        F('community__community_name'), Value(' - '), Cast('apartment_number', CharField()), Value('栋-'),
+        output_field=CharField(),
+    ))[:1]
+    return units.update(full_address=Concat(
+        Subquery(apartment_label), Cast('unit_number', CharField()), Value('单元'),
+        output_field=CharField(),
+    ))
+
+
+def refresh_house_addresses(houses):
+    """刷新户号的完整地址：单元完整地址-户号，须在单元刷新之后调用"""
+    unit = _related_model(houses, 'unit')
+    unit_label = unit.objects.filter(pk=OuterRef('unit_id')).values('full_address')[:1]
+    return houses.update(full_address=Concat(
+        Subquery(unit_label), Value('-'), F('house_number'),
+        output_field=CharField(),
+    ))
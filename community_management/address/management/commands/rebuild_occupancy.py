@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from address.occupancy import rebuild_occupancy
+
+
+class Command(BaseCommand):
+    help = '从楼房、平房表全量重建户号、单元、小区及胡同的居住人数'
+
+    def handle(self, *args, **options):
+        counts = rebuild_occupancy()
+        self.stdout.write(self.style.SUCCESS(
+            f'居住人数重建完成：户号 {counts["house"]}、单元 {counts["unit"]}、'
+            f'小区 {counts["community"]}、胡同 {counts["hutong"]} 行'
+        ))
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:48
+
+from django.db import migrations, models
+from django.db.models import CharField, F, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Concat
+
+
+def fill_full_address(apps, schema_editor):
+    """按迁移时的地址格式生成完整地址，格式与 address.labels 的后续修改无关"""
+    Community = apps.get_model('address', 'Community')
+    Apartment = apps.get_model('address', 'Apartment')
+    Unit = apps.get_model('address', 'Unit')
+    House = apps.get_model('address', 'House')
+
+    community_name = Community.objects.filter(pk=OuterRef('community_id')).values('community_name')[:1]
+    Apartment.objects.update(full_address=Concat(
+        Subquery(community_name), Value(' - 楼栋'), Cast('apartment_number', CharField()),
+        output_field=CharField(),
+    ))
+    apartment_label = Apartment.objects.filter(pk=OuterRef('apartment_id')).values(label=Concat(
+        F('community__community_name'), Value(' - '), Cast('apartment_number', CharField()), Value('栋-'),
+        output_field=CharField(),
+    ))[:1]
+    Unit.objects.update(full_address=Concat(
+        Subquery(apartment_label), Cast('unit_number', CharField()), Value('单元'),
+        output_field=CharField(),
+    ))
+    unit_label = Unit.objects.filter(pk=OuterRef('unit_id')).values('full_address')[:1]
+    House.objects.update(full_address=Concat(
+        Subquery(unit_label), Value('-'), F('house_number'),
+        output_field=CharField(),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('address', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apartment',
+            name='full_address',
+            field=models.CharField(blank=True, default='', max_length=320, verbose_name='完整地址'),
+        ),
+        migrations.AddField(
+            model_name='house',
+            name='full_address',
+            field=models.CharField(blank=True, default='', max_length=320, verbose_name='完整地址'),
+        ),
+        migrations.AddField(
+            model_name='unit',
+            name='full_address',
+            field=models.CharField(blank=True, default='', max_length=320, verbose_name='完整地址'),
+        ),
+        migrations.RunPython(fill_full_address, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:51
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+# 迁移中的计数规则按迁移时复制，不随 address.occupancy 的修改变化
+
+
+def _child_total(children, parent_field, aggregate):
+    totals = (
+        children.filter(**{parent_field: OuterRef('pk')})
+        .order_by()
+        .values(parent_field)
+        .annotate(n=aggregate)
+        .values('n')
+    )
+    return Coalesce(Subquery(totals), 0, output_field=IntegerField())
+
+
+def fill_occupancy(apps, schema_editor):
+    House = apps.get_model('address', 'House')
+    Unit = apps.get_model('address', 'Unit')
+    Building = apps.get_model('residents', 'Building')
+    Bungalow = apps.get_model('residents', 'Bungalow')
+    House.objects.update(resident_count=_child_total(Building.objects.all(), 'house_number', Count('pk')))
+    Unit.objects.update(resident_count=_child_total(House.objects.all(), 'unit', Sum('resident_count')))
+    apps.get_model('address', 'Community').objects.update(
+        resident_count=_child_total(Unit.objects.all(), 'apartment__community', Sum('resident_count')),
+    )
+    apps.get_model('address', 'Hutong').objects.update(
+        resident_count=_child_total(Bungalow.objects.all(), 'hutong', Count('pk')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('address', '0002_full_address'),
+        ('residents', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='community',
+            name='resident_count',
+            field=models.IntegerField(default=0, verbose_name='居住人数'),
+        ),
+        migrations.AddField(
+            model_name='house',
+            name='resident_count',
+            field=models.IntegerField(default=0, verbose_name='居住人数'),
+        ),
+        migrations.AddField(
+            model_name='hutong',
+            name='resident_count',
+            field=models.IntegerField(default=0, verbose_name='居住人数'),
+        ),
+        migrations.AddField(
+            model_name='unit',
+            name='resident_count',
+            field=models.IntegerField(default=0, verbose_name='居住人数'),
+        ),
+        migrations.RunPython(fill_occupancy, migrations.RunPython.noop),
+    ]
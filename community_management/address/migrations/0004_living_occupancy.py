@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:40
+
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+# 迁移中的计数规则按迁移时复制，不随 address.occupancy 的修改变化
+
+
+def _child_total(children, parent_field, aggregate):
+    totals = (
+        children.filter(**{parent_field: OuterRef('pk')})
+        .order_by()
+        .values(parent_field)
+        .annotate(n=aggregate)
+        .values('n')
+    )
+    return Coalesce(Subquery(totals), 0, output_field=IntegerField())
+
+
+def _fill(apps, living):
+    House = apps.get_model('address', 'House')
+    Unit = apps.get_model('address', 'Unit')
+    buildings = apps.get_model('residents', 'Building').objects.all()
+    bungalows = apps.get_model('residents', 'Bungalow').objects.all()
+    if living:
+        buildings = buildings.filter(resident__is_deceased=0)
+        bungalows = bungalows.filter(resident__is_deceased=0)
+    House.objects.update(resident_count=_child_total(buildings, 'house_number', Count('pk')))
+    Unit.objects.update(resident_count=_child_total(House.objects.all(), 'unit', Sum('resident_count')))
+    apps.get_model('address', 'Community').objects.update(
+        resident_count=_child_total(Unit.objects.all(), 'apartment__community', Sum('resident_count')),
+    )
+    apps.get_model('address', 'Hutong').objects.update(
+        resident_count=_child_total(bungalows, 'hutong', Count('pk')),
+    )
+
+
+def count_living_residents(apps, schema_editor):
+    """居住人数改为只计在世居民"""
+    _fill(apps, living=True)
+
+
+def count_all_residents(apps, schema_editor):
+    _fill(apps, living=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('address', '0003_occupancy'),
+    ]
+
+    operations = [
+        migrations.RunPython(count_living_residents, count_all_residents),
+    ]
@@ -47,6 +47,8 @@ class Hutong(models.Model):
     hutong_name = models.CharField(max_length=255, unique=True, verbose_name="胡同名称")
     group = models.ForeignKey('Group', on_delete=models.CASCADE, verbose_name="所属组别")
     hutong_number = models.CharField(max_length=50, verbose_name="胡同号")
+    # 在世居民的平房记录数（已故居民不计入），由平房记录及居民的信号增量维护
+    resident_count = models.IntegerField(default=0, verbose_name="居住人数")
     registration_date = models.DateTimeField(auto_now_add=True, verbose_name="登记日期")
     last_update_time = models.DateTimeField(auto_now=True, verbose_name="最后更新时间")
 
@@ -70,6 +72,8 @@ class Community(models.Model):
     group = models.ForeignKey('Group', on_delete=models.CASCADE, verbose_name='所属组别')
     community_number = models.CharField(max_length=50, verbose_name='小区号')
     has_property = models.BooleanField(default=False, verbose_name='是否有物业')
+    # 小区内在世居民的楼房记录数（已故居民不计入），由楼房记录及居民的信号增量维护
+    resident_count = models.IntegerField(default=0, verbose_name='居住人数')
     registration_date = models.DateTimeField(default=timezone.now, verbose_name='登记日期')
     last_update_time = models.DateTimeField(auto_now=True, verbose_name='最后更新时间')
 
@@ -91,6 +95,8 @@ class Apartment(models.Model):
     """楼栋信息模型"""
     community = models.ForeignKey('Community', on_delete=models.CASCADE, verbose_name='小区')
     apartment_number = models.PositiveSmallIntegerField(verbose_name='楼栋号')
+    # 完整地址，保存时生成，小区改名时批量刷新
+    full_address = models.CharField(max_length=320, blank=True, default='', verbose_name='完整地址')
     registration_date = models.DateTimeField(default=timezone.now, verbose_name='登记日期')
     last_update_time = models.DateTimeField(auto_now=True, verbose_name='最后更新时间')
 
@@ -103,8 +109,17 @@ class Apartment(models.Model):
         ]
 
     def __str__(self):
+        return self.full_address
+
+    def build_full_address(self):
         return f'{self.community.community_name} - 楼栋{self.apartment_number}'
 
+    def save(self, *args, **kwargs):
+        self.full_address = self.build_full_address()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'full_address'}
+        super().save(*args, **kwargs)
+
 
 class Unit(models.Model):
     """单元信息模型"""
@@ -112,6 +127,10 @@ class Unit(models.Model):
     apartment = models.ForeignKey('Apartment', on_delete=models.CASCADE, verbose_name='楼栋')
     # 单元号
     unit_number = models.SmallIntegerField(verbose_name='单元号')
+    # 完整地址，保存时生成，小区或楼栋变更时批量刷新
+    full_address = models.CharField(max_length=320, blank=True, default='', verbose_name='完整地址')
+    # 单元内在世居民的楼房记录数（已故居民不计入），由楼房记录及居民的信号增量维护
+    resident_count = models.IntegerField(default=0, verbose_name='居住人数')
     # 登记日期
     registration_date = models.DateTimeField(auto_now_add=True, verbose_name='登记日期')
     # 最后更新时间
@@ -133,8 +152,17 @@ class Unit(models.Model):
 
     def __str__(self):
         """返回单元的字符串表示"""
+        return self.full_address
+
+    def build_full_address(self):
         return f'{self.apartment.community.community_name} - {self.apartment.apartment_number}栋-{self.unit_number}单元'
 
+    def save(self, *args, **kwargs):
+        self.full_address = self.build_full_address()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'full_address'}
+        super().save(*args, **kwargs)
+
 
 class House(models.Model):
     """户号信息模型"""
@@ -142,6 +170,10 @@ class House(models.Model):
     unit = models.ForeignKey('Unit', on_delete=models.CASCADE, verbose_name='单元')
     # 户号
     house_number = models.CharField(max_length=20, verbose_name='户号')
+    # 完整地址，保存时生成，小区、楼栋或单元变更时批量刷新
+    full_address = models.CharField(max_length=320, blank=True, default='', verbose_name='完整地址')
+    # 户内在世居民的楼房记录数（已故居民不计入），由楼房记录及居民的信号增量维护
+    resident_count = models.IntegerField(default=0, verbose_name='居住人数')
     # 登记日期
     registration_date = models.DateTimeField(auto_now_add=True, verbose_name='登记日期')
     # 最后更新时间
@@ -161,4 +193,13 @@ class House(models.Model):
 
     def __str__(self):
         """返回户号的字符串表示"""
-        return f'{self.unit.apartment.community.community_name} - {self.unit.apartment.apartment_number}栋-{self.unit.unit_number}单元-{self.house_number}'
+        return self.full_address
+
+    def build_full_address(self):
+        return f'{self.unit.full_address}-{self.house_number}'
+
+    def save(self, *args, **kwargs):
+        self.full_address = self.build_full_address()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'full_address'}
+        super().save(*args, **kwargs)
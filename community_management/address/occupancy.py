@@ -0,0 +1,166 @@
+"""
+居住人数
+
+户号、单元、小区的 resident_count 为其下在世居民的楼房记录数，胡同的 resident_count 为在世居民的平房记录数，
+已故居民不计入。以下变化由信号增量更新：
+楼房/平房新增、删除或更换户号/胡同，居民标记为已故或取消标记，户号、单元、楼栋改挂到其他上级。
+楼房的增量一次查询取得户号所属的单元和小区，再逐级 UPDATE ... SET resident_count = resident_count + n。
+bulk_create 等不触发信号的批量写入需调用 rebuild_occupancy 或执行 rebuild_occupancy 命令，
+每一级用一条 UPDATE ... SET resident_count = (子查询计数) 刷新。
+迁移不导入本模块，而是复制所需的逻辑，以免计数规则修改改变历史迁移的结果。
+"""
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from residents.models import Building, Bungalow, Resident
+from .models import Community, House, Hutong, Unit
+
+# 户号成员接口返回的居民字段：(查询路径, 输出键)
+MEMBER_FIELDS = (
+    ('resident_id', 'id'),
+    ('resident__name', 'name'),
+    ('resident__gender', 'gender'),
+    ('resident__birth_date', 'birth_date'),
+    ('resident__phone_number', 'phone_number'),
+    ('resident__is_deceased', 'is_deceased'),
+    ('building_number', 'building_number'),
+)
+
+_GENDER_LABELS = dict(Resident._meta.get_field('gender').flatchoices)
+
+
+def _child_total(children, parent_field, aggregate):
+    """按 parent_field 汇总下级记录的相关子查询，没有下级记录时为0"""
+    totals = (
+        children.filter(**{parent_field: OuterRef('pk')})
+        .order_by()
+        .values(parent_field)
+        .annotate(n=aggregate)
+        .values('n')
+    )
+    return Coalesce(Subquery(totals), 0, output_field=IntegerField())
+
+
+def refresh_house_occupancy(houses, buildings):
+    """刷新户号的居住人数：楼房记录数"""
+    return houses.update(resident_count=_child_total(buildings, 'house_number', Count('pk')))
+
+
+def refresh_unit_occupancy(units, houses):
+    """刷新单元的居住人数：各户之和，须在户号刷新之后调用"""
+    return units.update(resident_count=_child_total(houses, 'unit', Sum('resident_count')))
+
+
+def refresh_community_occupancy(communities, units):
+    """刷新小区的居住人数：各单元之和，须在单元刷新之后调用"""
+    return communities.update(resident_count=_child_total(units, 'apartment__community', Sum('resident_count')))
+
+
+def refresh_hutong_occupancy(hutongs, bungalows):
+    """刷新胡同的居住人数：平房记录数"""
+    return hutongs.update(resident_count=_child_total(bungalows, 'hutong', Count('pk')))
+
+
+def rebuild_occupancy():
+    """从楼房、平房表全量重建各级居住人数，返回 {层级: 更新行数}"""
+    with transaction.atomic():
+        return {
+            'house': refresh_house_occupancy(House.objects.all(), Building.objects.filter(resident__is_deceased=0)),
+            'unit': refresh_unit_occupancy(Unit.objects.all(), House.objects.all()),
+            'community': refresh_community_occupancy(Community.objects.all(), Unit.objects.all()),
+            'hutong': refresh_hutong_occupancy(Hutong.objects.all(), Bungalow.objects.filter(resident__is_deceased=0)),
+        }
+
+
+def _apply(deltas):
+    """各级计数在同一事务中更新，只提交一次"""
+    with transaction.atomic():
+        for (model, pk), n in deltas.items():
+            if n:
+                model.objects.filter(pk=pk).update(resident_count=F('resident_count') + n)
+
+
+def apply_house_changes(changes):
+    """把 {户号id: 楼房记录增量} 累加到户号及其所属的单元、小区"""
+    changes = {house_id: n for house_id, n in changes.items() if n}
+    if not changes:
+        return
+    deltas = Counter()
+    for house_id, unit_id, community_id in (
+        House.objects.filter(pk__in=changes).values_list('id', 'unit_id', 'unit__apartment__community_id')
+    ):
+        n = changes[house_id]
+        deltas[House, house_id] += n
+        deltas[Unit, unit_id] += n
+        deltas[Community, community_id] += n
+    _apply(deltas)
+
+
+def apply_hutong_changes(changes):
+    """把 {胡同id: 平房记录增量} 累加到胡同"""
+    _apply(Counter({(Hutong, hutong_id): n for hutong_id, n in changes.items()}))
+
+
+def apply_death_changes(residents, n):
+    """
+    居民标记为已故（n=-1）或取消标记（n=1）时，调整其全部楼房/平房所在地址的居住人数
+
+    residents 为居民id列表或查询集；以 update() 批量修改标识时须在 update() 之前调用。
+    每种居住记录一条按地址分组的查询，与居民数无关。
+    """
+    for model, field, apply_changes in ((Building, 'house_number', apply_house_changes),
+                                        (Bungalow, 'hutong', apply_hutong_changes)):
+        rows = (
+            model.objects.filter(resident_id__in=residents)
+            .order_by()
+            .values(f'{field}_id')
+            .annotate(total=Count('pk'))
+            .values_list(f'{field}_id', 'total')
+        )
+        apply_changes({address_id: n * total for address_id, total in rows})
+
+
+def move_occupancy(n, previous, current):
+    """
+    地址节点改挂到其他上级时，把其 n 个居住人数从原来的各级上级移到新的各级上级
+
+    previous、current 为 [(模型, id)]，两边相同的上级计数不变
+    """
+    deltas = Counter()
+    for key in previous:
+        deltas[key] -= n
+    for key in current:
+        deltas[key] += n
+    _apply(deltas)
+
+
+def unit_households(unit_id):
+    """
+    一个单元内各户的居民，一次查询取得
+
+    Returns:
+        [{'house_id', 'house_number', 'resident_count', 'residents': [居民字典]}]，按户号排列；
+        没有居民的户不包含在结果中
+    """
+    paths = [path for path, _ in MEMBER_FIELDS]
+    keys = [key for _, key in MEMBER_FIELDS]
+    rows = (
+        Building.objects.filter(house_number__unit_id=unit_id)
+        .order_by('house_number__house_number', 'house_number_id', 'resident_id')
+        .values_list('house_number_id', 'house_number__house_number', 'house_number__resident_count', *paths)
+    )
+    households = {}
+    for house_id, house_number, resident_count, *values in rows:
+        household = households.setdefault(house_id, {
+            'house_id': house_id,
+            'house_number': house_number,
+            'resident_count': resident_count,
+            'residents': [],
+        })
+        member = dict(zip(keys, values))
+        member['gender'] = _GENDER_LABELS.get(member['gender'], member['gender'])
+        member['birth_date'] = member['birth_date'].isoformat()
+        member['is_deceased'] = bool(member['is_deceased'])
+        household['residents'].append(member)
+    return list(households.values())
@@ -0,0 +1,216 @@
+from collections import Counter
+from django.db.models import F, IntegerField, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from index import versions
+from residents.models import Building, Bungalow, Resident
+from .labels import refresh_apartment_addresses, refresh_house_addresses, refresh_unit_addresses
+from .models import Apartment, Community, House, Unit
+from .occupancy import apply_death_changes, apply_house_changes, apply_hutong_changes, move_occupancy
+from .tree import NODE_FIELDS, NODE_TYPES
+
+# 居住记录模型 -> (指向地址的外键, 累加居住人数的函数)
+OCCUPANCY_SOURCES = {
+    Building: ('house_number', apply_house_changes),
+    Bungalow: ('hutong', apply_hutong_changes),
+}
+
+
+# 地址模型 -> (下级完整地址依赖的标签字段, 影响标签的字段)
+LABEL_SOURCES = {
+    Community: ('community_name', {'community_name'}),
+    Apartment: ('full_address', {'community', 'community_id', 'apartment_number'}),
+    Unit: ('full_address', {'apartment', 'apartment_id', 'unit_number'}),
+}
+
+
+@receiver(pre_save, sender=Community)
+@receiver(pre_save, sender=Apartment)
+@receiver(pre_save, sender=Unit)
+def remember_previous_label(sender, instance, raw=False, update_fields=None, **kwargs):
+    """保存前读取原来的标签，新增或未修改影响标签的字段时为 None"""
+    instance._previous_label = None
+    field, sources = LABEL_SOURCES[sender]
+    if raw or instance._state.adding or (update_fields is not None and not sources & set(update_fields)):
+        return
+    instance._previous_label = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+
+
+def _label_changed(sender, instance, created, raw):
+    field, _ = LABEL_SOURCES[sender]
+    previous = getattr(instance, '_previous_label', None)
+    return not (created or raw) and previous is not None and previous != getattr(instance, field)
+
+
+@receiver(post_save, sender=Community)
+def refresh_community_addresses(sender, instance, created, raw=False, **kwargs):
+    """小区改名后刷新其下楼栋、单元、户号的完整地址"""
+    if not _label_changed(sender, instance, created, raw):
+        return
+    refresh_apartment_addresses(Apartment.objects.filter(community=instance))
+    refresh_unit_addresses(Unit.objects.filter(apartment__community=instance))
+    refresh_house_addresses(House.objects.filter(unit__apartment__community=instance))
+
+
+@receiver(post_save, sender=Apartment)
+def refresh_apartment_children(sender, instance, created, raw=False, **kwargs):
+    """楼栋号或所属小区变更后刷新其下单元、户号的完整地址"""
+    if not _label_changed(sender, instance, created, raw):
+        return
+    refresh_unit_addresses(Unit.objects.filter(apartment=instance))
+    refresh_house_addresses(House.objects.filter(unit__apartment=instance))
+
+
+@receiver(post_save, sender=Unit)
+def refresh_unit_children(sender, instance, created, raw=False, **kwargs):
+    """单元号或所属楼栋变更后刷新其下户号的完整地址"""
+    if not _label_changed(sender, instance, created, raw):
+        return
+    refresh_house_addresses(House.objects.filter(unit=instance))
+
+
+def _is_living(sender, instance):
+    """楼房/平房记录的居民是否在世，已加载的居民对象直接使用，否则查询一次"""
+    if sender.resident.is_cached(instance):
+        return not instance.resident.is_deceased
+    return Resident.objects.filter(pk=instance.resident_id, is_deceased=0).exists()
+
+
+@receiver(pre_save, sender=Building)
+@receiver(pre_save, sender=Bungalow)
+def remember_previous_address(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    保存前读取楼房/平房原来的 (户号或胡同, 居民, 居民是否已故)，
+    新增或未修改地址及居民时为 None
+    """
+    instance._previous_address = None
+    field, _ = OCCUPANCY_SOURCES[sender]
+    watched = {field, f'{field}_id', 'resident', 'resident_id'}
+    if raw or instance._state.adding or (update_fields is not None and not watched & set(update_fields)):
+        return
+    instance._previous_address = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list(f'{field}_id', 'resident_id', 'resident__is_deceased')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Building)
+@receiver(post_save, sender=Bungalow)
+def update_occupancy(sender, instance, created, raw=False, **kwargs):
+    """在世居民的楼房/平房新增或更换户号/胡同、改为其他居民时调整居住人数"""
+    if raw:
+        return
+    field, apply_changes = OCCUPANCY_SOURCES[sender]
+    previous = getattr(instance, '_previous_address', None)
+    if not created and previous is None:
+        return
+    changes = Counter()
+    if previous is None:
+        living = _is_living(sender, instance)
+    else:
+        address_id, resident_id, deceased = previous
+        if not deceased:
+            changes[address_id] -= 1
+        living = not deceased if resident_id == instance.resident_id else _is_living(sender, instance)
+    if living:
+        changes[getattr(instance, f'{field}_id')] += 1
+    apply_changes(changes)
+
+
+@receiver(post_delete, sender=Building)
+@receiver(post_delete, sender=Bungalow)
+def remove_occupancy(sender, instance, **kwargs):
+    """删除在世居民的楼房/平房时减少居住人数；随居民级联删除时居民行仍在，可以查询是否已故"""
+    field, apply_changes = OCCUPANCY_SOURCES[sender]
+    if _is_living(sender, instance):
+        apply_changes({getattr(instance, f'{field}_id'): -1})
+
+
+@receiver(post_save, sender=Resident)
+def update_occupancy_on_death(sender, instance, created, raw=False, **kwargs):
+    """
+    居民标记为已故或取消标记时，调整其全部楼房/平房所在地址的居住人数；
+    原值由 residents.signals.remember_previous_values 读取
+    """
+    previous = getattr(instance, '_previous_values', None)
+    if raw or previous is None or previous['is_deceased'] == instance.is_deceased:
+        return
+    apply_death_changes([instance.pk], -1 if instance.is_deceased else 1)
+
+
+# 地址模型 -> (上级外键, 本节点的居住人数表达式, 各级上级：[(查询路径, 上级模型)])
+PARENT_SOURCES = {
+    House: ('unit', F('resident_count'), [('unit_id', Unit), ('unit__apartment__community_id', Community)]),
+    Unit: ('apartment', F('resident_count'), [('apartment__community_id', Community)]),
+    Apartment: (
+        'community', Coalesce(Sum('unit__resident_count'), 0, output_field=IntegerField()),
+        [('community_id', Community)],
+    ),
+}
+
+
+def _parents(paths, values):
+    return [(model, pk) for (_, model), pk in zip(paths, values)]
+
+
+@receiver(pre_save, sender=House)
+@receiver(pre_save, sender=Unit)
+@receiver(pre_save, sender=Apartment)
+def remember_previous_parent(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    保存前读取原来的上级、各级上级及本节点的居住人数，存放在 instance._previous_parent 中；
+    新增或未修改上级时为 None
+    """
+    instance._previous_parent = None
+    parent, count, paths = PARENT_SOURCES[sender]
+    if raw or instance._state.adding or (update_fields is not None and not {parent, f'{parent}_id'} & set(update_fields)):
+        return
+    row = (
+        sender.objects.filter(pk=instance.pk)
+        .annotate(occupancy=count)
+        .values_list(f'{parent}_id', 'occupancy', *[path for path, _ in paths])
+        .first()
+    )
+    if row is None:
+        return
+    instance._previous_parent = row
+    # 居住人数只由信号维护，保存时写回数据库中的值，避免内存中的旧值覆盖其间的增量
+    if hasattr(instance, 'resident_count'):
+        instance.resident_count = row[1]
+
+
+@receiver(post_save, sender=House)
+@receiver(post_save, sender=Unit)
+@receiver(post_save, sender=Apartment)
+def move_parent_occupancy(sender, instance, created, raw=False, **kwargs):
+    """户号、单元、楼栋改挂到其他上级后，把其居住人数从原来的各级上级移到新的各级上级"""
+    previous = getattr(instance, '_previous_parent', None)
+    parent, _, paths = PARENT_SOURCES[sender]
+    if created or raw or previous is None or previous[0] == getattr(instance, f'{parent}_id'):
+        return
+    _, n, *previous_parents = previous
+    if not n:
+        return
+    current_parents = sender.objects.filter(pk=instance.pk).values_list(*[path for path, _ in paths]).first()
+    move_occupancy(n, _parents(paths, previous_parents), _parents(paths, current_parents))
+
+
+# 地址模型 -> 地址树读取的字段，外键同时包含字段名和列名
+TREE_FIELDS = {
+    model: {name for field in NODE_FIELDS[node_type] for name in (field, field.removesuffix('_id'))}
+    for node_type, (model, _, _) in NODE_TYPES.items()
+}
+
+
+def bump_tree_version(sender, instance, raw=False, update_fields=None, **kwargs):
+    """地址树上的节点新增、删除或修改名称、上级时，在同一事务中递增地址树版本号"""
+    if raw or (update_fields is not None and not TREE_FIELDS[sender] & set(update_fields)):
+        return
+    versions.bump(versions.ADDRESS_TREE)
+
+
+for tree_model in TREE_FIELDS:
+    post_save.connect(bump_tree_version, sender=tree_model)
+    post_delete.connect(bump_tree_version, sender=tree_model)
@@ -1,3 +1,306 @@
-from django.test import TestCase
+from datetime import date
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from community_management import cache as page_cache
+from residents.consistency import reconcile
+from residents.models import Building, Bungalow, Ethnicity, Resident
+from .models import Group, Hutong, Community, Apartment, Unit, House
+from .occupancy import rebuild_occupancy, unit_households
+from .tree import build_tree, get_children, get_tree_version
 
-# Create your tests here.
+
+class FullAddressTests(TestCase):
+    """完整地址冗余字段测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        group = Group.objects.create(group_number='1组')
+        cls.community = Community.objects.create(community_name='阳光小区', group=group, community_number='1')
+        cls.apartment = Apartment.objects.create(community=cls.community, apartment_number=3)
+        cls.unit = Unit.objects.create(apartment=cls.apartment, unit_number=2)
+        for i in range(10):
+            House.objects.create(unit=cls.unit, house_number=f'30{i}')
+
+    def test_labels_match_hierarchy(self):
+        self.assertEqual(str(self.apartment), '阳光小区 - 楼栋3')
+        self.assertEqual(str(self.unit), '阳光小区 - 3栋-2单元')
+        self.assertEqual(str(House.objects.get(house_number='301')), '阳光小区 - 3栋-2单元-301')
+
+    def test_rendering_houses_is_single_query(self):
+        with self.assertNumQueries(1):
+            labels = [str(house) for house in House.objects.all()]
+        self.assertEqual(len(labels), 10)
+
+    def test_rendering_buildings_is_single_query(self):
+        han = Ethnicity.objects.create(name='汉族')
+        for i, house in enumerate(House.objects.all()):
+            resident = Resident.objects.create(
+                name=f'居民{i}', id_card=f'11010119900101{i:04d}', birth_date=date(1990, 1, 1), ethnicity=han,
+                household_address='北京', phone_number=f'1380000{i:04d}',
+            )
+            Building.objects.create(resident=resident, building_number=3, house_number=house)
+        with self.assertNumQueries(1):
+            labels = [str(building) for building in Building.objects.all()]
+        self.assertEqual(len(labels), 10)
+        self.assertIn('居民0 - 阳光小区 - 3栋-2单元-300单元 - 3', labels)
+
+    def test_rename_refreshes_descendants(self):
+        self.community.community_name = '月亮小区'
+        self.community.save()
+        self.assertEqual(str(Apartment.objects.get()), '月亮小区 - 楼栋3')
+        self.assertEqual(str(Unit.objects.get()), '月亮小区 - 3栋-2单元')
+        self.assertTrue(all(house.full_address.startswith('月亮小区 - 3栋-2单元-') for house in House.objects.all()))
+
+        unit = Unit.objects.get()
+        unit.unit_number = 5
+        unit.save(update_fields=['unit_number'])
+        self.assertEqual(str(House.objects.get(house_number='301')), '月亮小区 - 3栋-5单元-301')
+
+    def test_unchanged_labels_skip_refresh(self):
+        # 只读取原名称、更新小区本身并递增地址树版本号，不刷新下级
+        self.community.has_property = True
+        with self.assertNumQueries(3):
+            self.community.save()
+        with self.assertNumQueries(1):
+            self.community.save(update_fields=['has_property'])
+
+        other = Community.objects.create(community_name='星光小区', group=self.community.group, community_number='2')
+        self.apartment.community = other
+        self.apartment.save()
+        self.assertEqual(str(Unit.objects.get()), '星光小区 - 3栋-2单元')
+        self.assertEqual(str(House.objects.get(house_number='301')), '星光小区 - 3栋-2单元-301')
+
+
+class AddressPageCacheTests(TestCase):
+    """地址页面缓存测试"""
+
+    def setUp(self):
+        cache.clear()
+        page_cache.reset_stats()
+
+    def test_unrelated_query_params_share_entry(self):
+        for query in ('', '?a=1', '?b=2&c=3'):
+            self.assertEqual(self.client.get(f'/address/streets/{query}').status_code, 200)
+        self.assertEqual(page_cache.get_stats()[page_cache.ADDRESS_PAGES]['misses'], 1)
+        self.assertEqual(page_cache.get_stats()[page_cache.ADDRESS_PAGES]['hits'], 2)
+
+        # 页面依赖的参数按取值分别缓存
+        factory = RequestFactory()
+        for query in ({'page': 1}, {'page': 2, 'x': 1}, {'x': 2, 'page': 2}):
+            page_cache.cached_render(
+                factory.get('/address/streets/', query), 'address/streets.html', page_cache.ADDRESS_PAGES,
+                params=('page',),
+            )
+        self.assertEqual(page_cache.get_stats()[page_cache.ADDRESS_PAGES]['misses'], 3)
+
+
+class AddressTreeTests(TestCase):
+    """地址层级树接口测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        group = Group.objects.create(group_number='1组')
+        Hutong.objects.create(hutong_name='南锣鼓巷', group=group, hutong_number='1')
+        cls.community = Community.objects.create(community_name='阳光小区', group=group, community_number='1')
+        for a in range(2):
+            apartment = Apartment.objects.create(community=cls.community, apartment_number=a + 1)
+            for u in range(2):
+                unit = Unit.objects.create(apartment=apartment, unit_number=u + 1)
+                for h in range(3):
+                    House.objects.create(unit=unit, house_number=f'{h + 1}01')
+
+    def setUp(self):
+        cache.clear()
+        session = self.client.session
+        session['admin_id'] = 1
+        session.save()
+
+    def test_tree_loads_one_query_per_level(self):
+        # 组别、小区、楼栋、单元、户号、胡同各一条
+        with self.assertNumQueries(6):
+            tree = build_tree()
+        group = tree[0]
+        self.assertEqual([child['type'] for child in group['children']], ['community', 'hutong'])
+        community = group['children'][0]
+        self.assertEqual(len(community['children']), 2)
+        self.assertEqual(sum(len(unit['children']) for apt in community['children'] for unit in apt['children']), 12)
+
+    def test_subtree_and_lazy_children(self):
+        subtree = build_tree(f'community:{self.community.pk}')
+        self.assertEqual(subtree['name'], '阳光小区')
+        with self.assertNumQueries(1):
+            children = get_children(f'community:{self.community.pk}')
+        self.assertEqual([child['name'] for child in children], ['1栋', '2栋'])
+        self.assertTrue(all(child['has_children'] for child in children))
+
+    def test_etag_revalidation(self):
+        response = self.client.get('/address/tree/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(self.client.get('/address/tree/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # 不影响地址树的修改不改变版本
+        Community.objects.get().save(update_fields=['has_property'])
+        self.assertEqual(self.client.get('/address/tree/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        House.objects.first().delete()
+        self.assertEqual(self.client.get('/address/tree/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_version_is_single_query(self):
+        with self.assertNumQueries(1):
+            get_tree_version()
+
+    def test_invalid_node(self):
+        self.assertEqual(self.client.get('/address/tree/', {'node': 'street:1'}).status_code, 400)
+        self.assertEqual(self.client.get('/address/tree/', {'node': 'unit:999'}).status_code, 404)
+
+
+class OccupancyTests(TestCase):
+    """居住人数及单元成员接口测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        group = Group.objects.create(group_number='1组')
+        cls.community = Community.objects.create(community_name='阳光小区', group=group, community_number='1')
+        apartment = Apartment.objects.create(community=cls.community, apartment_number=3)
+        cls.units = [Unit.objects.create(apartment=apartment, unit_number=i) for i in range(2)]
+        cls.houses = [House.objects.create(unit=unit, house_number=f'{i}01') for i, unit in enumerate(cls.units)]
+        cls.hutong = Hutong.objects.create(hutong_name='东四胡同', group=group, hutong_number='1')
+        han = Ethnicity.objects.create(name='汉族')
+        cls.residents = [
+            Resident.objects.create(
+                name=f'居民{i}', id_card=f'11010119900101{i:04d}', birth_date=date(1990, 1, 1), ethnicity=han,
+                household_address='北京', phone_number=f'1380000{i:04d}',
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        session = self.client.session
+        session['admin_id'] = 1
+        session.save()
+
+    def counts(self):
+        return (
+            list(House.objects.order_by('id').values_list('resident_count', flat=True)),
+            list(Unit.objects.order_by('id').values_list('resident_count', flat=True)),
+            Community.objects.get().resident_count,
+            Hutong.objects.get().resident_count,
+        )
+
+    def test_signals_maintain_counts(self):
+        buildings = [
+            Building.objects.create(resident=resident, building_number=3, house_number=self.houses[0])
+            for resident in self.residents
+        ]
+        Bungalow.objects.create(resident=self.residents[0], bungalow_number='1号', hutong=self.hutong)
+        self.assertEqual(self.counts(), ([3, 0], [3, 0], 3, 1))
+
+        buildings[0].house_number = self.houses[1]
+        buildings[0].save()
+        buildings[1].save(update_fields=['building_number'])
+        self.assertEqual(self.counts(), ([2, 1], [2, 1], 3, 1))
+
+        # 随居民级联删除楼房及平房记录
+        self.residents[0].delete()
+        self.assertEqual(self.counts(), ([2, 0], [2, 0], 2, 0))
+
+    def test_deceased_residents_not_counted(self):
+        for resident in self.residents:
+            Building.objects.create(resident=resident, building_number=3, house_number=self.houses[0])
+        Bungalow.objects.create(resident=self.residents[0], bungalow_number='1号', hutong=self.hutong)
+        self.residents[0].is_deceased = 1
+        self.residents[0].save()
+        self.assertEqual(self.counts(), ([2, 0], [2, 0], 2, 0))
+
+        # 已故居民的楼房更换户号或删除时不调整居住人数
+        building = Building.objects.get(resident=self.residents[0])
+        building.house_number = self.houses[1]
+        building.save()
+        building.delete()
+        self.assertEqual(self.counts(), ([2, 0], [2, 0], 2, 0))
+        self.residents[0].delete()
+        self.assertEqual(self.counts(), ([2, 0], [2, 0], 2, 0))
+
+        self.residents[1].is_deceased = 1
+        self.residents[1].save()
+        self.residents[1].is_deceased = 0
+        self.residents[1].save()
+        self.assertEqual(self.counts(), ([2, 0], [2, 0], 2, 0))
+        Resident.objects.filter(pk=self.residents[1].pk).update(is_deceased=1)
+        rebuild_occupancy()
+        self.assertEqual(self.counts(), ([1, 0], [1, 0], 1, 0))
+
+    def test_reconcile_adjusts_counts(self):
+        Building.objects.create(resident=self.residents[0], building_number=3, house_number=self.houses[0])
+        Bungalow.objects.create(resident=self.residents[0], bungalow_number='1号', hutong=self.hutong)
+        # 批量写入造成已故标识没有对应的死亡明细
+        Resident.objects.filter(pk=self.residents[0].pk).update(is_deceased=1)
+        rebuild_occupancy()
+        self.assertEqual(self.counts(), ([0, 0], [0, 0], 0, 0))
+        reconcile()
+        self.assertEqual(self.counts(), ([1, 0], [1, 0], 1, 1))
+
+    def test_moving_nodes_moves_counts(self):
+        for resident in self.residents:
+            Building.objects.create(resident=resident, building_number=3, house_number=self.houses[0])
+        other = Community.objects.create(community_name='月亮小区', group=self.community.group, community_number='2')
+        other_apartment = Apartment.objects.create(community=other, apartment_number=1)
+        other_unit = Unit.objects.create(apartment=other_apartment, unit_number=1)
+
+        def totals():
+            return (
+                list(House.objects.order_by('id').values_list('resident_count', flat=True)),
+                list(Unit.objects.order_by('id').values_list('resident_count', flat=True)),
+                list(Community.objects.order_by('id').values_list('resident_count', flat=True)),
+            )
+
+        # 户号改挂到另一小区的单元，内存中的旧计数不覆盖数据库中的值
+        house = House.objects.get(pk=self.houses[0].pk)
+        house.resident_count = 0
+        house.unit = other_unit
+        house.save()
+        self.assertEqual(totals(), ([3, 0], [0, 0, 3], [0, 3]))
+
+        # 单元改挂到原小区的楼栋
+        other_unit.apartment = self.units[0].apartment
+        other_unit.save(update_fields=['apartment'])
+        self.assertEqual(totals(), ([3, 0], [0, 0, 3], [3, 0]))
+
+        # 楼栋改挂到另一小区，其下全部单元的人数随之移动
+        apartment = self.units[0].apartment
+        apartment.community = other
+        apartment.save()
+        self.assertEqual(totals(), ([3, 0], [0, 0, 3], [0, 3]))
+        rebuild_occupancy()
+        self.assertEqual(totals(), ([3, 0], [0, 0, 3], [0, 3]))
+
+        # 未修改上级的保存不读取原值：只有更新本身及地址树版本号
+        with self.assertNumQueries(2):
+            house.save(update_fields=['house_number'])
+
+    def test_rebuild_after_bulk_create(self):
+        Building.objects.bulk_create([
+            Building(resident=resident, building_number=3, house_number=self.houses[i % 2])
+            for i, resident in enumerate(self.residents)
+        ])
+        Bungalow.objects.bulk_create([Bungalow(resident=self.residents[0], bungalow_number='1号', hutong=self.hutong)])
+        self.assertEqual(self.counts(), ([0, 0], [0, 0], 0, 0))
+        rebuild_occupancy()
+        self.assertEqual(self.counts(), ([2, 1], [2, 1], 3, 1))
+
+    def test_unit_households(self):
+        for resident in self.residents:
+            Building.objects.create(resident=resident, building_number=3, house_number=self.houses[0])
+        with self.assertNumQueries(1):
+            households = unit_households(self.units[0].id)
+        self.assertEqual(len(households), 1)
+        self.assertEqual(households[0]['house_number'], '001')
+        self.assertEqual(households[0]['resident_count'], 3)
+        self.assertEqual([member['name'] for member in households[0]['residents']], ['居民0', '居民1', '居民2'])
+
+        data = self.client.get(f'/address/units/{self.units[0].id}/residents/').json()
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(self.client.get(f'/address/units/{self.units[1].id}/residents/').json()['data'], [])
+        self.assertEqual(self.client.get('/address/units/999999/residents/').status_code, 404)
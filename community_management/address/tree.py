@@ -0,0 +1,147 @@
+"""
+地址层级树
+
+组别 → 小区 → 楼栋 → 单元 → 户号，以及 组别 → 胡同。
+整棵树或子树通过 prefetch_related 按层加载，每层一条查询；
+懒加载时只查询一个节点的直接子节点。节点标识形如 'community:5'。
+"""
+from django.db.models import Exists, OuterRef, Prefetch
+from index import versions
+from .models import Group, Hutong, Community, Apartment, Unit, House
+
+# 节点类型 -> (模型, 名称函数, 子节点关系名列表)
+NODE_TYPES = {
+    'group': (Group, lambda obj: obj.group_number, ['community_set', 'hutong_set']),
+    'community': (Community, lambda obj: obj.community_name, ['apartment_set']),
+    'apartment': (Apartment, lambda obj: f'{obj.apartment_number}栋', ['unit_set']),
+    'unit': (Unit, lambda obj: f'{obj.unit_number}单元', ['house_set']),
+    'house': (House, lambda obj: obj.house_number, []),
+    'hutong': (Hutong, lambda obj: obj.hutong_name, []),
+}
+
+# 模型 -> 节点类型
+MODEL_TYPES = {model: node_type for node_type, (model, _, _) in NODE_TYPES.items()}
+
+# 各节点类型只加载树所需的字段
+NODE_FIELDS = {
+    'group': ('id', 'group_number'),
+    'community': ('id', 'group_id', 'community_name'),
+    'apartment': ('id', 'community_id', 'apartment_number'),
+    'unit': ('id', 'apartment_id', 'unit_number'),
+    'house': ('id', 'unit_id', 'house_number'),
+    'hutong': ('id', 'group_id', 'hutong_name'),
+}
+
+
+def parse_node(node):
+    """
+    解析节点标识
+
+    Raises:
+        ValueError: 节点标识格式错误时抛出
+    """
+    node_type, _, node_id = (node or '').partition(':')
+    if node_type not in NODE_TYPES or not node_id.isdigit():
+        raise ValueError(f'节点标识无效: {node}')
+    return node_type, int(node_id)
+
+
+def _relation(model, accessor):
+    """返回 (子模型, 子模型指向父节点的外键名)"""
+    rel = model._meta.get_field(accessor.removesuffix('_set'))
+    return rel.related_model, rel.field.name
+
+
+def _node_queryset(node_type):
+    model = NODE_TYPES[node_type][0]
+    return model.objects.only(*NODE_FIELDS[node_type]).order_by('id')
+
+
+def _prefetches(node_type, prefix=''):
+    """生成某节点类型下全部层级的 Prefetch，每层一条查询"""
+    model, _, accessors = NODE_TYPES[node_type]
+    prefetches = []
+    for accessor in accessors:
+        child_model, _ = _relation(model, accessor)
+        child_type = MODEL_TYPES[child_model]
+        lookup = f'{prefix}{accessor}'
+        prefetches.append(Prefetch(lookup, queryset=_node_queryset(child_type)))
+        prefetches.extend(_prefetches(child_type, f'{lookup}__'))
+    return prefetches
+
+
+def _serialize(obj, node_type):
+    _, name, accessors = NODE_TYPES[node_type]
+    children = []
+    for accessor in accessors:
+        child_type = MODEL_TYPES[_relation(type(obj), accessor)[0]]
+        children.extend(_serialize(child, child_type) for child in getattr(obj, accessor).all())
+    return {'id': f'{node_type}:{obj.pk}', 'type': node_type, 'name': name(obj), 'children': children}
+
+
+def build_tree(node=None):
+    """
+    构建整棵地址树，或以 node 为根的子树
+
+    Returns:
+        整棵树时返回组别节点列表，子树时返回单个节点；节点不存在时返回 None
+    """
+    if node is None:
+        groups = _node_queryset('group').prefetch_related(*_prefetches('group'))
+        return [_serialize(group, 'group') for group in groups]
+    node_type, node_id = parse_node(node)
+    root = _node_queryset(node_type).filter(pk=node_id).prefetch_related(*_prefetches(node_type)).first()
+    return _serialize(root, node_type) if root else None
+
+
+def _children_queryset(child_type, **filters):
+    """直接子节点查询，每种下级关系附带一个 EXISTS 标记"""
+    model, _, accessors = NODE_TYPES[child_type]
+    flags = {}
+    for accessor in accessors:
+        grandchild_model, fk_name = _relation(model, accessor)
+        flags[f'has_{accessor}'] = Exists(grandchild_model.objects.filter(**{fk_name: OuterRef('pk')}))
+    return _node_queryset(child_type).filter(**filters).annotate(**flags), list(flags)
+
+
+def get_children(node=None):
+    """
+    懒加载：返回节点的直接子节点，node 为空时返回全部组别
+
+    Returns:
+        子节点列表，每个节点带 has_children 标记
+    """
+    if node is None:
+        parts = [('group', _children_queryset('group'))]
+    else:
+        node_type, node_id = parse_node(node)
+        model, _, accessors = NODE_TYPES[node_type]
+        parts = []
+        for accessor in accessors:
+            child_model, fk_name = _relation(model, accessor)
+            child_type = MODEL_TYPES[child_model]
+            parts.append((child_type, _children_queryset(child_type, **{f'{fk_name}_id': node_id})))
+
+    return [
+        {
+            'id': f'{child_type}:{obj.pk}',
+            'type': child_type,
+            'name': NODE_TYPES[child_type][1](obj),
+            'has_children': any(getattr(obj, flag) for flag in flags),
+        }
+        for child_type, (queryset, flags) in parts
+        for obj in queryset
+    ]
+
+
+def get_tree_version():
+    """
+    地址数据版本，用于ETag/Last-Modified
+
+    版本号在地址信号中随树上的数据变更递增，读取只需按名称查询一行。
+
+    Returns:
+        (最后更新时间, ETag)
+    """
+    value, updated = versions.get_version(versions.ADDRESS_TREE)
+    return updated, f'address-tree-{value}'
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import address_management, streets, groups, hutong, bungalows, communities, apartments, units, house_numbers
+from .views import address_management, streets, groups, hutong, bungalows, communities, apartments, units, house_numbers, address_tree, address_tree_children, unit_residents
 
 urlpatterns = [
     path('', address_management, name='address_management'),
@@ -10,5 +10,8 @@ urlpatterns = [
     path('communities/', communities, name='communities'),
     path('apartments/', apartments, name='apartments'),
     path('units/', units, name='units'),
+    path('units/<int:unit_id>/residents/', unit_residents, name='unit_residents'),
     path('house_numbers/', house_numbers, name='house_numbers'),
+    path('tree/', address_tree, name='address_tree'),
+    path('tree/children/', address_tree_children, name='address_tree_children'),
 ]
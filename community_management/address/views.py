@@ -1,32 +1,96 @@
-from django.shortcuts import render
+from django.http import JsonResponse
+from django.views.decorators.http import condition
+from community_management import cache
+from login.views import check_permission
+from .models import Unit
+from .occupancy import unit_households
+from .tree import build_tree, get_children, get_tree_version
 
 # Create your views here.
 
 def address_management(request):
-    return render(request, 'address/address_management.html')
+    return cache.cached_render(request, 'address/address_management.html', cache.ADDRESS_PAGES)
 
 def streets(request):
-    return render(request, 'address/streets.html')
+    return cache.cached_render(request, 'address/streets.html', cache.ADDRESS_PAGES)
 
 def groups(request):
-    return render(request, 'address/groups.html')
+    return cache.cached_render(request, 'address/groups.html', cache.ADDRESS_PAGES)
 
 def hutong(request):
-    return render(request, 'address/hutong.html')
+    return cache.cached_render(request, 'address/hutong.html', cache.ADDRESS_PAGES)
 
 def bungalows(request):
-    return render(request, 'address/bungalows.html')
+    return cache.cached_render(request, 'address/bungalows.html', cache.ADDRESS_PAGES)
 
 def communities(request):
-    return render(request, 'address/communities.html')
+    return cache.cached_render(request, 'address/communities.html', cache.ADDRESS_PAGES)
 
 def apartments(request):
-    return render(request, 'address/apartments.html')
+    return cache.cached_render(request, 'address/apartments.html', cache.ADDRESS_PAGES)
 
 def units(request):
-    return render(request, 'address/units.html')
+    return cache.cached_render(request, 'address/units.html', cache.ADDRESS_PAGES)
 
 def house_numbers(request):
-    return render(request, 'address/house_numbers.html')
+    return cache.cached_render(request, 'address/house_numbers.html', cache.ADDRESS_PAGES)
 
 
+def _tree_version(request):
+    """同一请求内只查询一次地址数据版本"""
+    if not hasattr(request, '_address_tree_version'):
+        request._address_tree_version = get_tree_version()
+    return request._address_tree_version
+
+
+def _tree_etag(request, *args, **kwargs):
+    return _tree_version(request)[1]
+
+
+def _tree_last_modified(request, *args, **kwargs):
+    return _tree_version(request)[0]
+
+
+@check_permission()
+@condition(etag_func=_tree_etag, last_modified_func=_tree_last_modified)
+def address_tree(request):
+    """
+    地址层级树
+    不带参数返回整棵树，node 参数（如 community:5）返回该节点的子树
+    """
+    node = request.GET.get('node') or None
+    try:
+        tree = cache.get_or_set(
+            cache.ADDRESS_PAGES,
+            f'tree:{node}:{_tree_etag(request)}',
+            lambda: build_tree(node),
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    if tree is None:
+        return JsonResponse({'success': False, 'error': f'节点不存在: {node}'}, status=404)
+    return JsonResponse({'success': True, 'data': tree})
+
+
+@check_permission()
+@condition(etag_func=_tree_etag, last_modified_func=_tree_last_modified)
+def address_tree_children(request):
+    """地址树懒加载，返回 node 节点的直接子节点，不带参数时返回全部组别"""
+    try:
+        children = get_children(request.GET.get('node') or None)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, 'data': children})
+
+
+@check_permission()
+def unit_residents(request, unit_id):
+    """单元内各户的居民，一次查询取得；resident_count 为户号上维护的居住人数"""
+    households = unit_households(unit_id)
+    if not households and not Unit.objects.filter(pk=unit_id).exists():
+        return JsonResponse({'success': False, 'error': '单元不存在'}, status=404)
+    return JsonResponse({
+        'success': True,
+        'data': households,
+        'total': sum(len(household['residents']) for household in households),
+    })
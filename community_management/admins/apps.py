@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AdminsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'admins'
+
+    def ready(self):
+        # 注册角色权限缓存失效信号
+        from . import signals  # noqa: F401
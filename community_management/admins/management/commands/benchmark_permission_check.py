@@ -0,0 +1,38 @@
+import timeit
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.test import RequestFactory
+from admins.models import Role
+from admins.permissions import has_permissions
+from login.views import check_permission
+
+
+class Command(BaseCommand):
+    help = '测试权限检查耗时（微秒/次），分别测量缓存查找及完整的装饰器调用'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=100000, help='每项测试的调用次数')
+        parser.add_argument('--permission', default='residents.export', help='检查的权限代码')
+
+    def handle(self, *args, **options):
+        number = options['number']
+        permission = options['permission']
+        role = Role.objects.filter(permissions__codename=permission).first()
+        if role is None:
+            raise CommandError(f'没有角色具有权限 {permission}，请先为角色授予该权限')
+        role_id = role.id
+
+        request = RequestFactory().get('/')
+        request.session = {'admin_id': 1, 'role_id': role_id}
+        view = check_permission(permission)(lambda request: HttpResponse())
+
+        # 预热：首次调用加载权限映射
+        has_permissions(role_id, {permission})
+        cases = {
+            '缓存查找': lambda: has_permissions(role_id, {permission}),
+            '装饰器调用': lambda: view(request),
+        }
+        self.stdout.write(f'角色 {role}，权限 {permission}，每项 {number} 次')
+        for name, func in cases.items():
+            seconds = min(timeit.repeat(func, number=number, repeat=3))
+            self.stdout.write(f'{name}: {seconds / number * 1e6:.2f} 微秒/次')
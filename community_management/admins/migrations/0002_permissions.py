@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:04
+
+from django.db import migrations, models
+
+# 迁移中的内置权限列表按迁移时复制，不随 admins.permissions 的修改变化
+PERMISSIONS = (
+    ('residents.import', '导入居民'),
+    ('residents.export', '导出居民及特殊人群数据'),
+    ('merchants.export', '导出商户数据'),
+    ('system.monitor', '查看系统运行状态'),
+)
+
+
+def create_permissions(apps, schema_editor):
+    """创建内置权限，已有角色保持原来的访问范围，授予全部权限"""
+    Permission = apps.get_model('admins', 'Permission')
+    Role = apps.get_model('admins', 'Role')
+    created = Permission.objects.bulk_create([
+        Permission(codename=codename, name=name) for codename, name in PERMISSIONS
+    ])
+    for role in Role.objects.all():
+        role.permissions.add(*created)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Permission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codename', models.CharField(max_length=100, unique=True, verbose_name='权限代码')),
+                ('name', models.CharField(max_length=100, verbose_name='权限名称')),
+            ],
+            options={
+                'verbose_name': '权限',
+                'verbose_name_plural': '权限',
+                'db_table': 'permissions',
+            },
+        ),
+        migrations.AddField(
+            model_name='role',
+            name='permissions',
+            field=models.ManyToManyField(blank=True, db_table='role_permissions', related_name='roles', to='admins.permission', verbose_name='权限'),
+        ),
+        migrations.RunPython(create_permissions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:20
+
+from django.db import migrations
+
+
+def create_permission(apps, schema_editor):
+    """创建查看居民银行账户信息的权限，授予已有导出权限的角色（导出文件本身包含银行账户）"""
+    Permission = apps.get_model('admins', 'Permission')
+    Role = apps.get_model('admins', 'Role')
+    permission, _ = Permission.objects.get_or_create(
+        codename='residents.view_sensitive', defaults={'name': '查看居民银行账户信息'},
+    )
+    for role in Role.objects.filter(permissions__codename='residents.export'):
+        role.permissions.add(permission)
+
+
+def delete_permission(apps, schema_editor):
+    apps.get_model('admins', 'Permission').objects.filter(codename='residents.view_sensitive').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0002_permissions'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_permission, delete_permission),
+    ]
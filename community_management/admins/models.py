@@ -1,6 +1,32 @@
+from django.contrib.auth.hashers import make_password
 from django.db import models
 
 
+class Permission(models.Model):
+    """
+    权限模型
+
+    权限代码形如 '应用.操作'，由视图通过 check_permission 装饰器声明所需权限。
+    """
+    codename = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name="权限代码"
+    )
+    name = models.CharField(
+        max_length=100,
+        verbose_name="权限名称"
+    )
+
+    class Meta:
+        db_table = "permissions"
+        verbose_name = "权限"
+        verbose_name_plural = "权限"
+
+    def __str__(self):
+        return self.name
+
+
 class Role(models.Model):
     """
     权限组模型
@@ -18,6 +44,13 @@ class Role(models.Model):
         null=True,
         verbose_name="权限组描述"
     )
+    permissions = models.ManyToManyField(
+        Permission,
+        blank=True,
+        related_name="roles",
+        db_table="role_permissions",
+        verbose_name="权限"
+    )
 
     class Meta:
         db_table = "roles"
@@ -88,3 +121,7 @@ class Admin(models.Model):
 
     def __str__(self):
         return f"{self.real_name} ({self.username})"
+
+    def set_password(self, raw_password):
+        """设置密码，存储为哈希值"""
+        self.password_hash = make_password(raw_password)
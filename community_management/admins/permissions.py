@@ -0,0 +1,69 @@
+"""
+角色权限缓存
+
+全部 角色 → 权限代码 映射一次性加载到进程内字典，权限检查只做集合查找，不访问数据库。
+角色、权限或角色权限关系变化时由信号在同一事务中递增数据库中的 permissions 版本号，
+提交后清空本进程的映射；各进程每隔 PERMISSION_CACHE_CHECK_INTERVAL 秒比对一次版本号，
+发现变化后重新加载。版本号不放在缓存中，使用进程内缓存（locmem）部署多个进程时撤销的权限同样会生效。
+"""
+import threading
+import time
+from django.conf import settings
+from django.db import transaction
+from index import versions
+
+# 系统内置权限：(权限代码, 权限名称)
+DEFAULT_PERMISSIONS = (
+    ('residents.import', '导入居民'),
+    ('residents.export', '导出居民及特殊人群数据'),
+    ('merchants.export', '导出商户数据'),
+    ('system.monitor', '查看系统运行状态'),
+    ('residents.view_sensitive', '查看居民银行账户信息'),
+)
+
+_lock = threading.Lock()
+_table = None
+_version = None
+_checked_at = 0.0
+
+
+def _load():
+    from .models import Role
+    table = {}
+    for role_id, codename in Role.permissions.through.objects.values_list('role_id', 'permission__codename'):
+        table.setdefault(role_id, set()).add(codename)
+    return {role_id: frozenset(codenames) for role_id, codenames in table.items()}
+
+
+def get_permissions(role_id):
+    """角色拥有的权限代码集合"""
+    global _table, _version, _checked_at
+    now = time.monotonic()
+    table = _table
+    if table is None or now - _checked_at >= settings.PERMISSION_CACHE_CHECK_INTERVAL:
+        with _lock:
+            version, _ = versions.get_version(versions.PERMISSIONS)
+            if _table is None or _version != version:
+                _table = _load()
+                _version = version
+            _checked_at = now
+            table = _table
+    return table.get(role_id, frozenset())
+
+
+def has_permissions(role_id, codenames):
+    """角色是否拥有全部 codenames 权限"""
+    return get_permissions(role_id).issuperset(codenames)
+
+
+def invalidate():
+    """清空本进程的权限映射，下次检查时重新加载"""
+    global _table
+    with _lock:
+        _table = None
+
+
+def record_change():
+    """在当前事务中递增权限版本号，提交后清空本进程的映射，回滚时不生效"""
+    versions.bump(versions.PERMISSIONS)
+    transaction.on_commit(invalidate)
@@ -0,0 +1,15 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from . import permissions
+from .models import Permission, Role
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(m2m_changed, sender=Role.permissions.through)
+def invalidate_permissions(sender, action=None, **kwargs):
+    if action and action.startswith('pre_'):
+        return
+    permissions.record_change()
@@ -1,3 +1,76 @@
-from django.test import TestCase
+from io import StringIO
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from index import versions
+from .models import Permission, Role
+from .permissions import get_permissions, has_permissions, invalidate
 
-# Create your tests here.
+
+class RolePermissionTests(TestCase):
+    """角色权限测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.role = Role.objects.create(name='统计员')
+        cls.role.permissions.set(Permission.objects.filter(codename__in=['residents.export', 'merchants.export']))
+
+    def setUp(self):
+        # 测试事务不会提交，角色数据写入后需直接重载本进程的权限表
+        invalidate()
+
+    def login(self, role):
+        session = self.client.session
+        session['admin_id'] = 1
+        session['role_id'] = role.id
+        session.save()
+
+    def test_checks_served_from_cache(self):
+        get_permissions(self.role.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(has_permissions(self.role.id, {'residents.export', 'merchants.export'}))
+            self.assertFalse(has_permissions(self.role.id, {'residents.import'}))
+            self.assertFalse(has_permissions(None, {'residents.export'}))
+
+    def test_role_changes_invalidate_cache(self):
+        self.assertFalse(has_permissions(self.role.id, {'residents.import'}))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.role.permissions.add(Permission.objects.get(codename='residents.import'))
+        self.assertTrue(has_permissions(self.role.id, {'residents.import'}))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.role.permissions.clear()
+        self.assertEqual(get_permissions(self.role.id), frozenset())
+
+    def test_rolled_back_change_keeps_cache(self):
+        get_permissions(self.role.id)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, transaction.atomic():
+            self.role.permissions.clear()
+            transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+        with self.assertNumQueries(0):
+            self.assertTrue(has_permissions(self.role.id, {'residents.export'}))
+
+    @override_settings(PERMISSION_CACHE_CHECK_INTERVAL=0)
+    def test_other_process_changes_detected(self):
+        self.assertTrue(has_permissions(self.role.id, {'residents.export'}))
+        # 其他进程撤销权限：本进程的映射未清空，只能通过数据库中的版本号发现
+        Role.permissions.through.objects.filter(role=self.role).delete()
+        versions.bump(versions.PERMISSIONS)
+        self.assertFalse(has_permissions(self.role.id, {'residents.export'}))
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_permission_check', '--number', '1', stdout=out)
+        self.assertIn('装饰器调用', out.getvalue())
+        with self.assertRaisesMessage(CommandError, 'system.monitor'):
+            call_command('benchmark_permission_check', '--number', '1', '--permission', 'system.monitor')
+
+    def test_decorator_enforces_permission(self):
+        self.login(self.role)
+        self.assertEqual(self.client.get('/merchants/export/').status_code, 200)
+        response = self.client.post('/residents/import/')
+        self.assertRedirects(response, '/', fetch_redirect_response=False)
+
+        other = Role.objects.create(name='访客')
+        self.login(other)
+        self.assertEqual(self.client.get('/merchants/export/').status_code, 302)
@@ -0,0 +1,226 @@
+"""
+性能基准测试
+
+通过测试客户端按完整的请求链路（中间件、视图、模板/JSON序列化）对首页、列表接口、检索、导入和导出
+计时，结果可保存为JSON，并与基线结果对比，P50 变慢超过容差的场景视为性能回退。
+
+测试在事务中执行并在结束后回滚，导入场景写入的数据及测试角色不会保留。
+"""
+import csv
+import io
+import statistics
+import time
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from admins import permissions
+from admins.models import Permission, Role
+from community_management import cache
+from merchants.models import Merchant
+from residents import crosstab
+from residents.models import Ethnicity, Resident
+
+# 回退判定的默认容差：P50 比基线慢 20% 以上
+DEFAULT_TOLERANCE = 0.2
+
+# 绝对差值低于该值（毫秒）时不判定为回退，避免亚毫秒级场景的测量噪声
+MIN_REGRESSION_MS = 1.0
+
+# 导入场景每次上传的行数
+IMPORT_ROWS = 500
+
+
+def _consume(response):
+    """读取完整的响应内容，流式响应需逐块读取才会执行导出查询"""
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+class Scenario:
+    """
+    基准测试场景
+
+    Args:
+        name: 场景名称
+        run: 接收 (client, context, iteration) 的函数，返回响应
+        repeat: 默认执行次数
+        prepare: 每次计时前执行的函数（不计入耗时）
+    """
+
+    def __init__(self, name, run, repeat=20, prepare=None):
+        self.name = name
+        self.run = run
+        self.repeat = repeat
+        self.prepare = prepare
+
+
+def _import_csv(context, iteration):
+    """导入场景的CSV文件，每次使用不重复的身份证号"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['name', 'id_card', 'birth_date', 'ethnicity', 'household_address', 'phone_number'])
+    for i in range(IMPORT_ROWS):
+        writer.writerow([
+            f'导入{i}', f'8{iteration:05d}{i:012d}', '1990-01-01', context['ethnicity'], '北京市', f'139{i:08d}',
+        ])
+    upload = io.BytesIO(output.getvalue().encode('utf-8'))
+    upload.name = 'benchmark.csv'
+    return upload
+
+
+SCENARIOS = [
+    Scenario(
+        'dashboard', lambda client, context, i: client.get('/index/'),
+        prepare=lambda: cache.invalidate(cache.STATISTICS),
+    ),
+    Scenario('dashboard_cached', lambda client, context, i: client.get('/index/')),
+    Scenario('resident_list', lambda client, context, i: client.get(
+        '/residents/api/', {'ethnicity': context['ethnicity_id'], 'education_level': i % 7},
+    )),
+    Scenario('merchant_list', lambda client, context, i: client.get(
+        '/merchants/api/', {'street': context['street_id'], 'industry': context['industry_id']},
+    )),
+    Scenario('merchant_series', lambda client, context, i: client.get(
+        '/merchants/analytics/series/', {'street': context['street_id']},
+    )),
+    Scenario('property_coverage', lambda client, context, i: client.get('/properties/coverage/')),
+    Scenario('search_name', lambda client, context, i: client.get(
+        '/residents/search/', {'q': context['names'][i % len(context['names'])]},
+    )),
+    Scenario('search_id_card', lambda client, context, i: client.get(
+        '/residents/search/', {'q': context['id_cards'][i % len(context['id_cards'])]},
+    )),
+    Scenario('search_phone', lambda client, context, i: client.get(
+        '/residents/search/', {'q': context['phone_tails'][i % len(context['phone_tails'])]},
+    )),
+    Scenario('birthdays', lambda client, context, i: client.get(
+        '/residents/birthdays/', {'start': f'2025-{i % 12 + 1:02d}-01', 'days': 7},
+    )),
+    Scenario(
+        'milestones', lambda client, context, i: client.get('/residents/milestones/'),
+        prepare=lambda: cache.invalidate(cache.COHORTS),
+    ),
+    Scenario('milestones_cached', lambda client, context, i: client.get('/residents/milestones/')),
+    Scenario(
+        'age_distribution', lambda client, context, i: client.get('/residents/age-distribution/'),
+        repeat=3, prepare=lambda: cache.invalidate(cache.COHORTS),
+    ),
+    Scenario('import', lambda client, context, i: client.post(
+        '/residents/import/', {'file': _import_csv(context, i)},
+    ), repeat=3),
+    Scenario('export_residents', lambda client, context, i: client.get('/residents/export/residents/'), repeat=3),
+    Scenario('export_merchants', lambda client, context, i: client.get('/merchants/export/'), repeat=3),
+]
+
+SCENARIO_NAMES = [scenario.name for scenario in SCENARIOS]
+
+
+def _context():
+    """场景使用的查询参数，从现有数据中取样"""
+    residents = Resident.objects.order_by('id')
+    merchant = Merchant.objects.order_by('id').values('street_id', 'industry_id').first()
+    ethnicity = Ethnicity.objects.order_by('id').first()
+    if merchant is None or ethnicity is None or not residents.exists():
+        raise ValueError('数据库中没有居民或商户数据，请先生成测试数据')
+    sample = list(residents.values_list('name', 'id_card', 'phone_number')[:50])
+    return {
+        'street_id': merchant['street_id'],
+        'industry_id': merchant['industry_id'],
+        'ethnicity_id': ethnicity.id,
+        'ethnicity': ethnicity.name,
+        'names': [name for name, _, _ in sample],
+        'id_cards': [id_card[:10] for _, id_card, _ in sample],
+        'phone_tails': [phone[-4:] for _, _, phone in sample],
+    }
+
+
+def _summarize(timings):
+    timings = sorted(timings)
+    return {
+        'runs': len(timings),
+        'mean': round(statistics.mean(timings), 3),
+        'p50': round(timings[len(timings) // 2], 3),
+        'p95': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'max': round(timings[-1], 3),
+    }
+
+
+def run_benchmarks(names=None, repeat=None, log=None):
+    """
+    执行基准测试场景
+
+    Args:
+        names: 要执行的场景名称，默认全部
+        repeat: 每个场景的执行次数，默认使用各场景的设置
+        log: 每个场景完成后以 (场景名, 统计结果) 调用
+
+    Returns:
+        {'database': 数据库类型, 'residents': 居民数, 'merchants': 商户数,
+         'scenarios': {场景名: {'runs', 'mean', 'p50', 'p95', 'max'}}}，耗时单位为毫秒
+
+    Raises:
+        ValueError: 场景名称无效、数据库中没有数据或请求失败时抛出
+    """
+    unknown = set(names or ()) - set(SCENARIO_NAMES)
+    if unknown:
+        raise ValueError(f'不支持的场景: {", ".join(sorted(unknown))}')
+    log = log or (lambda name, stats: None)
+    results = {
+        'database': connection.vendor,
+        'residents': Resident.objects.count(),
+        'merchants': Merchant.objects.count(),
+        'scenarios': {},
+    }
+    context = _context()
+
+    with override_settings(ALLOWED_HOSTS=['*'], INSTRUMENTATION_SAMPLE_RATE=0), transaction.atomic():
+        role = Role.objects.create(name='benchmark-role')
+        role.permissions.set(Permission.objects.all())
+        # 角色在未提交的事务内创建，提交回调不会触发，需直接重载本进程的权限表
+        permissions.invalidate()
+        client = Client()
+        session = client.session
+        session['admin_id'] = 0
+        session['role_id'] = role.id
+        session.save()
+
+        for scenario in SCENARIOS:
+            if names and scenario.name not in names:
+                continue
+            timings = []
+            for i in range(repeat or scenario.repeat):
+                if scenario.prepare:
+                    scenario.prepare()
+                started = time.perf_counter()
+                response = scenario.run(client, context, i)
+                _consume(response)
+                timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise ValueError(f'场景 {scenario.name} 请求失败: {response.status_code}')
+            results['scenarios'][scenario.name] = _summarize(timings)
+            log(scenario.name, results['scenarios'][scenario.name])
+        transaction.set_rollback(True)
+    # 导入场景写入的数据已回滚，使其间更新的缓存及本进程的交叉统计立方体失效
+    cache.invalidate(cache.STATISTICS, cache.COHORTS)
+    crosstab.reset()
+    permissions.invalidate()
+    return results
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    与基线结果对比
+
+    Returns:
+        [(场景名, 基线P50, 当前P50, 变化比例)]，只包含 P50 慢于基线超过容差的场景
+    """
+    regressions = []
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        delta = current['p50'] - previous['p50']
+        if delta > MIN_REGRESSION_MS and current['p50'] > previous['p50'] * (1 + tolerance):
+            regressions.append((name, previous['p50'], current['p50'], delta / previous['p50']))
+    return regressions
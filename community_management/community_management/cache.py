@@ -0,0 +1,152 @@
+"""
+带版本号的缓存工具
+
+缓存键按命名空间划分，每个命名空间有一个版本号，失效时只需递增版本号，
+旧版本的缓存项自然过期，无需逐个删除。命中/未命中次数按命名空间在进程内统计。
+
+数据变更引起的失效应在事务提交后执行（invalidate_on_commit）：提交前递增版本号时，
+并发请求可能读到旧数据并以新版本号写入缓存，直到下一次变更才会失效。
+"""
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+# 首页统计数据
+STATISTICS = 'statistics'
+# 地址管理页面
+ADDRESS_PAGES = 'address_pages'
+# 商户管理页面
+MERCHANT_PAGES = 'merchant_pages'
+# 居民生日及年龄段统计
+COHORTS = 'cohorts'
+
+_MISSING = object()
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+
+
+def _version_key(namespace):
+    return f'version:{namespace}'
+
+
+def _new_version():
+    # 使用毫秒时间戳作为初始版本，版本键被淘汰后重建也不会与旧缓存项冲突
+    return int(time.time() * 1000)
+
+
+def get_version(namespace):
+    """获取命名空间的当前版本号"""
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), _new_version(), timeout=None)
+        version = cache.get(_version_key(namespace))
+    return version
+
+
+def make_key(namespace, key):
+    """生成带版本号的缓存键"""
+    return f'{namespace}:v{get_version(namespace)}:{key}'
+
+
+def bump_version(namespace):
+    """递增命名空间版本号并返回新版本"""
+    try:
+        return cache.incr(_version_key(namespace))
+    except ValueError:
+        version = _new_version()
+        cache.set(_version_key(namespace), version, timeout=None)
+        return version
+
+
+def invalidate(*namespaces):
+    """使命名空间下的全部缓存失效"""
+    for namespace in namespaces:
+        bump_version(namespace)
+
+
+def invalidate_on_commit(*namespaces):
+    """当前事务提交后使命名空间失效，事务回滚时不失效，不在事务中时立即失效"""
+    transaction.on_commit(lambda: invalidate(*namespaces))
+
+
+def _record(namespace, outcome):
+    with _stats_lock:
+        _stats[namespace][outcome] += 1
+
+
+def get_or_set(namespace, key, default, timeout=None):
+    """
+    读取缓存，未命中时调用 default() 计算并写入
+
+    Args:
+        namespace: 缓存命名空间
+        key: 命名空间内的键
+        default: 未命中时调用的无参函数
+        timeout: 过期时间（秒），默认使用 CACHES 配置
+    """
+    full_key = make_key(namespace, key)
+    value = cache.get(full_key, _MISSING)
+    if value is _MISSING:
+        _record(namespace, 'misses')
+        value = default()
+        if timeout is None:
+            cache.set(full_key, value)
+        else:
+            cache.set(full_key, value, timeout)
+    else:
+        _record(namespace, 'hits')
+    return value
+
+
+def cached_render(request, template_name, namespace, context=None, timeout=None, params=()):
+    """
+    缓存渲染后的页面内容
+
+    缓存按模板、请求路径及 params 中列出的查询参数区分，其他查询参数不影响缓存键，
+    避免任意参数组合不断产生新的缓存项。只适用于不包含当前用户信息的页面，
+    页面内容依赖的查询参数须在 params 中列出。
+    """
+    query = urlencode([(name, request.GET.getlist(name)) for name in sorted(params)], doseq=True)
+    content = get_or_set(
+        namespace,
+        f'{template_name}:{request.path}?{query}',
+        lambda: render_to_string(template_name, context, request),
+        timeout,
+    )
+    return HttpResponse(content)
+
+
+def get_stats():
+    """返回各命名空间的命中/未命中次数及命中率"""
+    with _stats_lock:
+        stats = {namespace: dict(counts) for namespace, counts in _stats.items()}
+    for counts in stats.values():
+        total = counts['hits'] + counts['misses']
+        counts['hit_rate'] = round(counts['hits'] / total, 4) if total else 0.0
+    return stats
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def invalidate_on_change(app_config, *namespaces):
+    """应用下任一模型保存或删除时，在事务提交后使对应命名空间失效"""
+    def receiver(sender, **kwargs):
+        invalidate_on_commit(*namespaces)
+
+    for model in app_config.get_models():
+        for signal in (post_save, post_delete):
+            signal.connect(
+                receiver,
+                sender=model,
+                weak=False,
+                dispatch_uid=f'cache:{model._meta.label}:{",".join(namespaces)}',
+            )
@@ -0,0 +1,126 @@
+"""
+流式数据导出
+
+按 values_list 投影逐块读取数据库，CSV边读边写入响应，XLSX使用openpyxl的只写模式写入临时文件后分块返回，
+内存占用与导出行数无关。选项字段通过预先生成的取值表转换为中文显示值。
+"""
+import csv
+import tempfile
+from django.db import models
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+
+DEFAULT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+
+
+class Column:
+    """
+    导出列
+
+    Args:
+        model: 查询的模型
+        path: values_list 使用的字段路径，可跨外键，如 'resident__name'
+        header: 表头，默认使用字段的中文名称
+    """
+
+    def __init__(self, model, path, header=None):
+        field = None
+        for name in path.split('__'):
+            field = model._meta.get_field(name)
+            if field.is_relation:
+                model = field.related_model
+        self.path = path
+        self.header = header or str(field.verbose_name)
+        if field.is_relation:
+            # 外键按主键导出
+            field = field.target_field
+        self.convert = self._build_converter(field)
+
+    @staticmethod
+    def _build_converter(field):
+        if field.choices:
+            labels = {value: str(label) for value, label in field.flatchoices}
+            return lambda value: labels.get(value, value)
+        if isinstance(field, models.DateTimeField):
+            return lambda value: timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S') if value else value
+        if isinstance(field, models.DateField):
+            return lambda value: value.isoformat() if value else value
+        return None
+
+
+def build_columns(model, paths):
+    """根据字段路径列表生成导出列，元素可以是路径或 (路径, 表头)"""
+    return [
+        Column(model, path) if isinstance(path, str) else Column(model, *path)
+        for path in paths
+    ]
+
+
+def iter_export_rows(queryset, columns, chunk_size=DEFAULT_CHUNK_SIZE):
+    """逐行产出已转换的数据，首行为表头"""
+    yield [column.header for column in columns]
+    converters = [(index, column.convert) for index, column in enumerate(columns) if column.convert]
+    rows = queryset.order_by('pk').values_list(*[column.path for column in columns])
+    for row in rows.iterator(chunk_size=chunk_size):
+        row = list(row)
+        for index, convert in converters:
+            row[index] = convert(row[index])
+        yield row
+
+
+class _Echo:
+    """csv.writer 的伪文件对象，直接返回写入的内容"""
+
+    def write(self, value):
+        return value
+
+
+def csv_response(queryset, columns, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+
+    def stream():
+        # BOM，便于Excel识别UTF-8编码
+        yield '\ufeff'
+        for row in iter_export_rows(queryset, columns, chunk_size):
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = content_disposition_header(True, f'{filename}.csv')
+    return response
+
+
+def xlsx_response(queryset, columns, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ImportError('导出Excel文件需要安装openpyxl')
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    for row in iter_export_rows(queryset, columns, chunk_size):
+        sheet.append(row)
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f'{filename}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+def export_response(queryset, columns, filename, export_format='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    生成导出文件的流式响应
+
+    Raises:
+        ValueError: 导出格式不支持时抛出
+    """
+    if export_format == 'csv':
+        return csv_response(queryset, columns, filename, chunk_size)
+    if export_format == 'xlsx':
+        return xlsx_response(queryset, columns, filename, chunk_size)
+    raise ValueError(f'不支持的导出格式: {export_format}')
@@ -0,0 +1,205 @@
+"""
+请求性能采样
+
+InstrumentationMiddleware 按 INSTRUMENTATION_SAMPLE_RATE 抽样请求，记录视图耗时、SQL 条数、
+数据库耗时以及重复执行的 SQL（同一条语句模板执行次数达到阈值时视为 N+1 查询），
+样本写入进程内的环形缓冲区。未抽中的请求只多一次随机数判断。
+
+各进程每隔 INSTRUMENTATION_PUBLISH_INTERVAL 秒把缓冲区发布到缓存，
+request_stats 命令从缓存汇总全部进程的样本（缓存须使用 file 或 redis）。
+进程首次发布时通过原子递增的计数器取得编号，样本写入按编号区分的键并设置过期时间，
+各进程只写自己的键，不存在多个进程同时改写同一个索引而丢失登记的问题；
+汇总时按计数器的当前值读取全部编号的键，已退出进程的键过期后自然不再计入。
+"""
+import random
+import threading
+import time
+from collections import Counter, deque
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+# 耗时直方图的桶上限（毫秒），最后一个桶为超过最大上限的请求
+HISTOGRAM_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# 每个样本最多保留的重复 SQL 条数
+MAX_DUPLICATES = 3
+
+# 进程编号计数器的键，以及各进程样本键的前缀（后接进程编号）
+PROCESS_COUNTER_KEY = 'instrumentation:processes'
+PROCESS_KEY_PREFIX = 'instrumentation:process:'
+
+# 超过该时长（秒）未发布的进程不再汇总
+PROCESS_TTL = 600
+
+_lock = threading.Lock()
+_buffer = None
+_published_at = 0.0
+_process_number = 0
+
+
+def _get_buffer():
+    global _buffer
+    if _buffer is None or _buffer.maxlen != settings.INSTRUMENTATION_BUFFER_SIZE:
+        _buffer = deque(_buffer or (), maxlen=settings.INSTRUMENTATION_BUFFER_SIZE)
+    return _buffer
+
+
+class QueryRecorder:
+    """通过 execute_wrapper 统计一次请求执行的 SQL 条数、耗时及重复语句"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    def duplicates(self):
+        """执行次数达到阈值的语句模板及次数，按次数倒序"""
+        threshold = settings.INSTRUMENTATION_DUPLICATE_THRESHOLD
+        return [(sql, n) for sql, n in self.statements.most_common(MAX_DUPLICATES) if n >= threshold]
+
+
+class InstrumentationMiddleware:
+    """抽样记录请求耗时及 SQL 执行情况"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.INSTRUMENTATION_SAMPLE_RATE
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        latency = (time.perf_counter() - started) * 1000
+
+        match = request.resolver_match
+        record({
+            'view': (match.view_name if match else None) or '<unresolved>',
+            'method': request.method,
+            'status': response.status_code,
+            'latency_ms': round(latency, 3),
+            'queries': recorder.count,
+            'db_ms': round(recorder.duration * 1000, 3),
+            'duplicates': recorder.duplicates(),
+            'time': time.time(),
+        })
+        return response
+
+
+def record(sample):
+    """写入一个样本，到达发布间隔时把缓冲区发布到缓存"""
+    global _published_at
+    with _lock:
+        buffer = _get_buffer()
+        buffer.append(sample)
+        now = time.monotonic()
+        if now - _published_at < settings.INSTRUMENTATION_PUBLISH_INTERVAL:
+            return
+        _published_at = now
+        samples = list(buffer)
+    publish(samples)
+
+
+def get_samples():
+    """本进程缓冲区中的样本"""
+    with _lock:
+        return list(_get_buffer())
+
+
+def clear():
+    global _published_at
+    with _lock:
+        _get_buffer().clear()
+        _published_at = 0.0
+
+
+def _get_process_key():
+    """
+    本进程的样本键
+
+    首次发布时从计数器原子地取得进程编号；计数器被淘汰或清空（当前值小于本进程编号）时重新取号，
+    避免新进程拿到相同编号覆盖本进程的样本。
+    """
+    global _process_number
+    if not _process_number or (cache.get(PROCESS_COUNTER_KEY) or 0) < _process_number:
+        cache.add(PROCESS_COUNTER_KEY, 0, None)
+        _process_number = cache.incr(PROCESS_COUNTER_KEY)
+    return f'{PROCESS_KEY_PREFIX}{_process_number}'
+
+
+def publish(samples=None):
+    """把本进程的样本写入缓存中本进程的键"""
+    if samples is None:
+        samples = get_samples()
+    cache.set(_get_process_key(), samples, PROCESS_TTL)
+
+
+def collect_published():
+    """缓存中全部进程发布的样本"""
+    count = cache.get(PROCESS_COUNTER_KEY) or 0
+    keys = [f'{PROCESS_KEY_PREFIX}{number}' for number in range(1, count + 1)]
+    samples = []
+    for published in cache.get_many(keys).values():
+        samples.extend(published)
+    return samples
+
+
+def _percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def histogram(latencies):
+    """按 HISTOGRAM_BUCKETS 统计的请求数，键为桶上限，超过最大上限的请求计入 '+Inf'"""
+    counts = Counter()
+    for latency in latencies:
+        bucket = next((str(bound) for bound in HISTOGRAM_BUCKETS if latency <= bound), '+Inf')
+        counts[bucket] += 1
+    return {bucket: counts[bucket] for bucket in [*map(str, HISTOGRAM_BUCKETS), '+Inf']}
+
+
+def summarize(samples):
+    """
+    按视图汇总样本
+
+    Returns:
+        {视图名: {'requests', 'p50', 'p95', 'p99', 'max', 'avg_queries', 'max_queries',
+                  'avg_db_ms', 'n_plus_one', 'duplicates', 'histogram'}}，按 P95 倒序
+    """
+    views = {}
+    for sample in samples:
+        views.setdefault(sample['view'], []).append(sample)
+
+    report = {}
+    for view, rows in views.items():
+        latencies = sorted(row['latency_ms'] for row in rows)
+        duplicates = Counter()
+        for row in rows:
+            for sql, n in row['duplicates']:
+                duplicates[sql] = max(duplicates[sql], n)
+        report[view] = {
+            'requests': len(rows),
+            'p50': _percentile(latencies, 0.5),
+            'p95': _percentile(latencies, 0.95),
+            'p99': _percentile(latencies, 0.99),
+            'max': latencies[-1],
+            'avg_queries': round(sum(row['queries'] for row in rows) / len(rows), 2),
+            'max_queries': max(row['queries'] for row in rows),
+            'avg_db_ms': round(sum(row['db_ms'] for row in rows) / len(rows), 3),
+            'n_plus_one': sum(1 for row in rows if row['duplicates']),
+            'duplicates': [{'sql': sql, 'count': n} for sql, n in duplicates.most_common(MAX_DUPLICATES)],
+            'histogram': histogram(latencies),
+        }
+    return dict(sorted(report.items(), key=lambda item: item[1]['p95'], reverse=True))
@@ -0,0 +1,21 @@
+"""
+列表接口的分页参数
+"""
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def parse_page_size(value):
+    """
+    解析每页条数，默认 DEFAULT_PAGE_SIZE，超过 MAX_PAGE_SIZE 时取 MAX_PAGE_SIZE
+
+    Raises:
+        ValueError: 不是正整数时抛出
+    """
+    if value in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    page_size = int(value)
+    if page_size < 1:
+        raise ValueError(f'参数 page_size 的值无效: {value}')
+    return min(page_size, MAX_PAGE_SIZE)
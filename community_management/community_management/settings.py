@@ -10,7 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -57,6 +60,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # 请求性能采样，放在最前以计入其他中间件的耗时
+    'community_management.instrumentation.InstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -88,13 +93,176 @@ WSGI_APPLICATION = 'community_management.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# 通过环境变量 DB_PROFILE 选择 sqlite（默认）、postgresql 或 mysql，
+# DB_NAME、DB_USER、DB_PASSWORD、DB_HOST、DB_PORT 覆盖默认连接参数
+
+# SQLite 每个连接建立时执行的 PRAGMA：
+#   journal_mode=WAL 读写互不阻塞（写入日志模式保存在数据库文件中，会额外生成 -wal、-shm 文件）
+#   synchronous=NORMAL WAL 模式下只在检查点时同步磁盘，断电最多丢失最近提交的事务，不会损坏数据库
+#   mmap_size 以内存映射方式读取数据库文件，cache_size 为负数时单位为 KiB
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64 * 1024)),
+}
+
+# PostgreSQL、MySQL 连接复用时长（秒），0 表示每个请求结束后关闭连接
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+
+DATABASE_PROFILES = {
+    'sqlite': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            # 事务开始时即获取写锁，避免读事务升级为写事务时因其他写入方直接报 database is locked
+            'transaction_mode': 'IMMEDIATE',
+            # 等待写锁的秒数
+            'timeout': 20,
+        },
+    },
+    'postgresql': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': 'community_management',
+        'USER': 'postgres',
+        'PASSWORD': '',
+        'HOST': '127.0.0.1',
+        'PORT': '5432',
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        # 复用连接前检查连接是否可用，数据库重启后不会因失效连接报错
+        'CONN_HEALTH_CHECKS': True,
+    },
+    'mysql': {
+        'ENGINE': 'django.db.backends.mysql',
+        'NAME': 'community_management',
+        'USER': 'root',
+        'PASSWORD': '',
+        'HOST': '127.0.0.1',
+        'PORT': '3306',
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'charset': 'utf8mb4',
+            'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+        },
+    },
+}
+
+DB_PROFILE = os.environ.get('DB_PROFILE', 'sqlite')
+
+if DB_PROFILE not in DATABASE_PROFILES:
+    raise ImproperlyConfigured(
+        f'DB_PROFILE 的值无效: {DB_PROFILE}，可选值为 {"、".join(DATABASE_PROFILES)}'
+    )
+
+DATABASES = {
+    'default': DATABASE_PROFILES[DB_PROFILE],
+}
+
+for setting in ('NAME', 'USER', 'PASSWORD', 'HOST', 'PORT'):
+    if os.environ.get(f'DB_{setting}'):
+        DATABASES['default'][setting] = os.environ[f'DB_{setting}']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# 通过环境变量 CACHE_BACKEND 选择 locmem（默认）、file 或 redis，CACHE_LOCATION 覆盖默认位置
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'community_management',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'community_management_cache'),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    },
+}
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'KEY_PREFIX': 'cms',
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),
     }
 }
 
+if os.environ.get('CACHE_LOCATION'):
+    CACHES['default']['LOCATION'] = os.environ['CACHE_LOCATION']
+
+
+# 首页商户数的数据来源：snapshot（首页统计日汇总表，默认）或 rollup（商户月度汇总表，新增数按月统计）
+DASHBOARD_MERCHANT_SOURCE = os.environ.get('DASHBOARD_MERCHANT_SOURCE', 'snapshot')
+
+
+# 请求性能采样
+# INSTRUMENTATION_SAMPLE_RATE 为抽样比例（0 关闭，1 记录全部请求），
+# 样本保存在进程内最近 INSTRUMENTATION_BUFFER_SIZE 条，
+# 同一条 SQL 在一次请求中执行达到 INSTRUMENTATION_DUPLICATE_THRESHOLD 次时记为 N+1 查询
+INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get('INSTRUMENTATION_SAMPLE_RATE', 0.1))
+
+INSTRUMENTATION_BUFFER_SIZE = int(os.environ.get('INSTRUMENTATION_BUFFER_SIZE', 5000))
+
+INSTRUMENTATION_DUPLICATE_THRESHOLD = 5
+
+# 进程把样本发布到缓存的间隔（秒），供 request_stats 命令汇总
+INSTRUMENTATION_PUBLISH_INTERVAL = 30
+
+
+# Sessions
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/
+# 通过环境变量 SESSION_BACKEND 选择会话存储：
+#   db（默认）：每次读取会话查询 django_session 表
+#   cached_db：优先读缓存，写入同时落库；多进程部署时缓存应使用 redis
+#   cache：只存缓存，缓存淘汰或重启后需重新登录；要求 CACHE_BACKEND 为 file 或 redis，
+#          进程内缓存（locmem）各进程互不可见，登录后请求落到其他进程会被当作未登录
+#   signed_cookies：会话内容签名后存放在 Cookie 中，服务端不读写存储
+# 可用 benchmark_sessions 命令测量各方式在当前环境下的读写耗时
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'db')
+
+# 多个进程可共享的缓存后端（file 仅限同一主机）
+SHARED_CACHE_BACKENDS = ('file', 'redis')
+
+if SESSION_BACKEND == 'cache' and CACHE_BACKEND not in SHARED_CACHE_BACKENDS:
+    raise ImproperlyConfigured(
+        f'SESSION_BACKEND=cache 需要多进程共享的缓存（CACHE_BACKEND 为 {" 或 ".join(SHARED_CACHE_BACKENDS)}），'
+        f'当前为 {CACHE_BACKEND}；请改用 cached_db 或配置共享缓存'
+    )
+
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+
+
+# Password hashing
+# 管理员密码默认使用 PBKDF2，迭代次数可通过环境变量 PASSWORD_HASH_ITERATIONS 调整（为空时使用 Django 默认值）
+
+PASSWORD_HASHERS = [
+    'login.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS') or 0) or None
+
+# 角色权限在进程内缓存，其他进程修改权限后最多经过该秒数生效
+PERMISSION_CACHE_CHECK_INTERVAL = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -0,0 +1,446 @@
+"""
+合成测试数据生成
+
+按居民数生成完整的地址层级（街道、组别、胡同、小区、楼栋、单元、户号）、居民及楼房/平房关联、
+特殊人群明细、商户、物业及物业经理。同一 seed 与规模生成的数据完全相同，
+供性能基准测试在不同版本间对比。
+
+居民按列批量生成，楼房/平房关联和特殊人群明细直接使用 bulk_create 返回的主键，不再回查居民表；
+外键取值来自预先加载的 id 数组。写入按 commit_size 分段在大事务中执行，并推迟约束检查。
+bulk_create 不触发信号，生成结束后统一重建首页统计日汇总表、商户月度汇总表和居民检索索引，并使相关缓存失效。
+"""
+import random
+from array import array
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from django.db import connection, transaction
+from django.utils import timezone
+from address.labels import refresh_apartment_addresses, refresh_house_addresses, refresh_unit_addresses
+from address.models import Apartment, Community, Group, House, Hutong, Street, Unit
+from address.occupancy import rebuild_occupancy
+from community_management import cache
+from index import versions
+from index.snapshot import rebuild_snapshot
+from merchants.models import Industry, Merchant
+from merchants.rollup import rebuild_rollup
+from properties.models import Property, PropertyManager
+from residents.models import (
+    Bungalow, Building, Deceased, Disabled, Ethnicity, FiveGuarantees, LowIncome, Resident, SpecialNeeds,
+    SpecialObjects,
+)
+from residents.search import rebuild_index
+
+# 预设规模：名称 -> 居民数
+SCALES = {
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+
+DEFAULT_BATCH_SIZE = 2000
+
+# 每个事务写入的居民或商户数
+DEFAULT_COMMIT_SIZE = 100_000
+
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈'
+GIVEN_NAMES = '伟芳娜敏静丽强磊军洋勇艳杰娟涛明超兰霞平刚桂英华玉萍红娥玲芬燕彬鹏辉建国志文斌宇浩凯秀梅'
+# 姓氏按常见程度排列，越靠前的姓氏出现越多
+SURNAME_WEIGHTS = [1 / (rank + 1) ** 0.6 for rank in range(len(SURNAMES))]
+ETHNICITIES = ('汉族', '回族', '满族', '蒙古族', '朝鲜族', '壮族', '藏族', '维吾尔族')
+ETHNICITY_WEIGHTS = (92, 2.5, 2.5, 1, 0.5, 0.5, 0.5, 0.5)
+INDUSTRIES = (
+    ('农、林、牧、渔业', 'A'), ('制造业', 'C'), ('建筑业', 'E'), ('批发和零售业', 'F'),
+    ('交通运输、仓储和邮政业', 'G'), ('住宿和餐饮业', 'H'), ('信息传输、软件和信息技术服务业', 'I'),
+    ('金融业', 'J'), ('房地产业', 'K'), ('租赁和商务服务业', 'L'), ('科学研究和技术服务业', 'M'),
+    ('居民服务、修理和其他服务业', 'O'), ('教育', 'P'), ('卫生和社会工作', 'Q'), ('文化、体育和娱乐业', 'R'),
+)
+
+# 居民特殊标识的比例
+FLAG_RATES = {
+    'is_low_income': 0.03,
+    'is_beneficiary': 0.005,
+    'is_disabled': 0.02,
+    'is_special_support': 0.01,
+    'is_key_person': 0.005,
+    'is_deceased': 0.01,
+}
+
+# 住宅类型为楼房的居民比例，其余为平房
+BUILDING_RATE = 0.7
+
+# 居民选项字段的取值分布：字段 -> {取值: 权重}
+CHOICE_WEIGHTS = {
+    'gender': {0: 51, 1: 49},
+    'political_affiliation': {0: 86, 1: 8, 2: 4, **{value: 0.25 for value in range(3, 11)}},
+    'marital_status': {0: 28, 1: 60, 2: 6, 3: 6},
+    'education_level': {0: 2, 1: 15, 2: 30, 3: 22, 4: 13, 5: 15, 6: 3},
+    'population_type': {0: 85, 1: 15},
+    'residential_type': {0: BUILDING_RATE, 1: 1 - BUILDING_RATE},
+    'own_house': {0: 65, 1: 35},
+}
+
+# 年龄分布：(最小年龄, 最大年龄, 权重)，20岁以下的居民婚姻状况均为未婚
+AGE_BANDS = ((0, 14, 14), (15, 34, 25), (35, 59, 38), (60, 79, 19), (80, 99, 4))
+MAX_AGE_DAYS = 100 * 365
+
+# 年龄按该日期计算，同一 seed 在不同日期生成的数据也相同
+REFERENCE_DATE = date(2025, 1, 1)
+
+# 身份证号：行政区划代码（北京市各区）、前17位的加权系数及校验码（GB 11643）
+AREA_CODES = (
+    '110101', '110102', '110105', '110106', '110107', '110108', '110109', '110111',
+    '110112', '110113', '110114', '110115', '110116', '110117', '110118', '110119',
+)
+ID_CARD_WEIGHTS = (7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2)
+ID_CARD_CHECK_CODES = '10X98765432'
+
+# 带银行账户的特殊人群明细：(模型, 居民标识, 银行卡号前缀)
+BANK_DETAILS = (
+    (LowIncome, 'is_low_income', '621'),
+    (FiveGuarantees, 'is_beneficiary', '622'),
+    (Disabled, 'is_disabled', '623'),
+    (SpecialNeeds, 'is_special_support', '624'),
+)
+
+# 随居民一起生成的关联表
+DEPENDENT_MODELS = (
+    Building, Bungalow, LowIncome, FiveGuarantees, Disabled, SpecialNeeds, SpecialObjects, Deceased,
+)
+
+# 每户、每单元、每楼栋、每小区的平均数量
+RESIDENTS_PER_HOUSE = 3
+HOUSES_PER_UNIT = 12
+UNITS_PER_APARTMENT = 4
+APARTMENTS_PER_COMMUNITY = 10
+
+# 每条胡同的平房居民数
+RESIDENTS_PER_HUTONG = 200
+
+# 商户数与居民数之比
+MERCHANT_RATE = 0.2
+
+# 有物业的小区比例，及每家物业管理的平均小区数
+PROPERTY_COVERAGE = 0.6
+COMMUNITIES_PER_PROPERTY = 3
+
+
+def parse_scale(value):
+    """规模名称（10k/100k/1m）或居民数"""
+    if str(value).lower() in SCALES:
+        return SCALES[str(value).lower()]
+    try:
+        residents = int(value)
+    except ValueError:
+        residents = 0
+    if residents < 1:
+        raise ValueError(f'规模无效: {value}，应为 {"/".join(SCALES)} 或正整数')
+    return residents
+
+
+def id_card_check_digit(first17):
+    """身份证号前17位对应的校验码"""
+    return ID_CARD_CHECK_CODES[sum(int(digit) * weight for digit, weight in zip(first17, ID_CARD_WEIGHTS)) % 11]
+
+
+@contextmanager
+def deferred_constraints():
+    """
+    开启事务并推迟约束检查
+
+    PostgreSQL、SQLite 的外键在事务提交时统一检查；
+    MySQL 不支持推迟检查，在事务内关闭本连接的外键检查，数据由生成器保证一致。
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+            elif connection.vendor == 'sqlite':
+                cursor.execute('PRAGMA defer_foreign_keys = ON')
+            elif connection.vendor == 'mysql':
+                cursor.execute('SET foreign_key_checks = 0')
+        try:
+            yield
+        finally:
+            if connection.vendor == 'mysql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET foreign_key_checks = 1')
+
+
+def _chunks(start, stop, size):
+    for chunk_start in range(start, stop, size):
+        yield chunk_start, min(stop, chunk_start + size)
+
+
+def _ids(model, **filters):
+    return list(model.objects.filter(**filters).order_by('id').values_list('id', flat=True))
+
+
+class DataGenerator:
+    """
+    合成数据生成器
+
+    Args:
+        residents: 居民数
+        seed: 随机种子
+        batch_size: 每批 bulk_create 的行数
+        commit_size: 每个事务写入的居民或商户数
+        log: 进度输出函数
+    """
+
+    def __init__(self, residents, seed=0, batch_size=DEFAULT_BATCH_SIZE, commit_size=DEFAULT_COMMIT_SIZE, log=None):
+        self.residents = residents
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.commit_size = commit_size
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+    def run(self):
+        """
+        生成全部数据
+
+        Returns:
+            {表名: 行数}
+
+        Raises:
+            ValueError: 居民表非空时抛出，生成器只用于空数据库
+        """
+        if Resident.objects.exists():
+            raise ValueError('居民表中已有数据，请在空数据库上生成')
+        with deferred_constraints():
+            self.generate_addresses()
+        self.generate_residents()
+        self.generate_merchants()
+        with deferred_constraints():
+            self.generate_properties()
+        self.refresh_derived()
+        return self.counts
+
+    def _bulk_create(self, model, objects):
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.counts[model._meta.db_table] = self.counts.get(model._meta.db_table, 0) + len(objects)
+
+    def _name(self):
+        rng = self.rng
+        return rng.choices(SURNAMES, SURNAME_WEIGHTS)[0] + ''.join(rng.choice(GIVEN_NAMES) for _ in range(rng.choice((1, 2, 2))))
+
+    def _phone(self):
+        return f'1{self.rng.choice("3589")}{self.rng.randrange(10 ** 9):09d}'
+
+    def _date(self, start, end):
+        return start + timedelta(days=self.rng.randrange((end - start).days))
+
+    def _datetime(self, start, end):
+        day = self._date(start, end)
+        return timezone.make_aware(datetime(day.year, day.month, day.day, self.rng.randrange(8, 18)))
+
+    def generate_addresses(self):
+        """街道、组别、胡同、小区、楼栋、单元、户号"""
+        building_residents = int(self.residents * BUILDING_RATE)
+        houses = max(1, building_residents // RESIDENTS_PER_HOUSE)
+        units = max(1, houses // HOUSES_PER_UNIT)
+        apartments = max(1, units // UNITS_PER_APARTMENT)
+        communities = max(1, apartments // APARTMENTS_PER_COMMUNITY)
+        hutongs = max(1, (self.residents - building_residents) // RESIDENTS_PER_HUTONG)
+        groups = max(2, communities // 20)
+
+        self._bulk_create(Street, [Street(street_name=f'第{i + 1}街道') for i in range(8)])
+        self._bulk_create(Group, [Group(group_number=f'{i + 1}组') for i in range(groups)])
+        group_ids = _ids(Group)
+
+        self._bulk_create(Hutong, [
+            Hutong(hutong_name=f'胡同{i + 1}', hutong_number=str(i + 1), group_id=self.rng.choice(group_ids))
+            for i in range(hutongs)
+        ])
+        self._bulk_create(Community, [
+            Community(community_name=f'小区{i + 1}', community_number=str(i + 1), group_id=group_ids[i % groups])
+            for i in range(communities)
+        ])
+        community_ids = list(Community.objects.order_by('id').values_list('id', flat=True))
+
+        self._bulk_create(Apartment, [
+            Apartment(community_id=community_ids[i % communities], apartment_number=i // communities + 1)
+            for i in range(apartments)
+        ])
+        apartment_ids = list(Apartment.objects.order_by('id').values_list('id', flat=True))
+        self._bulk_create(Unit, [
+            Unit(apartment_id=apartment_ids[i % apartments], unit_number=i // apartments + 1)
+            for i in range(units)
+        ])
+
+        unit_ids = list(Unit.objects.order_by('id').values_list('id', flat=True))
+        for start, end in _chunks(0, houses, self.batch_size):
+            self._bulk_create(House, [
+                House(unit_id=unit_ids[i % units], house_number=f'{i // units + 1:02d}')
+                for i in range(start, end)
+            ])
+        # bulk_create 不调用 save()，完整地址统一按 address.labels 的格式批量生成，单元须在户号之前
+        refresh_apartment_addresses(Apartment.objects.all())
+        refresh_unit_addresses(Unit.objects.all())
+        refresh_house_addresses(House.objects.all())
+        self.log(f'地址：{communities} 个小区，{houses} 户，{hutongs} 条胡同')
+
+    def _choices(self, weights, count):
+        return self.rng.choices(list(weights), list(weights.values()), k=count)
+
+    def _birth_dates(self, count):
+        bands = self.rng.choices(AGE_BANDS, [weight for _, _, weight in AGE_BANDS], k=count)
+        return [
+            REFERENCE_DATE - timedelta(days=self.rng.randrange(low * 365, (high + 1) * 365 - 1))
+            for low, high, _ in bands
+        ]
+
+    def _id_card(self, birth_date, gender):
+        """
+        生成不重复的身份证号
+
+        同一地区、出生日期、性别的居民依次编号，顺序码末位男单女双，计数保存在紧凑数组中。
+        """
+        day = (REFERENCE_DATE - birth_date).days
+        while True:
+            area = self.rng.randrange(len(AREA_CODES))
+            slot = (area * MAX_AGE_DAYS + day) * 2 + gender
+            n = self.id_sequences[slot]
+            if n < 499:
+                break
+        self.id_sequences[slot] = n + 1
+        first17 = f'{AREA_CODES[area]}{birth_date:%Y%m%d}{n * 2 + gender + 1:03d}'
+        return first17 + id_card_check_digit(first17)
+
+    def _residents(self, count):
+        """按列生成一批居民，各选项字段按 CHOICE_WEIGHTS 分布取值"""
+        rng = self.rng
+        columns = {field: self._choices(weights, count) for field, weights in CHOICE_WEIGHTS.items()}
+        columns['ethnicity_id'] = rng.choices(self.ethnicity_ids, ETHNICITY_WEIGHTS, k=count)
+        columns['birth_date'] = self._birth_dates(count)
+        residents = []
+        for i in range(count):
+            values = {field: column[i] for field, column in columns.items()}
+            if (REFERENCE_DATE - values['birth_date']).days < 20 * 365:
+                values['marital_status'] = 0
+            residents.append(Resident(
+                name=self._name(),
+                id_card=self._id_card(values['birth_date'], values['gender']),
+                household_address='北京市',
+                phone_number=self._phone(),
+                **values,
+                **{flag: int(rng.random() < rate) for flag, rate in FLAG_RATES.items()},
+            ))
+        return residents
+
+    def _dependents(self, residents):
+        """一批居民的楼房/平房关联及特殊人群明细"""
+        rng = self.rng
+        start, end = date(2015, 1, 1), date(2024, 12, 31)
+        rows = {model: [] for model in DEPENDENT_MODELS}
+        for resident in residents:
+            pk = resident.pk
+            if resident.residential_type == 0:
+                rows[Building].append(Building(
+                    resident_id=pk, building_number=rng.randrange(1, 30), house_number_id=rng.choice(self.house_ids),
+                ))
+            else:
+                rows[Bungalow].append(Bungalow(
+                    resident_id=pk, bungalow_number=str(rng.randrange(1, 200)), hutong_id=rng.choice(self.hutong_ids),
+                ))
+            for model, flag, prefix in BANK_DETAILS:
+                if getattr(resident, flag):
+                    rows[model].append(model(
+                        resident_id=pk, authentication_date=self._datetime(start, end),
+                        bank_account_number=f'{prefix}{pk:016d}', bank_account_name=resident.name,
+                    ))
+            if resident.is_key_person:
+                rows[SpecialObjects].append(SpecialObjects(
+                    resident_id=pk, object_type=rng.randrange(3), object_name=resident.name,
+                    object_contact_phone=resident.phone_number, object_address='北京市',
+                    object_responsible_name=self._name(), object_responsible_phone=self._phone(),
+                ))
+            if resident.is_deceased:
+                rows[Deceased].append(Deceased(
+                    resident_id=pk, deceased_date=self._datetime(start, end), deceased_place='医院',
+                    deceased_reason='疾病', deceased_contact_name=self._name(), deceased_contact_phone=self._phone(),
+                ))
+        return rows
+
+    def generate_residents(self):
+        """居民及其楼房/平房关联、特殊人群明细，每 commit_size 个居民提交一次"""
+        with deferred_constraints():
+            self._bulk_create(Ethnicity, [Ethnicity(name=name) for name in ETHNICITIES])
+        self.ethnicity_ids = _ids(Ethnicity)
+        self.house_ids = _ids(House)
+        self.hutong_ids = _ids(Hutong)
+        self.id_sequences = array('H', [0]) * (len(AREA_CODES) * MAX_AGE_DAYS * 2)
+
+        for segment_start, segment_end in _chunks(0, self.residents, self.commit_size):
+            with deferred_constraints():
+                for start, end in _chunks(segment_start, segment_end, self.batch_size):
+                    residents = self._residents(end - start)
+                    self._bulk_create(Resident, residents)
+                    if not connection.features.can_return_rows_from_bulk_insert:
+                        pks = dict(Resident.objects.filter(
+                            id_card__in=[resident.id_card for resident in residents],
+                        ).values_list('id_card', 'pk'))
+                        for resident in residents:
+                            resident.pk = pks[resident.id_card]
+                    for model, objects in self._dependents(residents).items():
+                        self._bulk_create(model, objects)
+            self.log(f'居民：{segment_end}/{self.residents}')
+
+    def _legal_person_id(self):
+        """商户法人身份证号，不要求唯一"""
+        first17 = (
+            f'{self.rng.choice(AREA_CODES)}{self._date(date(1950, 1, 1), date(2000, 1, 1)):%Y%m%d}'
+            f'{self.rng.randrange(1000):03d}'
+        )
+        return first17 + id_card_check_digit(first17)
+
+    def generate_merchants(self):
+        """行业及商户"""
+        with deferred_constraints():
+            self._bulk_create(Industry, [Industry(industry_name=name, industry_code=code) for name, code in INDUSTRIES])
+        industry_ids = _ids(Industry)
+        street_ids = _ids(Street)
+        merchants = int(self.residents * MERCHANT_RATE)
+        for segment_start, segment_end in _chunks(0, merchants, self.commit_size):
+            with deferred_constraints():
+                for start, end in _chunks(segment_start, segment_end, self.batch_size):
+                    self._bulk_create(Merchant, [
+                        Merchant(
+                            merchants_name=f'{self._name()}商店{i + 1}', credit_code=f'91{i:016d}',
+                            license_number=f'L{i:012d}', legal_person_name=self._name(),
+                            legal_person_id=self._legal_person_id(), phone_number=self._phone(), address='北京市',
+                            industry_id=self.rng.choice(industry_ids), street_id=self.rng.choice(street_ids),
+                            establishment_date=self._date(date(2000, 1, 1), date(2024, 12, 31)),
+                        )
+                        for i in range(start, end)
+                    ])
+        self.log(f'商户：{merchants}')
+
+    def generate_properties(self):
+        """物业及物业经理，有物业经理的小区 has_property 为 True"""
+        community_ids = _ids(Community)
+        covered = sorted(self.rng.sample(community_ids, int(len(community_ids) * PROPERTY_COVERAGE)))
+        properties = max(1, len(covered) // COMMUNITIES_PER_PROPERTY)
+        self._bulk_create(Property, [
+            Property(
+                property_name=f'物业公司{i + 1}', property_address='北京市', property_owner=self._name(),
+                property_contact_phone=self._phone(),
+            )
+            for i in range(properties)
+        ])
+        property_ids = _ids(Property)
+        self._bulk_create(PropertyManager, [
+            PropertyManager(property_id=self.rng.choice(property_ids), community_id=community_id)
+            for community_id in covered
+        ])
+        Community.objects.filter(id__in=covered).update(has_property=True)
+
+    def refresh_derived(self):
+        """bulk_create 不触发信号，重建汇总表、检索索引及居住人数，递增地址树及交叉统计版本号并使缓存失效"""
+        rebuild_snapshot()
+        rebuild_rollup()
+        rebuild_index()
+        rebuild_occupancy()
+        versions.bump(versions.ADDRESS_TREE)
+        versions.bump(versions.CROSSTAB)
+        cache.invalidate_on_commit(cache.STATISTICS, cache.ADDRESS_PAGES, cache.MERCHANT_PAGES, cache.COHORTS)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class IndexConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'index'
+
+    def ready(self):
+        # 注册首页统计汇总表的增量维护信号
+        from . import signals  # noqa: F401
@@ -0,0 +1,59 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from community_management.benchmark import DEFAULT_TOLERANCE, SCENARIO_NAMES, compare, run_benchmarks
+from community_management.synthetic import SCALES, DataGenerator, parse_scale
+
+
+class Command(BaseCommand):
+    help = (
+        '性能基准测试：对首页、列表接口、检索、导入和导出计时（毫秒），可与基线结果对比，出现回退时以非零状态退出。'
+        '应在单独的数据库上执行，如 DB_NAME=/tmp/bench.sqlite3 python manage.py migrate 后再运行'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--generate', metavar='SCALE',
+            help=f'测试前在空数据库中生成合成数据，规模为 {"/".join(SCALES)} 或居民数',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='生成数据的随机种子')
+        parser.add_argument('--scenario', action='append', choices=SCENARIO_NAMES, help='只执行指定场景，可重复指定')
+        parser.add_argument('--repeat', type=int, help='每个场景的执行次数，默认使用各场景的设置')
+        parser.add_argument('--output', help='结果写入的JSON文件')
+        parser.add_argument('--baseline', help='用于对比的基线结果JSON文件')
+        parser.add_argument(
+            '--tolerance', type=float, default=DEFAULT_TOLERANCE, help='允许的P50变慢比例，默认0.2即20%%',
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] is not None and options['repeat'] < 1:
+            raise CommandError('repeat 必须大于0')
+        try:
+            if options['generate']:
+                counts = DataGenerator(
+                    parse_scale(options['generate']), seed=options['seed'], log=self.stdout.write,
+                ).run()
+                self.stdout.write(f'已生成 {sum(counts.values())} 行数据')
+            results = run_benchmarks(options['scenario'], options['repeat'], log=self._log)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f'结果已写入 {options["output"]}')
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as f:
+                baseline = json.load(f)
+            regressions = compare(results, baseline, options['tolerance'])
+            for name, previous, current, ratio in regressions:
+                self.stdout.write(self.style.ERROR(f'{name}: P50 {previous:.2f} -> {current:.2f}（+{ratio:.0%}）'))
+            if regressions:
+                raise CommandError(f'{len(regressions)} 个场景性能回退')
+            self.stdout.write(self.style.SUCCESS('与基线相比没有性能回退'))
+
+    def _log(self, name, stats):
+        self.stdout.write(
+            f'{name:<20}{stats["runs"]:>4} 次  平均 {stats["mean"]:>9.2f}  P50 {stats["p50"]:>9.2f}  '
+            f'P95 {stats["p95"]:>9.2f}  最大 {stats["max"]:>9.2f}'
+        )
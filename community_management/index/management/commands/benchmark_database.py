@@ -0,0 +1,133 @@
+import random
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+from merchants.models import Merchant
+from merchants.services import list_merchants
+from residents.models import Resident
+from index.services import get_snapshot_statistics
+
+# SQLite 默认参数，用于与 settings.SQLITE_PRAGMAS 对比
+SQLITE_DEFAULT_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'mmap_size': 0,
+    'cache_size': -2000,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        '在当前数据库配置（DB_PROFILE）下并发执行首页统计、商户列表读取和居民记录写入，输出各操作的吞吐量及耗时；'
+        '写入只把居民的最后更新时间改写为原值，不改变数据'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='读取线程数')
+        parser.add_argument('--writers', type=int, default=1, help='写入线程数')
+        parser.add_argument('--duration', type=float, default=10, help='测试时长（秒）')
+        parser.add_argument('--seed', type=int, default=0, help='抽样随机种子')
+        parser.add_argument(
+            '--sqlite-defaults', action='store_true',
+            help='SQLite 使用默认参数（DELETE 日志、synchronous=FULL）作为对照，结束后恢复配置的参数',
+        )
+
+    def handle(self, *args, **options):
+        if options['readers'] < 0 or options['writers'] < 0 or options['readers'] + options['writers'] < 1:
+            raise CommandError('readers 和 writers 不能为负数，且至少有一个线程')
+        pairs = list(Merchant.objects.order_by().values_list('street_id', 'industry_id').distinct())
+        resident_ids = list(Resident.objects.values_list('pk', flat=True))
+        if not pairs or not resident_ids:
+            raise CommandError('商户表或居民表为空，请先导入数据')
+
+        pragmas = None
+        configured_options = connection.settings_dict['OPTIONS']
+        if connection.vendor == 'sqlite':
+            pragmas = SQLITE_DEFAULT_PRAGMAS if options['sqlite_defaults'] else settings.SQLITE_PRAGMAS
+            # 日志模式保存在数据库文件中，在开始前统一切换
+            self._set_pragmas(pragmas)
+            if options['sqlite_defaults']:
+                # 各线程新建的连接会执行 init_command 把日志模式改回 WAL，对照组去掉该命令及 IMMEDIATE 事务模式
+                connection.settings_dict['OPTIONS'] = {
+                    name: value for name, value in configured_options.items()
+                    if name not in ('init_command', 'transaction_mode')
+                }
+        connection.close()
+
+        rng = random.Random(options['seed'])
+        operations = {
+            'dashboard': lambda: get_snapshot_statistics(rng.choice(('year', 'month'))),
+            'list': lambda: self._list_page(rng.choice(pairs)),
+            'write': lambda: self._touch_resident(rng.choice(resident_ids)),
+        }
+        threads = [('dashboard' if i % 2 == 0 else 'list') for i in range(options['readers'])]
+        threads += ['write'] * options['writers']
+        results = {name: {'timings': [], 'errors': 0} for name in operations}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+
+        def worker(name):
+            timings, errors = [], 0
+            try:
+                while time.monotonic() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        operations[name]()
+                    except OperationalError:
+                        errors += 1
+                        continue
+                    timings.append((time.perf_counter() - started) * 1000)
+            finally:
+                connection.close()
+            with lock:
+                results[name]['timings'].extend(timings)
+                results[name]['errors'] += errors
+
+        workers = [threading.Thread(target=worker, args=(name,)) for name in threads]
+        try:
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+        finally:
+            connection.settings_dict['OPTIONS'] = configured_options
+
+        if connection.vendor == 'sqlite' and options['sqlite_defaults']:
+            connection.close()
+            self._set_pragmas(settings.SQLITE_PRAGMAS)
+            connection.close()
+
+        self.stdout.write(
+            f'数据库 {settings.DB_PROFILE}（{connection.vendor}），读取线程 {options["readers"]}，'
+            f'写入线程 {options["writers"]}，时长 {options["duration"]} 秒'
+        )
+        if pragmas:
+            self.stdout.write('PRAGMA ' + ' '.join(f'{name}={value}' for name, value in pragmas.items()))
+        for name, result in results.items():
+            timings = sorted(result['timings'])
+            if not timings and not result['errors']:
+                continue
+            percentile = lambda p: timings[min(len(timings) - 1, int(len(timings) * p))] if timings else 0
+            self.stdout.write(
+                f'{name:10} 吞吐 {len(timings) / options["duration"]:9.1f} 次/秒  P50 {percentile(0.5):.2f}  '
+                f'P95 {percentile(0.95):.2f}  P99 {percentile(0.99):.2f}  失败 {result["errors"]}'
+            )
+
+    @staticmethod
+    def _set_pragmas(pragmas):
+        with connection.cursor() as cursor:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+
+    @staticmethod
+    def _list_page(pair):
+        street, industry = pair
+        list_merchants({'street_id': street, 'industry_id': industry})
+
+    @staticmethod
+    def _touch_resident(pk):
+        with transaction.atomic():
+            Resident.objects.filter(pk=pk).update(last_update_time=F('last_update_time'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from index.snapshot import rebuild_snapshot
+
+
+class Command(BaseCommand):
+    help = '从居民、商户及特殊人群明细表全量重建首页统计日汇总表'
+
+    def handle(self, *args, **options):
+        days = rebuild_snapshot()
+        self.stdout.write(self.style.SUCCESS(f'首页统计汇总表重建完成，共 {days} 天'))
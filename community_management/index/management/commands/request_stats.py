@@ -0,0 +1,42 @@
+import json
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from community_management import instrumentation
+
+
+class Command(BaseCommand):
+    help = '汇总各进程发布到缓存的请求抽样数据，按视图输出请求数、耗时P50/P95/P99（毫秒）、SQL条数及N+1查询'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--view', action='append', help='只输出指定的视图（URL名称），可重复指定')
+        parser.add_argument('--json', action='store_true', help='以JSON格式输出完整汇总，包括耗时直方图和重复SQL')
+
+    def handle(self, *args, **options):
+        if isinstance(caches['default'], LocMemCache):
+            raise CommandError(
+                '缓存使用进程内缓存（locmem），读取不到 Web 进程发布的样本；'
+                '请将 CACHE_BACKEND 设为 file 或 redis 后重启服务，或通过 /index/requests/stats/ 查看单个进程的数据'
+            )
+        samples = instrumentation.collect_published()
+        if options['view']:
+            samples = [sample for sample in samples if sample['view'] in options['view']]
+        report = instrumentation.summarize(samples)
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+        if not report:
+            self.stdout.write('缓存中没有抽样数据：确认 INSTRUMENTATION_SAMPLE_RATE 大于0')
+            return
+
+        self.stdout.write(
+            f'{"视图":<24}{"请求数":>8}{"P50":>10}{"P95":>10}{"P99":>10}{"平均SQL":>10}{"平均DB":>10}{"N+1":>6}'
+        )
+        for view, stats in report.items():
+            self.stdout.write(
+                f'{view:<24}{stats["requests"]:>8}{stats["p50"]:>10.2f}{stats["p95"]:>10.2f}{stats["p99"]:>10.2f}'
+                f'{stats["avg_queries"]:>10.1f}{stats["avg_db_ms"]:>10.2f}{stats["n_plus_one"]:>6}'
+            )
+        for view, stats in report.items():
+            for duplicate in stats['duplicates']:
+                self.stdout.write(f'[{view}] 重复 {duplicate["count"]} 次: {duplicate["sql"][:200]}')
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='统计日期')),
+                ('population', models.IntegerField(default=0, verbose_name='人口数')),
+                ('merchants', models.IntegerField(default=0, verbose_name='商户数')),
+                ('deceased', models.IntegerField(default=0, verbose_name='死亡人口数')),
+                ('disabled', models.IntegerField(default=0, verbose_name='残疾人数')),
+                ('special_needs', models.IntegerField(default=0, verbose_name='特扶人口数')),
+                ('low_income', models.IntegerField(default=0, verbose_name='低保户数')),
+                ('five_guarantees', models.IntegerField(default=0, verbose_name='五保户数')),
+                ('new_deceased', models.IntegerField(default=0, verbose_name='新增死亡人口数')),
+                ('new_disabled', models.IntegerField(default=0, verbose_name='新增残疾人数')),
+                ('new_special_needs', models.IntegerField(default=0, verbose_name='新增特扶人口数')),
+                ('new_low_income', models.IntegerField(default=0, verbose_name='新增低保户数')),
+                ('new_five_guarantees', models.IntegerField(default=0, verbose_name='新增五保户数')),
+                ('last_update_time', models.DateTimeField(auto_now=True, verbose_name='最后更新时间')),
+            ],
+            options={
+                'verbose_name': '首页统计日汇总',
+                'verbose_name_plural': '首页统计日汇总',
+                'db_table': 'dashboard_snapshot',
+                'ordering': ['-date'],
+            },
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:00
+
+from collections import defaultdict
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+# 迁移中的统计规则按迁移时复制，不随 index.snapshot 的修改变化
+TOTAL_FIELDS = ('population', 'merchants', 'deceased', 'disabled', 'special_needs', 'low_income', 'five_guarantees')
+
+RESIDENT_COUNTERS = {
+    'population': ('is_deceased', 0),
+    'deceased': ('is_deceased', 1),
+    'disabled': ('is_disabled', 1),
+    'special_needs': ('is_special_support', 1),
+    'low_income': ('is_low_income', 1),
+    'five_guarantees': ('is_beneficiary', 1),
+}
+
+DETAIL_COUNTERS = {
+    'Deceased': 'new_deceased',
+    'Disabled': 'new_disabled',
+    'SpecialNeeds': 'new_special_needs',
+    'LowIncome': 'new_low_income',
+    'FiveGuarantees': 'new_five_guarantees',
+}
+
+
+def _daily_counts(queryset, **counters):
+    return (
+        queryset.order_by()
+        .annotate(day=TruncDate('registration_date', tzinfo=timezone.get_current_timezone()))
+        .values('day')
+        .annotate(**counters)
+    )
+
+
+def fill_snapshot(apps, schema_editor):
+    """按现有居民、商户及特殊人群明细生成日汇总行，再按日汇总行计算总数"""
+    DashboardSnapshot = apps.get_model('index', 'DashboardSnapshot')
+    DashboardTotals = apps.get_model('index', 'DashboardTotals')
+    rows = defaultdict(dict)
+    for row in _daily_counts(apps.get_model('residents', 'Resident').objects.all(), **{
+        field: Count('pk', filter=Q(**{flag: expected})) for field, (flag, expected) in RESIDENT_COUNTERS.items()
+    }):
+        rows[row.pop('day')].update(row)
+    for row in _daily_counts(apps.get_model('merchants', 'Merchant').objects.all(), merchants=Count('pk')):
+        rows[row.pop('day')].update(row)
+    for model_name, field in DETAIL_COUNTERS.items():
+        for row in _daily_counts(apps.get_model('residents', model_name).objects.all(), **{field: Count('pk')}):
+            rows[row.pop('day')].update(row)
+
+    DashboardSnapshot.objects.all().delete()
+    DashboardSnapshot.objects.bulk_create(
+        [DashboardSnapshot(date=day, **counters) for day, counters in rows.items()], batch_size=500,
+    )
+    DashboardTotals.objects.create(pk=1, **{
+        field: sum(counters.get(field, 0) for counters in rows.values()) for field in TOTAL_FIELDS
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('index', '0001_initial'),
+        ('merchants', '0001_initial'),
+        ('residents', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardTotals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('population', models.IntegerField(default=0, verbose_name='人口数')),
+                ('merchants', models.IntegerField(default=0, verbose_name='商户数')),
+                ('deceased', models.IntegerField(default=0, verbose_name='死亡人口数')),
+                ('disabled', models.IntegerField(default=0, verbose_name='残疾人数')),
+                ('special_needs', models.IntegerField(default=0, verbose_name='特扶人口数')),
+                ('low_income', models.IntegerField(default=0, verbose_name='低保户数')),
+                ('five_guarantees', models.IntegerField(default=0, verbose_name='五保户数')),
+                ('last_update_time', models.DateTimeField(auto_now=True, verbose_name='最后更新时间')),
+            ],
+            options={
+                'verbose_name': '首页统计总数',
+                'verbose_name_plural': '首页统计总数',
+                'db_table': 'dashboard_totals',
+            },
+        ),
+        migrations.RunPython(fill_snapshot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('index', '0002_dashboard_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='名称')),
+                ('value', models.BigIntegerField(default=0, verbose_name='版本号')),
+                ('last_update_time', models.DateTimeField(default=django.utils.timezone.now, verbose_name='最后更新时间')),
+            ],
+            options={
+                'verbose_name': '数据版本号',
+                'verbose_name_plural': '数据版本号',
+                'db_table': 'data_version',
+            },
+        ),
+    ]
@@ -1,3 +1,77 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class DashboardSnapshot(models.Model):
+    """
+    首页统计日汇总表
+    按登记日期汇总各类统计计数，由信号增量维护，可通过 rebuild_dashboard_snapshot 命令全量重建
+    """
+    date = models.DateField(unique=True, verbose_name='统计日期')
+    # 当日登记的居民/商户中各类标识的计数，累加全部日期即为总数
+    population = models.IntegerField(default=0, verbose_name='人口数')
+    merchants = models.IntegerField(default=0, verbose_name='商户数')
+    deceased = models.IntegerField(default=0, verbose_name='死亡人口数')
+    disabled = models.IntegerField(default=0, verbose_name='残疾人数')
+    special_needs = models.IntegerField(default=0, verbose_name='特扶人口数')
+    low_income = models.IntegerField(default=0, verbose_name='低保户数')
+    five_guarantees = models.IntegerField(default=0, verbose_name='五保户数')
+    # 当日登记的特殊人群明细记录数
+    new_deceased = models.IntegerField(default=0, verbose_name='新增死亡人口数')
+    new_disabled = models.IntegerField(default=0, verbose_name='新增残疾人数')
+    new_special_needs = models.IntegerField(default=0, verbose_name='新增特扶人口数')
+    new_low_income = models.IntegerField(default=0, verbose_name='新增低保户数')
+    new_five_guarantees = models.IntegerField(default=0, verbose_name='新增五保户数')
+    last_update_time = models.DateTimeField(auto_now=True, verbose_name='最后更新时间')
+
+    class Meta:
+        db_table = 'dashboard_snapshot'
+        verbose_name = '首页统计日汇总'
+        verbose_name_plural = '首页统计日汇总'
+        ordering = ['-date']
+
+    def __str__(self):
+        return f'首页统计 - {self.date}'
+
+
+class DashboardTotals(models.Model):
+    """
+    首页统计总数
+    只有一行，等于日汇总表各日计数之和，与日汇总表在同一事务中增量维护，
+    首页读取总数时无需累加全部日期行
+    """
+    population = models.IntegerField(default=0, verbose_name='人口数')
+    merchants = models.IntegerField(default=0, verbose_name='商户数')
+    deceased = models.IntegerField(default=0, verbose_name='死亡人口数')
+    disabled = models.IntegerField(default=0, verbose_name='残疾人数')
+    special_needs = models.IntegerField(default=0, verbose_name='特扶人口数')
+    low_income = models.IntegerField(default=0, verbose_name='低保户数')
+    five_guarantees = models.IntegerField(default=0, verbose_name='五保户数')
+    last_update_time = models.DateTimeField(auto_now=True, verbose_name='最后更新时间')
+
+    class Meta:
+        db_table = 'dashboard_totals'
+        verbose_name = '首页统计总数'
+        verbose_name_plural = '首页统计总数'
+
+    def __str__(self):
+        return '首页统计总数'
+
+
+class DataVersion(models.Model):
+    """
+    数据版本号
+    进程内缓存的数据变更时在同一事务中递增，各进程比对版本号判断是否需要重新加载，
+    不依赖只在本进程可见的本地内存缓存
+    """
+    name = models.CharField(max_length=50, unique=True, verbose_name='名称')
+    value = models.BigIntegerField(default=0, verbose_name='版本号')
+    last_update_time = models.DateTimeField(default=timezone.now, verbose_name='最后更新时间')
+
+    class Meta:
+        db_table = 'data_version'
+        verbose_name = '数据版本号'
+        verbose_name_plural = '数据版本号'
+
+    def __str__(self):
+        return f'{self.name} v{self.value}'
@@ -0,0 +1,127 @@
+from datetime import datetime, time, timedelta
+from django.db.models import CharField, Count, Sum, Value
+from django.utils import timezone
+from residents.models import Resident, Deceased, Disabled, LowIncome, FiveGuarantees, SpecialNeeds
+from merchants.models import Merchant
+from .models import DashboardSnapshot, DashboardTotals
+from .snapshot import TOTAL_FIELDS, TOTALS_ID
+
+# 统计周期对应的天数
+PERIOD_DAYS = {
+    'year': 365,
+    'month': 30,
+}
+
+# 统计结果的字段顺序
+STATISTICS_KEYS = (
+    'total_population',
+    'total_merchants',
+    'new_population',
+    'new_merchants',
+    'total_deceased',
+    'new_deceased',
+    'total_disabled',
+    'new_disabled',
+    'total_special_needs',
+    'new_special_needs',
+    'total_low_income',
+    'new_low_income',
+    'total_five_guarantees',
+    'new_five_guarantees',
+)
+
+
+# 新增数 -> 日汇总表字段，总数与总数表字段同名
+SNAPSHOT_NEW_FIELDS = {
+    'new_population': 'population',
+    'new_merchants': 'merchants',
+    'new_deceased': 'new_deceased',
+    'new_disabled': 'new_disabled',
+    'new_special_needs': 'new_special_needs',
+    'new_low_income': 'new_low_income',
+    'new_five_guarantees': 'new_five_guarantees',
+}
+
+
+def get_period_start(period='year', now=None):
+    """
+    根据时间周期计算统计起始时间
+
+    起始时间取本地时区的零点，实时统计与按日汇总的统计以同一日期边界计算新增数
+    """
+    now = now or timezone.now()
+    day = timezone.localdate(now) - timedelta(days=PERIOD_DAYS.get(period, PERIOD_DAYS['year']))
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _count_row(queryset, key):
+    """把一个查询集压缩成 (统计项, 数量) 单行，用于UNION合并"""
+    return (
+        queryset.order_by()
+        .values(key=Value(key, output_field=CharField()))
+        .annotate(n=Count('pk'))
+        .values_list('key', 'n')
+    )
+
+
+def compute_statistics(period='year'):
+    """
+    实时计算首页统计数据
+
+    每个统计项是一条计数子查询，通过一次UNION ALL查询取回，整个统计固定为一次数据库往返。
+    居民表的计数都在索引上完成：在世人口为居民总数减死亡人口，死亡人口及新增人口使用
+    (is_deceased, registration_date) 覆盖索引，残疾、特扶、低保、五保使用只包含标识为1的行的部分索引。
+    """
+    start_date = get_period_start(period)
+
+    rows = _count_row(Resident.objects.all(), 'total_residents').union(
+        _count_row(Resident.objects.filter(is_deceased=0, registration_date__gte=start_date), 'new_population'),
+        _count_row(Resident.objects.filter(is_deceased=1), 'total_deceased'),
+        _count_row(Resident.objects.filter(is_disabled=1), 'total_disabled'),
+        _count_row(Resident.objects.filter(is_special_support=1), 'total_special_needs'),
+        _count_row(Resident.objects.filter(is_low_income=1), 'total_low_income'),
+        _count_row(Resident.objects.filter(is_beneficiary=1), 'total_five_guarantees'),
+        _count_row(Merchant.objects.all(), 'total_merchants'),
+        _count_row(Merchant.objects.filter(registration_date__gte=start_date), 'new_merchants'),
+        _count_row(Deceased.objects.filter(registration_date__gte=start_date), 'new_deceased'),
+        _count_row(Disabled.objects.filter(registration_date__gte=start_date), 'new_disabled'),
+        _count_row(SpecialNeeds.objects.filter(registration_date__gte=start_date), 'new_special_needs'),
+        _count_row(LowIncome.objects.filter(registration_date__gte=start_date), 'new_low_income'),
+        _count_row(FiveGuarantees.objects.filter(registration_date__gte=start_date), 'new_five_guarantees'),
+        all=True,
+    )
+    stats = dict(rows)
+    stats['total_population'] = stats.pop('total_residents') - stats['total_deceased']
+
+    return {key: stats[key] for key in STATISTICS_KEYS}
+
+
+def get_snapshot_statistics(period='year'):
+    """
+    从首页统计汇总表读取统计数据
+
+    总数读取总数表的一行，新增数只累加统计周期内的日期行（年度最多366行），
+    两者通过一次UNION ALL查询取回，不扫描居民、商户等基础表，也不累加全部日期行。
+    """
+    start = timezone.localdate(get_period_start(period))
+    totals = (
+        DashboardTotals.objects.filter(pk=TOTALS_ID)
+        .values(key=Value('total', output_field=CharField()))
+        .values_list('key', *TOTAL_FIELDS)
+    )
+    # 汇总列以序号命名，避免与日汇总表的同名字段冲突
+    window = (
+        DashboardSnapshot.objects.filter(date__gte=start)
+        .order_by()
+        .values(key=Value('new', output_field=CharField()))
+        .annotate(**{f'n{i}': Sum(field) for i, field in enumerate(SNAPSHOT_NEW_FIELDS.values())})
+        .values_list('key', *(f'n{i}' for i in range(len(SNAPSHOT_NEW_FIELDS))))
+    )
+    names = {
+        'total': [f'total_{field}' for field in TOTAL_FIELDS],
+        'new': list(SNAPSHOT_NEW_FIELDS),
+    }
+    stats = dict.fromkeys(STATISTICS_KEYS, 0)
+    for key, *counts in totals.union(window, all=True):
+        stats.update({name: n or 0 for name, n in zip(names[key], counts)})
+    return stats
@@ -0,0 +1,53 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from residents.models import Resident
+from merchants.models import Merchant
+from .snapshot import (
+    DETAIL_COUNTERS, RESIDENT_SNAPSHOT_FIELDS, apply_deltas, merge_deltas, resident_deltas, snapshot_day,
+)
+
+
+def _resident_values(instance):
+    return {field: getattr(instance, field) for field in RESIDENT_SNAPSHOT_FIELDS}
+
+
+@receiver(post_save, sender=Resident)
+def update_resident_counters(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = resident_deltas(_resident_values(instance))
+    # 原值由 residents.signals.remember_previous_values 在保存前读取
+    previous = getattr(instance, '_previous_values', None)
+    if not created and previous:
+        deltas = merge_deltas(deltas, resident_deltas(previous, sign=-1))
+    apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Resident)
+def remove_resident_counters(sender, instance, **kwargs):
+    apply_deltas(resident_deltas(_resident_values(instance), sign=-1))
+
+
+@receiver(post_save, sender=Merchant)
+def add_merchant_counter(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        apply_deltas({snapshot_day(instance.registration_date): {'merchants': 1}})
+
+
+@receiver(post_delete, sender=Merchant)
+def remove_merchant_counter(sender, instance, **kwargs):
+    apply_deltas({snapshot_day(instance.registration_date): {'merchants': -1}})
+
+
+def add_detail_counter(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        apply_deltas({snapshot_day(instance.registration_date): {DETAIL_COUNTERS[sender]: 1}})
+
+
+def remove_detail_counter(sender, instance, **kwargs):
+    apply_deltas({snapshot_day(instance.registration_date): {DETAIL_COUNTERS[sender]: -1}})
+
+
+for detail_model in DETAIL_COUNTERS:
+    post_save.connect(add_detail_counter, sender=detail_model)
+    post_delete.connect(remove_detail_counter, sender=detail_model)
@@ -0,0 +1,158 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from community_management import cache
+from residents.models import Resident, Deceased, Disabled, LowIncome, FiveGuarantees, SpecialNeeds
+from merchants.models import Merchant
+from .models import DashboardSnapshot, DashboardTotals
+
+# 汇总字段 -> 居民表标识条件
+RESIDENT_COUNTERS = {
+    'population': ('is_deceased', 0),
+    'deceased': ('is_deceased', 1),
+    'disabled': ('is_disabled', 1),
+    'special_needs': ('is_special_support', 1),
+    'low_income': ('is_low_income', 1),
+    'five_guarantees': ('is_beneficiary', 1),
+}
+
+# 总数表的字段，等于日汇总表对应字段各日之和
+TOTAL_FIELDS = ('population', 'merchants', 'deceased', 'disabled', 'special_needs', 'low_income', 'five_guarantees')
+
+# 总数表唯一一行的主键
+TOTALS_ID = 1
+
+# 计算居民贡献所需的字段
+RESIDENT_SNAPSHOT_FIELDS = ['registration_date'] + sorted({flag for flag, _ in RESIDENT_COUNTERS.values()})
+
+# 特殊人群明细表 -> 新增计数字段
+DETAIL_COUNTERS = {
+    Deceased: 'new_deceased',
+    Disabled: 'new_disabled',
+    SpecialNeeds: 'new_special_needs',
+    LowIncome: 'new_low_income',
+    FiveGuarantees: 'new_five_guarantees',
+}
+
+
+def snapshot_day(value):
+    """登记时间所属的统计日期（本地时区）"""
+    if timezone.is_aware(value):
+        return timezone.localdate(value)
+    return value.date()
+
+
+def resident_deltas(values, sign=1):
+    """
+    计算一条居民记录对汇总表的贡献
+
+    Args:
+        values: 包含 RESIDENT_SNAPSHOT_FIELDS 的字典
+        sign: 1 表示计入，-1 表示扣除
+    """
+    counters = {
+        field: sign
+        for field, (flag, expected) in RESIDENT_COUNTERS.items()
+        if values[flag] == expected
+    }
+    return {snapshot_day(values['registration_date']): counters}
+
+
+def merge_deltas(*parts):
+    """合并多个 {日期: {字段: 增量}} 字典"""
+    merged = defaultdict(lambda: defaultdict(int))
+    for part in parts:
+        for day, counters in part.items():
+            for field, n in counters.items():
+                merged[day][field] += n
+    return merged
+
+
+def _add(model, lookup, counters):
+    """把计数累加到 lookup 对应的行，行不存在时先创建"""
+    updates = {field: F(field) + n for field, n in counters.items()}
+    if not model.objects.filter(**lookup).update(**updates):
+        model.objects.get_or_create(**lookup)
+        model.objects.filter(**lookup).update(**updates)
+
+
+def apply_deltas(deltas):
+    """
+    把增量累加到对应日期的汇总行，缺失的日期行会先创建
+
+    各日增量之和同时累加到总数表，与日汇总行在同一事务中提交
+    """
+    totals = defaultdict(int)
+    with transaction.atomic():
+        for day, counters in deltas.items():
+            counters = {field: n for field, n in counters.items() if n}
+            if not counters:
+                continue
+            _add(DashboardSnapshot, {'date': day}, counters)
+            for field in TOTAL_FIELDS:
+                totals[field] += counters.get(field, 0)
+        totals = {field: n for field, n in totals.items() if n}
+        if totals:
+            _add(DashboardTotals, {'pk': TOTALS_ID}, totals)
+
+
+def _daily_counts(queryset, **counters):
+    """按登记日期分组计数"""
+    return (
+        queryset.order_by()
+        .annotate(day=TruncDate('registration_date', tzinfo=timezone.get_current_timezone()))
+        .values('day')
+        .annotate(**counters)
+    )
+
+
+def flag_deltas(queryset, flag, value):
+    """
+    queryset 中的居民把标识 flag 改为 value 时对汇总表的增量，按登记日期一次分组统计
+
+    queryset 应只包含 flag 当前不等于 value 的居民，需在 update() 之前调用。
+    """
+    signs = {
+        field: 1 if expected == value else -1
+        for field, (counter_flag, expected) in RESIDENT_COUNTERS.items()
+        if counter_flag == flag
+    }
+    if not signs:
+        return {}
+    return {
+        row['day']: {field: sign * row['n'] for field, sign in signs.items()}
+        for row in _daily_counts(queryset, n=Count('pk'))
+    }
+
+
+def rebuild_snapshot():
+    """从基础表全量重建日汇总表及总数表，返回日汇总行数"""
+    rows = defaultdict(dict)
+
+    resident_counts = _daily_counts(Resident.objects.all(), **{
+        field: Count('pk', filter=Q(**{flag: expected}))
+        for field, (flag, expected) in RESIDENT_COUNTERS.items()
+    })
+    for row in resident_counts:
+        rows[row.pop('day')].update(row)
+
+    for row in _daily_counts(Merchant.objects.all(), merchants=Count('pk')):
+        rows[row.pop('day')].update(row)
+
+    for model, field in DETAIL_COUNTERS.items():
+        for row in _daily_counts(model.objects.all(), **{field: Count('pk')}):
+            rows[row.pop('day')].update(row)
+
+    with transaction.atomic():
+        DashboardSnapshot.objects.all().delete()
+        DashboardSnapshot.objects.bulk_create(
+            [DashboardSnapshot(date=day, **counters) for day, counters in rows.items()],
+            batch_size=500,
+        )
+        DashboardTotals.objects.update_or_create(pk=TOTALS_ID, defaults={
+            field: sum(counters.get(field, 0) for counters in rows.values()) for field in TOTAL_FIELDS
+        })
+    cache.invalidate_on_commit(cache.STATISTICS)
+    return len(rows)
@@ -1,3 +1,301 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import date, datetime, timedelta
+from django.core.cache import cache as django_cache
+from io import StringIO
+from unittest import skipUnless
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from address.models import Community, House, Street
+from admins import permissions
+from admins.models import Permission, Role
+from merchants.models import Industry, Merchant
+from properties.models import PropertyManager
+from residents.models import Building, Bungalow, Ethnicity, Resident, Deceased, Disabled, LowIncome
+from community_management import cache, instrumentation
+from community_management.benchmark import compare, run_benchmarks
+from community_management.synthetic import DataGenerator, id_card_check_digit
+from .services import compute_statistics, get_period_start, get_snapshot_statistics
+from .snapshot import rebuild_snapshot
+from .views import get_statistics_data
 
-# Create your tests here.
+
+class StatisticsDataTests(TestCase):
+    """首页统计数据测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ethnicity = Ethnicity.objects.create(name='汉族')
+        residents = [
+            Resident.objects.create(
+                name=f'居民{i}', id_card=f'11010119900101{i:04d}', birth_date=date(1990, 1, 1),
+                ethnicity=ethnicity, household_address='北京', phone_number='13800000000',
+                is_deceased=1 if i == 0 else 0,
+                is_disabled=1 if i in (1, 2) else 0,
+                is_low_income=1 if i == 3 else 0,
+            )
+            for i in range(5)
+        ]
+        # 一名居民登记于两年前，不计入新增人口
+        Resident.objects.filter(pk=residents[4].pk).update(
+            registration_date=timezone.now() - timedelta(days=730)
+        )
+        Deceased.objects.create(
+            resident=residents[0], deceased_date=timezone.now(), deceased_place='医院',
+            deceased_reason='病故', deceased_contact_name='家属', deceased_contact_phone='13900000000',
+        )
+        Disabled.objects.create(
+            resident=residents[1], authentication_date=timezone.now(),
+            bank_account_number='6222000000000001', bank_account_name='居民1',
+        )
+        LowIncome.objects.create(
+            resident=residents[3], authentication_date=timezone.now(),
+            bank_account_number='6222000000000002', bank_account_name='居民3',
+        )
+        industry = Industry.objects.create(industry_name='餐饮', industry_code='H62')
+        street = Street.objects.create(street_name='东街')
+        Merchant.objects.create(
+            merchants_name='小店', credit_code='91110000000000000X', license_number='L1',
+            legal_person_name='张三', legal_person_id='110101199001010000', address='东街1号',
+            industry=industry, street=street, establishment_date=date(2020, 1, 1),
+        )
+
+    def setUp(self):
+        django_cache.clear()
+        cache.reset_stats()
+
+    def test_statistics_values(self):
+        stats = compute_statistics('year')
+        self.assertEqual(stats, {
+            'total_population': 4,
+            'total_merchants': 1,
+            'new_population': 3,
+            'new_merchants': 1,
+            'total_deceased': 1,
+            'new_deceased': 1,
+            'total_disabled': 2,
+            'new_disabled': 1,
+            'total_special_needs': 0,
+            'new_special_needs': 0,
+            'total_low_income': 1,
+            'new_low_income': 1,
+            'total_five_guarantees': 0,
+            'new_five_guarantees': 0,
+        })
+
+    def test_statistics_query_count(self):
+        # 全部计数子查询UNION ALL后一次取回
+        with self.assertNumQueries(1):
+            compute_statistics('month')
+
+    @skipUnless(connection.vendor in ('sqlite', 'postgresql'), '部分索引及执行计划格式依赖SQLite/PostgreSQL')
+    def test_flag_counts_use_indexes(self):
+        start = timezone.now() - timedelta(days=30)
+        cases = [
+            (Resident.objects.filter(is_deceased=1), 'idx_resident_deceased_reg'),
+            (Resident.objects.filter(is_deceased=0, registration_date__gte=start), 'idx_resident_deceased_reg'),
+            (Resident.objects.filter(is_disabled=1), 'idx_resident_disabled'),
+            (Resident.objects.filter(is_special_support=1), 'idx_resident_special_support'),
+            (Resident.objects.filter(is_low_income=1), 'idx_resident_low_income'),
+            (Resident.objects.filter(is_beneficiary=1), 'idx_resident_beneficiary'),
+        ]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # 测试数据很少，禁用顺序扫描以检查索引是否可用
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            for queryset, index in cases:
+                plan = queryset.values('registration_date').explain()
+                self.assertIn(index, plan)
+                # 部分索引包含标识列，计数无需回表
+                self.assertRegex(plan, 'COVERING INDEX|Index Only Scan')
+
+    def test_rebuilt_snapshot_matches_live_statistics(self):
+        rebuild_snapshot()
+        for period in ('year', 'month'):
+            self.assertEqual(get_snapshot_statistics(period), compute_statistics(period))
+        with self.assertNumQueries(1):
+            get_statistics_data('year')
+
+    def test_snapshot_incremental_maintenance(self):
+        rebuild_snapshot()
+        resident = Resident.objects.get(name='居民2')
+        resident.is_deceased = 1
+        resident.is_special_support = 1
+        resident.save()
+        Resident.objects.get(name='居民1').delete()
+        Merchant.objects.all().delete()
+        self.assertEqual(get_snapshot_statistics('year'), compute_statistics('year'))
+
+    def test_period_starts_at_local_midnight(self):
+        start = get_period_start('month')
+        self.assertEqual(timezone.localtime(start).time(), datetime.min.time())
+        resident = Resident.objects.filter(name='居民2')
+        # 起始日当天登记的居民计入新增，前一天的不计入，实时统计与汇总表一致
+        for registered, expected in ((start + timedelta(minutes=1), 3), (start - timedelta(minutes=1), 2)):
+            resident.update(registration_date=registered)
+            rebuild_snapshot()
+            stats = get_snapshot_statistics('month')
+            self.assertEqual(stats['new_population'], expected)
+            self.assertEqual(stats, compute_statistics('month'))
+
+    def test_statistics_cache_invalidated_by_resident_change(self):
+        rebuild_snapshot()
+        before = get_statistics_data('year')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_statistics_data('year'), before)
+        resident = Resident.objects.get(name='居民2')
+        resident.is_low_income = 1
+        # 缓存在事务提交后才失效，回滚的修改不使缓存失效
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, transaction.atomic():
+            resident.save()
+            transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+        with self.captureOnCommitCallbacks(execute=True):
+            resident.save()
+            self.assertEqual(get_statistics_data('year'), before)
+        self.assertEqual(get_statistics_data('year')['total_low_income'], before['total_low_income'] + 1)
+        self.assertEqual(cache.get_stats()[cache.STATISTICS], {'hits': 2, 'misses': 2, 'hit_rate': 0.5})
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=1)
+class InstrumentationTests(TestCase):
+    """请求性能采样测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.role = Role.objects.create(name='运维')
+        cls.role.permissions.set(Permission.objects.filter(codename='system.monitor'))
+
+    def setUp(self):
+        django_cache.clear()
+        instrumentation.clear()
+        permissions.invalidate()
+        session = self.client.session
+        session['admin_id'] = 1
+        session['role_id'] = self.role.id
+        session.save()
+
+    def test_requests_recorded_per_view(self):
+        self.client.get('/index/cache/stats/')
+        self.client.get('/no-such-page/')
+        samples = instrumentation.get_samples()
+        self.assertEqual([sample['view'] for sample in samples], ['cache_stats', '<unresolved>'])
+        self.assertEqual(samples[0]['status'], 200)
+        self.assertGreater(samples[0]['queries'], 0)
+
+        data = self.client.get('/index/requests/stats/').json()['data']
+        self.assertEqual(data['samples'], 2)
+        self.assertEqual(data['views']['cache_stats']['requests'], 1)
+        self.assertEqual(sum(data['views']['cache_stats']['histogram'].values()), 1)
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_sampling_disabled(self):
+        self.client.get('/index/cache/stats/')
+        self.assertEqual(instrumentation.get_samples(), [])
+
+    def test_duplicate_queries_detected(self):
+        recorder = instrumentation.QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for pk in range(6):
+                Street.objects.filter(pk=pk).exists()
+            Merchant.objects.exists()
+        self.assertEqual(recorder.count, 7)
+        [(sql, n)] = recorder.duplicates()
+        self.assertIn('street', sql)
+        self.assertEqual(n, 6)
+
+    def test_request_stats_command(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+        }}):
+            for latency in range(1, 101):
+                instrumentation.record({
+                    'view': 'residents', 'method': 'GET', 'status': 200, 'latency_ms': float(latency),
+                    'queries': 3, 'db_ms': 1.0, 'duplicates': [('SELECT 1', 5)] if latency == 1 else [], 'time': 0,
+                })
+            instrumentation.publish()
+            # 模拟另一个进程：取得新编号后发布，两个进程的样本都能汇总
+            number = instrumentation._process_number
+            instrumentation._process_number = 0
+            instrumentation.publish([{
+                'view': 'merchants', 'method': 'GET', 'status': 200, 'latency_ms': 1.0,
+                'queries': 1, 'db_ms': 0.1, 'duplicates': [], 'time': 0,
+            }])
+            self.assertEqual(instrumentation._process_number, number + 1)
+            out = StringIO()
+            call_command('request_stats', '--json', stdout=out)
+        report = json.loads(out.getvalue())
+        stats = report['residents']
+        self.assertEqual((stats['requests'], stats['p50'], stats['p95'], stats['p99']), (100, 51.0, 96.0, 100.0))
+        self.assertEqual(stats['n_plus_one'], 1)
+        self.assertEqual(stats['histogram']['10'], 10)
+        self.assertEqual(report['merchants']['requests'], 1)
+
+    def test_request_stats_command_rejects_locmem(self):
+        with self.assertRaisesMessage(CommandError, 'locmem'):
+            call_command('request_stats', stdout=StringIO())
+
+    def test_request_stats_requires_permission(self):
+        session = self.client.session
+        session['role_id'] = None
+        session.save()
+        self.assertRedirects(self.client.get('/index/requests/stats/'), '/', fetch_redirect_response=False)
+
+
+class BenchmarkTests(TestCase):
+    """合成数据及基准测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.counts = DataGenerator(300, seed=1, batch_size=100).run()
+
+    def setUp(self):
+        django_cache.clear()
+
+    def test_generated_data_consistent(self):
+        self.assertEqual(Resident.objects.count(), 300)
+        self.assertEqual(Resident.objects.filter(is_low_income=1).count(), LowIncome.objects.count())
+        self.assertEqual(Resident.objects.filter(is_deceased=1).count(), Deceased.objects.count())
+        self.assertEqual(Building.objects.count() + Bungalow.objects.count(), 300)
+        house = House.objects.select_related('unit__apartment__community').order_by('id').last()
+        self.assertEqual(house.full_address, house.build_full_address())
+        self.assertEqual(house.unit.full_address, house.unit.build_full_address())
+        self.assertEqual(house.unit.apartment.full_address, house.unit.apartment.build_full_address())
+        self.assertEqual(Community.objects.filter(has_property=True).count(), PropertyManager.objects.count())
+        self.assertEqual(get_snapshot_statistics('year'), compute_statistics('year'))
+        self.assertEqual(self.counts['residents'], 300)
+        with self.assertRaises(ValueError):
+            DataGenerator(10).run()
+
+    def test_generated_id_cards_valid(self):
+        self.assertEqual(id_card_check_digit('11010519491231002'), 'X')
+        rows = list(Resident.objects.values_list('id_card', 'gender', 'birth_date'))
+        self.assertEqual(len({id_card for id_card, _, _ in rows}), len(rows))
+        for id_card, gender, birth_date in rows:
+            self.assertEqual(id_card[-1], id_card_check_digit(id_card[:17]))
+            self.assertEqual(id_card[6:14], f'{birth_date:%Y%m%d}')
+            # 顺序码末位男单女双
+            self.assertEqual(int(id_card[16]) % 2, 1 - gender)
+
+    def test_seed_requires_empty_database(self):
+        with self.assertRaisesMessage(CommandError, '居民表中已有数据'):
+            call_command('seed', '--scale', '10', stdout=StringIO())
+
+    def test_run_benchmarks(self):
+        names = ['dashboard', 'merchant_list', 'search_name', 'import', 'export_merchants']
+        results = run_benchmarks(names, repeat=1)
+        self.assertEqual(list(results['scenarios']), names)
+        self.assertEqual(results['residents'], 300)
+        # 导入场景写入的居民已回滚
+        self.assertEqual(Resident.objects.count(), 300)
+        self.assertFalse(Role.objects.filter(name='benchmark-role').exists())
+        with self.assertRaises(ValueError):
+            run_benchmarks(['unknown'])
+
+    def test_compare(self):
+        baseline = {'scenarios': {'a': {'p50': 10.0}, 'b': {'p50': 0.2}, 'c': {'p50': 10.0}}}
+        results = {'scenarios': {'a': {'p50': 13.0}, 'b': {'p50': 0.5}, 'c': {'p50': 11.0}, 'd': {'p50': 1.0}}}
+        # b 的绝对差值低于 MIN_REGRESSION_MS，c 在容差内，d 没有基线
+        self.assertEqual(compare(results, baseline), [('a', 10.0, 13.0, 0.3)])
@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import index
+from .views import index, cache_stats, request_stats
 
 urlpatterns = [
     path('', index, name='index'),
+    path('cache/stats/', cache_stats, name='cache_stats'),
+    path('requests/stats/', request_stats, name='request_stats'),
 ]
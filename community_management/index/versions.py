@@ -0,0 +1,40 @@
+"""
+数据版本号
+
+地址树ETag、进程内的交叉统计立方体及角色权限等按版本号判断数据是否变化。版本号保存在 data_version 表中：
+数据变更时在同一事务中递增，事务提交后所有进程都能读到新版本，回滚时版本号一并回滚；
+默认的 locmem 缓存只在本进程可见，不能用来在进程之间传递版本号。
+"""
+from django.db.models import F
+from django.utils import timezone
+from .models import DataVersion
+
+# 地址层级树
+ADDRESS_TREE = 'address_tree'
+# 居民交叉统计立方体
+CROSSTAB = 'crosstab'
+# 角色权限
+PERMISSIONS = 'permissions'
+
+
+def get_version(name):
+    """
+    读取版本号
+
+    Returns:
+        (版本号, 最后更新时间)，尚未递增过时为 (0, None)
+    """
+    row = DataVersion.objects.filter(name=name).values_list('value', 'last_update_time').first()
+    return row or (0, None)
+
+
+def bump(name):
+    """
+    在当前事务中递增版本号
+
+    版本行在事务提交前保持写锁，同一事务内多次递增得到的是连续的版本号
+    """
+    changes = {'value': F('value') + 1, 'last_update_time': timezone.now()}
+    if not DataVersion.objects.filter(name=name).update(**changes):
+        DataVersion.objects.get_or_create(name=name)
+        DataVersion.objects.filter(name=name).update(**changes)
@@ -1,91 +1,27 @@
+from django.conf import settings
+from django.http import JsonResponse
 from django.shortcuts import render
-from datetime import datetime, timedelta
-from django.db.models import Count
-from residents.models import Resident, Deceased, Disabled, LowIncome, FiveGuarantees, SpecialNeeds
-from merchants.models import Merchant
+from community_management import cache, instrumentation
+from login.views import check_permission
+from merchants.analytics import merchant_totals
+from .services import get_period_start, get_snapshot_statistics
 
-def get_statistics_data(period='year'):
-    """根据时间周期从数据库获取统计数据"""
-    # 计算时间范围
-    now = datetime.now()
-    if period == 'year':
-        start_date = now - timedelta(days=365)
-    else:  # month
-        start_date = now - timedelta(days=30)
-    
-    # 获取总人口（不包括死亡人口）
-    total_population = Resident.objects.filter(is_deceased=0).count()
-    
-    # 获取商户总数
-    total_merchants = Merchant.objects.count()
-    
-    # 获取新增人口（按登记日期）
-    new_population = Resident.objects.filter(
-        registration_date__gte=start_date,
-        is_deceased=0
-    ).count()
-    
-    # 获取新增商户（按登记日期）
-    new_merchants = Merchant.objects.filter(
-        registration_date__gte=start_date
-    ).count()
-    
-    # 获取死亡人口总数
-    total_deceased = Resident.objects.filter(is_deceased=1).count()
-    
-    # 获取新增死亡人口
-    new_deceased = Deceased.objects.filter(
-        registration_date__gte=start_date
-    ).count()
-    
-    # 获取残疾人总数
-    total_disabled = Resident.objects.filter(is_disabled=1).count()
-    
-    # 获取新增残疾人
-    new_disabled = Disabled.objects.filter(
-        registration_date__gte=start_date
-    ).count()
-    
-    # 获取特扶人口总数
-    total_special_needs = Resident.objects.filter(is_special_support=1).count()
-    
-    # 获取新增特扶人口
-    new_special_needs = SpecialNeeds.objects.filter(
-        registration_date__gte=start_date
-    ).count()
-    
-    # 获取低保户总数
-    total_low_income = Resident.objects.filter(is_low_income=1).count()
-    
-    # 获取新增低保户
-    new_low_income = LowIncome.objects.filter(
-        registration_date__gte=start_date
-    ).count()
-    
-    # 获取五保户总数
-    total_five_guarantees = Resident.objects.filter(is_beneficiary=1).count()
-    
-    # 获取新增五保户
-    new_five_guarantees = FiveGuarantees.objects.filter(
-        registration_date__gte=start_date
-    ).count()
-    
-    return {
-        'total_population': total_population,
-        'total_merchants': total_merchants,
-        'new_population': new_population,
-        'new_merchants': new_merchants,
-        'total_deceased': total_deceased,
-        'new_deceased': new_deceased,
-        'total_disabled': total_disabled,
-        'new_disabled': new_disabled,
-        'total_special_needs': total_special_needs,
-        'new_special_needs': new_special_needs,
-        'total_low_income': total_low_income,
-        'new_low_income': new_low_income,
-        'total_five_guarantees': total_five_guarantees,
-        'new_five_guarantees': new_five_guarantees
-    }
+def get_statistics_data(period='year', merchant_source=None):
+    """
+    根据时间周期获取统计数据，结果按周期缓存
+
+    merchant_source 为 rollup 时商户总数及新增数取自商户月度汇总表，
+    默认使用 settings.DASHBOARD_MERCHANT_SOURCE
+    """
+    merchant_source = merchant_source or settings.DASHBOARD_MERCHANT_SOURCE
+
+    def compute():
+        stats = get_snapshot_statistics(period)
+        if merchant_source == 'rollup':
+            stats.update(merchant_totals(get_period_start(period)))
+        return stats
+
+    return cache.get_or_set(cache.STATISTICS, f'{period}:{merchant_source}', compute)
 
 def index(request):
     """首页视图，提供统计数据"""
@@ -110,3 +46,23 @@ def index(request):
     }
     
     return render(request, 'index.html', context)
+
+
+@check_permission('system.monitor')
+def cache_stats(request):
+    """缓存命中情况"""
+    return JsonResponse({'success': True, 'data': cache.get_stats()})
+
+
+@check_permission('system.monitor')
+def request_stats(request):
+    """本进程抽样请求的各视图耗时及 SQL 执行情况"""
+    samples = instrumentation.get_samples()
+    return JsonResponse({
+        'success': True,
+        'data': {
+            'sample_rate': settings.INSTRUMENTATION_SAMPLE_RATE,
+            'samples': len(samples),
+            'views': instrumentation.summarize(samples),
+        },
+    })
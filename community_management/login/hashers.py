@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    迭代次数可通过 settings.PASSWORD_HASH_ITERATIONS 调整的 PBKDF2 哈希
+
+    算法名与 Django 默认的 pbkdf2_sha256 相同，已有哈希可直接验证；
+    调整迭代次数后，旧哈希会在下次登录成功时按新的迭代次数重新生成。
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_ITERATIONS', None) or PBKDF2PasswordHasher.iterations
@@ -0,0 +1,47 @@
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from admins.models import Admin, Role
+
+
+class Command(BaseCommand):
+    help = '测试登录接口耗时，输出P50/P95/P99（毫秒）；测试账号在事务中创建，结束后回滚'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100, help='登录请求次数')
+        parser.add_argument('--hash-iterations', type=int, help='PBKDF2迭代次数，默认使用当前配置')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('requests 必须大于0')
+
+        overrides = {'ALLOWED_HOSTS': ['*']}
+        if options['hash_iterations']:
+            overrides['PASSWORD_HASH_ITERATIONS'] = options['hash_iterations']
+
+        with override_settings(**overrides), transaction.atomic():
+            role = Role.objects.create(name='benchmark-role')
+            admin = Admin(username='benchmark-admin', real_name='压测', phone_number='', role=role)
+            admin.set_password('benchmark-password')
+            admin.save()
+
+            client = Client()
+            body = json.dumps({'username': 'benchmark-admin', 'password': 'benchmark-password'})
+            timings = []
+            for _ in range(options['requests']):
+                started = time.perf_counter()
+                response = client.post('/login/', body, content_type='application/json')
+                timings.append((time.perf_counter() - started) * 1000)
+                if not response.json().get('success'):
+                    raise CommandError(f'登录失败: {response.content.decode()}')
+            transaction.set_rollback(True)
+
+        timings.sort()
+        percentile = lambda p: timings[min(len(timings) - 1, int(len(timings) * p))]
+        self.stdout.write(
+            f'迭代次数 {options["hash_iterations"] or "默认"}，请求 {len(timings)} 次：'
+            f'P50 {percentile(0.5):.2f}  P95 {percentile(0.95):.2f}  P99 {percentile(0.99):.2f}  最大 {timings[-1]:.2f}'
+        )
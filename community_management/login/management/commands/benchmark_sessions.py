@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from login.sessions import measure_session_engine, summarize
+
+
+class Command(BaseCommand):
+    help = '测试各会话存储方式的写入（登录）和读取（普通请求）耗时，输出平均值及P50/P95/P99（毫秒）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=200, help='每种存储方式的读写次数')
+        parser.add_argument(
+            '--backend', action='append', choices=sorted(settings.SESSION_ENGINES),
+            help='要测试的存储方式，可重复指定，默认全部',
+        )
+
+    def handle(self, *args, **options):
+        if options['rounds'] < 1:
+            raise CommandError('rounds 必须大于0')
+        for backend in options['backend'] or settings.SESSION_ENGINES:
+            timings = measure_session_engine(backend, options['rounds'])
+            for operation in ('write', 'read'):
+                stats = summarize(timings[operation])
+                self.stdout.write(
+                    f'{backend:<15}{operation:<6}平均 {stats["mean"]:.3f}  P50 {stats["p50"]:.3f}  '
+                    f'P95 {stats["p95"]:.3f}  P99 {stats["p99"]:.3f}'
+                )
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from login.sessions import DEFAULT_BATCH_SIZE, clear_expired_sessions
+
+# 会话存放在数据库中的存储方式，其余方式由缓存过期或 Cookie 有效期自行清理
+DATABASE_BACKENDS = ('db', 'cached_db')
+
+
+class Command(BaseCommand):
+    help = '分批删除数据库中的过期会话（替代一次性删除全部过期会话的 clearsessions）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='每批删除的会话数')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('batch-size 必须大于0')
+        if settings.SESSION_BACKEND not in DATABASE_BACKENDS:
+            self.stdout.write(f'当前会话存储为 {settings.SESSION_BACKEND}，无需清理数据库')
+            return
+        count = clear_expired_sessions(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'已删除 {count} 个过期会话'))
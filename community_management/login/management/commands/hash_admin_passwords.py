@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from login.services import hash_plaintext_passwords
+
+
+class Command(BaseCommand):
+    help = '把管理员表中仍为明文的密码改写为哈希（未执行时明文密码会在首次登录成功时改写）'
+
+    def handle(self, *args, **options):
+        count = hash_plaintext_passwords()
+        self.stdout.write(self.style.SUCCESS(f'已改写 {count} 个管理员的密码'))
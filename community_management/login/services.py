@@ -0,0 +1,81 @@
+"""
+管理员身份验证
+
+密码使用 django.contrib.auth.hashers 哈希存储。历史数据中的明文密码在首次登录成功时改写为哈希，
+哈希算法或迭代次数调整后也在登录时升级。最后登录时间与改写的哈希通过一条 UPDATE 写回。
+"""
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from admins.models import Admin
+
+
+def is_hashed(value):
+    """判断存储的密码是否为可识别的哈希"""
+    try:
+        identify_hasher(value)
+    except ValueError:
+        return False
+    return True
+
+
+def verify_password(admin, password):
+    """
+    验证密码
+
+    Returns:
+        (是否正确, 需要写回的新哈希)，无需改写时新哈希为 None
+    """
+    if is_hashed(admin.password_hash):
+        upgraded = []
+        valid = check_password(password, admin.password_hash, setter=lambda raw: upgraded.append(make_password(raw)))
+        return valid, upgraded[0] if upgraded else None
+    # 明文存储的旧密码
+    if constant_time_compare(admin.password_hash, password):
+        return True, make_password(password)
+    return False, None
+
+
+def authenticate(username, password):
+    """
+    验证管理员身份，成功时更新最后登录时间
+
+    管理员与角色通过 select_related 一次取回。
+
+    Returns:
+        管理员对象
+
+    Raises:
+        ValueError: 用户不存在、账号禁用或密码错误时抛出
+    """
+    admin = Admin.objects.select_related('role').filter(username=username).first()
+    if admin is None:
+        raise ValueError('用户名不存在')
+    if not admin.status:
+        raise ValueError('账号已被禁用，请联系管理员')
+
+    valid, new_hash = verify_password(admin, password)
+    if not valid:
+        raise ValueError('密码错误')
+
+    updates = {'last_login_time': timezone.now()}
+    if new_hash:
+        updates['password_hash'] = new_hash
+    Admin.objects.filter(pk=admin.pk).update(**updates)
+    for field, value in updates.items():
+        setattr(admin, field, value)
+    return admin
+
+
+def hash_plaintext_passwords(batch_size=500):
+    """
+    把仍为明文的密码全部改写为哈希
+
+    Returns:
+        改写的管理员数
+    """
+    admins = [admin for admin in Admin.objects.only('id', 'password_hash') if not is_hashed(admin.password_hash)]
+    for admin in admins:
+        admin.password_hash = make_password(admin.password_hash)
+    Admin.objects.bulk_update(admins, ['password_hash'], batch_size=batch_size)
+    return len(admins)
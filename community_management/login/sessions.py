@@ -0,0 +1,88 @@
+"""
+会话存储维护
+
+批量清理过期会话，以及测量各会话存储方式的读写耗时。
+"""
+import statistics
+import time
+from importlib import import_module
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.utils import timezone
+
+DEFAULT_BATCH_SIZE = 1000
+
+# 与登录时写入的会话内容一致
+SAMPLE_SESSION = {
+    'admin_id': 1,
+    'username': 'admin',
+    'real_name': '管理员',
+    'role_id': 1,
+    'role_name': '超级管理员',
+}
+
+
+def clear_expired_sessions(batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """
+    按批删除数据库中的过期会话
+
+    Django 自带的 clearsessions 用一条 DELETE 删除全部过期会话，数据量大时会长时间锁表；
+    这里每批只删除 batch_size 行并单独提交，期间其他请求仍可读写会话。
+
+    Returns:
+        删除的会话数
+    """
+    now = now or timezone.now()
+    total = 0
+    while True:
+        keys = list(
+            Session.objects.filter(expire_date__lt=now).values_list('session_key', flat=True)[:batch_size]
+        )
+        if not keys:
+            return total
+        with transaction.atomic():
+            total += Session.objects.filter(session_key__in=keys).delete()[0]
+
+
+def measure_session_engine(engine, rounds=200):
+    """
+    测量会话存储的写入和读取耗时
+
+    写入为创建会话并保存，读取为按会话键加载，对应一次登录和一次普通请求。
+    数据库类存储在测量结束后删除创建的会话。
+
+    Returns:
+        {'write': 耗时列表, 'read': 耗时列表}，单位毫秒
+    """
+    SessionStore = import_module(settings.SESSION_ENGINES.get(engine, engine)).SessionStore
+    timings = {'write': [], 'read': []}
+    keys = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        store = SessionStore()
+        store.update(SAMPLE_SESSION)
+        store.save()
+        timings['write'].append((time.perf_counter() - started) * 1000)
+        keys.append(store.session_key)
+
+        started = time.perf_counter()
+        loaded = SessionStore(session_key=store.session_key)
+        loaded['admin_id']
+        timings['read'].append((time.perf_counter() - started) * 1000)
+
+    for key in keys:
+        SessionStore(session_key=key).delete()
+    return timings
+
+
+def summarize(timings):
+    """耗时列表的平均值、P50、P95、P99"""
+    timings = sorted(timings)
+    percentile = lambda p: timings[min(len(timings) - 1, int(len(timings) * p))]
+    return {
+        'mean': statistics.mean(timings),
+        'p50': percentile(0.5),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+    }
@@ -1,3 +1,96 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from admins.models import Admin, Role
+from .services import authenticate, is_hashed
+from .sessions import clear_expired_sessions, measure_session_engine
 
-# Create your tests here.
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class LoginTests(TestCase):
+    """管理员登录测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.role = Role.objects.create(name='管理员')
+        # 历史数据中的明文密码
+        cls.admin = Admin.objects.create(
+            username='admin', password_hash='secret', real_name='张三', phone_number='13800000000', role=cls.role,
+        )
+
+    def login(self, password):
+        body = json.dumps({'username': 'admin', 'password': password})
+        return self.client.post('/login/', body, content_type='application/json').json()
+
+    def test_plaintext_password_rehashed_on_first_login(self):
+        data = self.login('secret')
+        self.assertEqual(data, {'success': True, 'message': '登录成功', 'role': '管理员'})
+        self.admin.refresh_from_db()
+        self.assertTrue(is_hashed(self.admin.password_hash))
+        self.assertIsNotNone(self.admin.last_login_time)
+        self.assertEqual(self.client.session['role_id'], self.role.id)
+        # 改写为哈希后仍可登录
+        self.assertTrue(self.login('secret')['success'])
+
+    def test_authenticate_queries(self):
+        authenticate('admin', 'secret')
+        # 管理员和角色一条查询，最后登录时间一条UPDATE，且无需再改写哈希
+        with self.assertNumQueries(2):
+            admin = authenticate('admin', 'secret')
+            admin.role.name
+
+    def test_work_factor_change_upgrades_hash(self):
+        authenticate('admin', 'secret')
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            authenticate('admin', 'secret')
+        self.admin.refresh_from_db()
+        self.assertTrue(self.admin.password_hash.startswith('pbkdf2_sha256$2000$'))
+
+    def test_rejections(self):
+        self.assertEqual(self.login('wrong'), {'success': False, 'error': '密码错误'})
+        self.admin.refresh_from_db()
+        self.assertEqual(self.admin.password_hash, 'secret')
+        self.assertIsNone(self.admin.last_login_time)
+
+        Admin.objects.filter(pk=self.admin.pk).update(status=False)
+        self.assertEqual(self.login('secret')['error'], '账号已被禁用，请联系管理员')
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class SessionMaintenanceTests(TestCase):
+    """会话清理及存储方式测试"""
+
+    def test_clear_expired_sessions_in_batches(self):
+        now = timezone.now()
+        for i in range(5):
+            store = SessionStore()
+            store['admin_id'] = i
+            store.create()
+        Session.objects.filter(session_key__in=list(Session.objects.values_list('pk', flat=True)[:3])).update(
+            expire_date=now - timedelta(days=1)
+        )
+        # 3个过期会话分两批删除
+        self.assertEqual(clear_expired_sessions(batch_size=2, now=now), 3)
+        self.assertEqual(Session.objects.count(), 2)
+        self.assertEqual(clear_expired_sessions(batch_size=2, now=now), 0)
+
+    def test_measure_session_engine_cleans_up(self):
+        for backend in ('db', 'signed_cookies'):
+            timings = measure_session_engine(backend, rounds=3)
+            self.assertEqual(len(timings['write']), 3)
+            self.assertEqual(len(timings['read']), 3)
+        self.assertFalse(Session.objects.exists())
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_login_with_signed_cookies(self):
+        role = Role.objects.create(name='管理员')
+        admin = Admin(username='admin', real_name='张三', phone_number='', role=role)
+        admin.set_password('secret')
+        admin.save()
+        body = json.dumps({'username': 'admin', 'password': 'secret'})
+        self.assertTrue(self.client.post('/login/', body, content_type='application/json').json()['success'])
+        self.assertFalse(Session.objects.exists())
+        self.assertEqual(self.client.session['admin_id'], admin.id)
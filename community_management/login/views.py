@@ -1,9 +1,8 @@
 from django.shortcuts import render, redirect
 from django.http import JsonResponse
 from django.contrib import messages
-from django.contrib.auth.hashers import check_password
-from datetime import datetime
-from admins.models import Admin, Role
+from admins.permissions import has_permissions
+from .services import authenticate
 import json
 
 def index(request):
@@ -41,50 +40,28 @@ def login(request):
             return render(request, 'login.html')
         
         try:
-            # 查询管理员
-            admin = Admin.objects.get(username=username)
-            
-            # 检查管理员状态
-            if not admin.status:
-                if request.content_type == 'application/json':
-                    return JsonResponse({'success': False, 'error': '账号已被禁用，请联系管理员'})
-                messages.error(request, '账号已被禁用，请联系管理员')
-                return render(request, 'login.html')
-            
-            # 验证密码（这里假设密码是明文存储的，实际项目中应该使用哈希验证）
-            # 如果是哈希密码，应该使用 check_password(password, admin.password_hash)
-            if admin.password_hash == password:
-                # 更新最后登录时间
-                admin.last_login_time = datetime.now()
-                admin.save()
-                
-                # 存储用户信息到会话
-                request.session['admin_id'] = admin.id
-                request.session['username'] = admin.username
-                request.session['real_name'] = admin.real_name
-                request.session['role_id'] = admin.role.id
-                request.session['role_name'] = admin.role.name
-                
-                # 登录成功
-                if request.content_type == 'application/json':
-                    return JsonResponse({'success': True, 'message': '登录成功', 'role': admin.role.name})
-                
-                messages.success(request, '登录成功！')
-                return redirect('../index/')
-            else:
-                # 密码错误
-                if request.content_type == 'application/json':
-                    return JsonResponse({'success': False, 'error': '密码错误'})
-                messages.error(request, '密码错误')
-                return render(request, 'login.html')
-                
-        except Admin.DoesNotExist:
-            # 用户不存在
+            # 验证用户名、账号状态及密码，同时更新最后登录时间
+            admin = authenticate(username, password)
+        except ValueError as e:
             if request.content_type == 'application/json':
-                return JsonResponse({'success': False, 'error': '用户名不存在'})
-            messages.error(request, '用户名不存在')
+                return JsonResponse({'success': False, 'error': str(e)})
+            messages.error(request, str(e))
             return render(request, 'login.html')
 
+        # 存储用户信息到会话
+        request.session['admin_id'] = admin.id
+        request.session['username'] = admin.username
+        request.session['real_name'] = admin.real_name
+        request.session['role_id'] = admin.role_id
+        request.session['role_name'] = admin.role.name
+
+        # 登录成功
+        if request.content_type == 'application/json':
+            return JsonResponse({'success': True, 'message': '登录成功', 'role': admin.role.name})
+
+        messages.success(request, '登录成功！')
+        return redirect('../index/')
+
 def logout(request):
     """
     退出登录视图
@@ -101,8 +78,13 @@ def check_permission(required_permissions=None):
     用于检查用户是否登录以及是否具有所需权限
     
     Args:
-        required_permissions: 需要的权限列表
+        required_permissions: 需要的权限代码，单个字符串或列表，需全部具备；
+            角色权限从进程内缓存读取，检查不访问数据库
     """
+    if isinstance(required_permissions, str):
+        required_permissions = [required_permissions]
+    required_permissions = frozenset(required_permissions or ())
+
     def decorator(view_func):
         def wrapped_view(request, *args, **kwargs):
             # 检查用户是否登录
@@ -110,16 +92,11 @@ def check_permission(required_permissions=None):
                 messages.error(request, '请先登录')
                 return redirect('login')
             
-            # 检查是否需要特定权限
-            if required_permissions:
-                # 这里可以根据角色名称或更复杂的权限系统进行检查
-                # 简化版本：根据角色名称判断
-                user_role = request.session.get('role_name')
-                if user_role not in required_permissions:
-                    messages.error(request, '您没有权限执行此操作')
-                    return redirect('welcome')
+            # 检查角色是否具有所需权限
+            if required_permissions and not has_permissions(request.session.get('role_id'), required_permissions):
+                messages.error(request, '您没有权限执行此操作')
+                return redirect('welcome')
             
             return view_func(request, *args, **kwargs)
         return wrapped_view
     return decorator
-
@@ -0,0 +1,155 @@
+"""
+商户统计分析
+
+时间序列、排行及首页商户数均从商户月度汇总表聚合得到，
+查询量与汇总单元格数相当，与商户总数无关。
+"""
+from datetime import date
+from django.db.models import Q, Sum
+from .models import MerchantMonthlyStat
+from .rollup import month_of
+
+# 排行维度 -> 名称字段
+RANK_DIMENSIONS = {
+    'street': 'street__street_name',
+    'industry': 'industry__industry_name',
+}
+
+# 排行指标：new 为区间内新登记数，total 为区间结束时的商户总数
+RANK_METRICS = ('new', 'total')
+
+DEFAULT_TOP_N = 10
+MAX_TOP_N = 100
+
+
+def _parse_month(name, value):
+    try:
+        year, month = value.split('-')
+        return date(int(year), int(month), 1)
+    except ValueError:
+        raise ValueError(f'参数 {name} 的值无效: {value}，应为 YYYY-MM')
+
+
+def _next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def parse_analytics_params(params):
+    """
+    解析公共筛选参数：street、industry 为id，from、to 为月份（YYYY-MM，含两端）
+
+    Raises:
+        ValueError: 参数值无效时抛出
+    """
+    filters = {}
+    for field in ('street', 'industry'):
+        value = params.get(field)
+        if value not in (None, ''):
+            try:
+                filters[field] = int(value)
+            except ValueError:
+                raise ValueError(f'参数 {field} 的值无效: {value}')
+    for param in ('from', 'to'):
+        value = params.get(param)
+        filters[param] = _parse_month(param, value) if value else None
+    if filters['from'] and filters['to'] and filters['from'] > filters['to']:
+        raise ValueError('参数 from 不能晚于 to')
+    return filters
+
+
+def parse_limit(value):
+    if value in (None, ''):
+        return DEFAULT_TOP_N
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise ValueError(f'参数 limit 的值无效: {value}')
+    return min(limit, MAX_TOP_N)
+
+
+def _cells(street=None, industry=None):
+    cells = MerchantMonthlyStat.objects.order_by()
+    if street is not None:
+        cells = cells.filter(street_id=street)
+    if industry is not None:
+        cells = cells.filter(industry_id=industry)
+    return cells
+
+
+def time_series(street=None, industry=None, start=None, end=None):
+    """
+    按月的新登记商户数及月末商户总数
+
+    起始月份之前的累计数与区间内各月的新登记数各一条聚合查询，
+    区间内没有登记记录的月份补零，保证序列连续。
+
+    Returns:
+        [{'month': 'YYYY-MM', 'new': 新登记数, 'total': 月末总数}]
+    """
+    cells = _cells(street, industry)
+    base = 0
+    window = cells
+    if start:
+        base = cells.filter(month__lt=start).aggregate(n=Sum('registered'))['n'] or 0
+        window = window.filter(month__gte=start)
+    if end:
+        window = window.filter(month__lte=end)
+    counts = dict(window.values('month').annotate(n=Sum('registered')).values_list('month', 'n'))
+    if not counts and not (start and end):
+        return []
+
+    month = start or min(counts)
+    last = end or max(counts)
+    total = base
+    series = []
+    while month <= last:
+        new = counts.get(month, 0)
+        total += new
+        series.append({'month': f'{month:%Y-%m}', 'new': new, 'total': total})
+        month = _next_month(month)
+    return series
+
+
+def top_n(by='street', metric='new', street=None, industry=None, start=None, end=None, limit=DEFAULT_TOP_N):
+    """
+    按街道或行业排行
+
+    Args:
+        by: 排行维度，取值见 RANK_DIMENSIONS
+        metric: new 按区间内新登记数排行，total 按区间结束时的商户总数排行（忽略 start）
+
+    Returns:
+        [{'id': 维度id, 'name': 名称, 'count': 数量}]，按数量倒序
+    """
+    if by not in RANK_DIMENSIONS:
+        raise ValueError(f'不支持的排行维度: {by}')
+    if metric not in RANK_METRICS:
+        raise ValueError(f'不支持的排行指标: {metric}')
+    cells = _cells(street, industry)
+    if metric == 'new' and start:
+        cells = cells.filter(month__gte=start)
+    if end:
+        cells = cells.filter(month__lte=end)
+    rows = (
+        cells.values(f'{by}_id', RANK_DIMENSIONS[by])
+        .annotate(n=Sum('registered'))
+        .filter(n__gt=0)
+        .order_by('-n', f'{by}_id')
+        .values_list(f'{by}_id', RANK_DIMENSIONS[by], 'n')[:limit]
+    )
+    return [{'id': pk, 'name': name, 'count': n} for pk, name, n in rows]
+
+
+def merchant_totals(start):
+    """
+    首页商户数：商户总数及 start 所在月份起的新登记数
+
+    汇总表以月为粒度，新登记数的统计起点向前取整到月初。
+    """
+    stats = MerchantMonthlyStat.objects.aggregate(
+        total_merchants=Sum('registered'),
+        new_merchants=Sum('registered', filter=Q(month__gte=month_of(start))),
+    )
+    return {key: n or 0 for key, n in stats.items()}
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class MerchantsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'merchants'
+
+    def ready(self):
+        from community_management import cache
+        # 商户数据变更时使首页统计及商户页面缓存失效
+        cache.invalidate_on_change(self, cache.STATISTICS, cache.MERCHANT_PAGES)
+        # 注册商户月度汇总增量更新信号
+        from . import signals  # noqa: F401
@@ -0,0 +1,8 @@
+from community_management.export import build_columns
+from .models import Merchant
+
+MERCHANT_COLUMNS = build_columns(Merchant, [
+    'id', 'merchants_name', 'credit_code', 'license_number', 'legal_person_name', 'legal_person_id',
+    'phone_number', 'address', ('industry__industry_name', '所属行业'), ('street__street_name', '所属街道'),
+    'establishment_date', 'registration_date', 'last_update_time',
+])
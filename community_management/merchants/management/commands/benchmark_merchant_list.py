@@ -0,0 +1,50 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from merchants.models import Merchant
+from merchants.services import list_merchants, merchant_queryset
+
+
+class Command(BaseCommand):
+    help = '对当前数据库中的商户数据测试列表接口查询耗时，并输出典型查询的执行计划'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', type=int, default=200, help='抽样的街道/行业组合数量')
+        parser.add_argument('--pages', type=int, default=3, help='每个组合连续翻页的页数')
+        parser.add_argument('--page-size', type=int, default=20, help='每页条数')
+        parser.add_argument('--seed', type=int, default=0, help='抽样随机种子')
+
+    def handle(self, *args, **options):
+        pairs = list(Merchant.objects.order_by().values_list('street_id', 'industry_id').distinct())
+        if not pairs:
+            raise CommandError('商户表为空，请先导入数据')
+
+        rng = random.Random(options['seed'])
+        samples = [rng.choice(pairs) for _ in range(options['samples'])]
+        cases = {
+            'street+industry': [{'street_id': street, 'industry_id': industry} for street, industry in samples],
+            'street': [{'street_id': street} for street, _ in samples],
+            'industry': [{'industry_id': industry} for _, industry in samples],
+        }
+
+        self.stdout.write(f'商户总数 {Merchant.objects.count()}，抽样 {len(samples)} 组，每组 {options["pages"]} 页')
+        for name, filter_list in cases.items():
+            timings = []
+            for filters in filter_list:
+                cursor = None
+                for _ in range(options['pages']):
+                    started = time.perf_counter()
+                    _, cursor = list_merchants(filters, cursor, options['page_size'])
+                    timings.append((time.perf_counter() - started) * 1000)
+                    if cursor is None:
+                        break
+            timings.sort()
+            self.stdout.write(
+                f'{name:16} 平均 {statistics.mean(timings):.2f}  P50 {timings[len(timings) // 2]:.2f}  '
+                f'P95 {timings[int(len(timings) * 0.95)]:.2f}  最大 {timings[-1]:.2f}'
+            )
+
+        street, industry = samples[0]
+        self.stdout.write('执行计划（街道+行业，按成立日期倒序）：')
+        self.stdout.write(merchant_queryset({'street_id': street, 'industry_id': industry})[:options['page_size']].explain())
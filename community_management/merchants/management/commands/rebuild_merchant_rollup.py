@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from merchants.rollup import rebuild_rollup
+
+
+class Command(BaseCommand):
+    help = '从商户表全量重建商户月度汇总表（街道 × 行业 × 登记月份）'
+
+    def handle(self, *args, **options):
+        cells = rebuild_rollup()
+        self.stdout.write(self.style.SUCCESS(f'商户月度汇总表重建完成，共 {cells} 个单元格'))
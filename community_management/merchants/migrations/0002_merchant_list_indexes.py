@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('address', '0002_full_address'),
+        ('merchants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='merchant',
+            name='idx_streets_id',
+        ),
+        migrations.RemoveIndex(
+            model_name='merchant',
+            name='idx_industry_id',
+        ),
+        migrations.AddIndex(
+            model_name='merchant',
+            index=models.Index(fields=['street', 'industry', 'establishment_date'], name='idx_street_industry_date'),
+        ),
+        migrations.AddIndex(
+            model_name='merchant',
+            index=models.Index(fields=['street', 'establishment_date'], name='idx_street_date'),
+        ),
+        migrations.AddIndex(
+            model_name='merchant',
+            index=models.Index(fields=['industry', 'establishment_date'], name='idx_industry_date'),
+        ),
+        migrations.AddIndex(
+            model_name='merchant',
+            index=models.Index(fields=['establishment_date'], name='idx_establishment_date'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DateField
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+def fill_rollup(apps, schema_editor):
+    """按 (街道, 行业, 登记月份) 分组计数填充汇总表，分组逻辑按迁移时复制"""
+    Merchant = apps.get_model('merchants', 'Merchant')
+    MerchantMonthlyStat = apps.get_model('merchants', 'MerchantMonthlyStat')
+    cells = (
+        Merchant.objects.order_by()
+        .annotate(month=TruncMonth(
+            'registration_date', output_field=DateField(), tzinfo=timezone.get_current_timezone()
+        ))
+        .values('street_id', 'industry_id', 'month')
+        .annotate(n=Count('pk'))
+        .values_list('street_id', 'industry_id', 'month', 'n')
+    )
+    MerchantMonthlyStat.objects.bulk_create([
+        MerchantMonthlyStat(street_id=street_id, industry_id=industry_id, month=month, registered=n)
+        for street_id, industry_id, month, n in cells
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('address', '0002_full_address'),
+        ('merchants', '0002_merchant_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MerchantMonthlyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='登记月份')),
+                ('registered', models.IntegerField(default=0, verbose_name='新登记商户数')),
+                ('last_update_time', models.DateTimeField(auto_now=True, verbose_name='最后更新时间')),
+                ('industry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='merchants.industry', verbose_name='所属行业')),
+                ('street', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='address.street', verbose_name='所属街道')),
+            ],
+            options={
+                'verbose_name': '商户月度汇总',
+                'verbose_name_plural': '商户月度汇总',
+                'db_table': 'merchant_monthly_stat',
+                'indexes': [models.Index(fields=['month'], name='idx_merchant_stat_month')],
+                'constraints': [models.UniqueConstraint(fields=('street', 'industry', 'month'), name='uniq_merchant_stat_cell')],
+            },
+        ),
+        migrations.RunPython(fill_rollup, migrations.RunPython.noop),
+    ]
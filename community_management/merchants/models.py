@@ -47,10 +47,41 @@ class Merchant(models.Model):
             models.Index(fields=['merchants_name'], name='idx_merchants_name'),
             models.Index(fields=['license_number'], name='idx_license_number'),
             models.Index(fields=['legal_person_name'], name='idx_legal_person'),
-            models.Index(fields=['street'], name='idx_streets_id'),
-            models.Index(fields=['industry'], name='idx_industry_id'),
+            # 列表接口按街道/行业筛选、按成立日期倒序，组合索引使查询成为索引范围扫描且无需额外排序；
+            # 它们同时覆盖了原 street、industry 单列索引的用途
+            models.Index(fields=['street', 'industry', 'establishment_date'], name='idx_street_industry_date'),
+            models.Index(fields=['street', 'establishment_date'], name='idx_street_date'),
+            models.Index(fields=['industry', 'establishment_date'], name='idx_industry_date'),
+            models.Index(fields=['establishment_date'], name='idx_establishment_date'),
         ]
     
     def __str__(self):
         """返回商户的字符串表示"""
-        return self.merchants_name
\ No newline at end of file
+        return self.merchants_name
+
+class MerchantMonthlyStat(models.Model):
+    """
+    商户月度汇总表
+    按 街道 × 行业 × 登记月份 汇总商户数，由信号增量维护，可通过 rebuild_merchant_rollup 命令全量重建
+    """
+    street = models.ForeignKey('address.Street', on_delete=models.CASCADE, verbose_name='所属街道')
+    industry = models.ForeignKey(Industry, on_delete=models.CASCADE, verbose_name='所属行业')
+    # 登记月份的第一天
+    month = models.DateField(verbose_name='登记月份')
+    # 当月登记且仍存在的商户数，累加截至某月的全部月份即为当时的商户总数
+    registered = models.IntegerField(default=0, verbose_name='新登记商户数')
+    last_update_time = models.DateTimeField(auto_now=True, verbose_name='最后更新时间')
+
+    class Meta:
+        db_table = 'merchant_monthly_stat'
+        verbose_name = '商户月度汇总'
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(fields=['street', 'industry', 'month'], name='uniq_merchant_stat_cell'),
+        ]
+        indexes = [
+            models.Index(fields=['month'], name='idx_merchant_stat_month'),
+        ]
+
+    def __str__(self):
+        return f'商户月度汇总 - {self.month:%Y-%m}'
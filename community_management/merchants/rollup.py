@@ -0,0 +1,78 @@
+"""
+商户月度汇总表维护
+
+每个单元格为 (街道, 行业, 登记月份) 的商户数。商户新增、删除或调整街道/行业时由信号增量更新，
+bulk_create 等不触发信号的批量写入需调用 apply_deltas 或执行 rebuild_merchant_rollup 命令重建。
+"""
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, DateField, F
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from community_management import cache
+from .models import Merchant, MerchantMonthlyStat
+
+# 计算商户所属单元格需要的字段
+ROLLUP_FIELDS = ('street_id', 'industry_id', 'registration_date')
+
+
+def month_of(value):
+    """登记时间所属月份的第一天（本地时区）"""
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date().replace(day=1)
+
+
+def merchant_deltas(values, sign=1):
+    """
+    一条商户记录对汇总表的贡献
+
+    Args:
+        values: 包含 ROLLUP_FIELDS 的字典
+        sign: 1 表示计入，-1 表示扣除
+    """
+    return Counter({
+        (values['street_id'], values['industry_id'], month_of(values['registration_date'])): sign,
+    })
+
+
+def apply_deltas(deltas):
+    """
+    把增量累加到对应单元格，缺失的单元格会先创建
+
+    先直接 UPDATE，单元格不存在时再创建后累加，全部单元格在同一事务中提交
+    """
+    with transaction.atomic():
+        for (street_id, industry_id, month), n in deltas.items():
+            if not n:
+                continue
+            cell = {'street_id': street_id, 'industry_id': industry_id, 'month': month}
+            if not MerchantMonthlyStat.objects.filter(**cell).update(registered=F('registered') + n):
+                MerchantMonthlyStat.objects.get_or_create(**cell)
+                MerchantMonthlyStat.objects.filter(**cell).update(registered=F('registered') + n)
+
+
+def monthly_counts(queryset):
+    """按 (街道, 行业, 登记月份) 分组计数，返回 (street_id, industry_id, month, 数量)"""
+    return (
+        queryset.order_by()
+        .annotate(month=TruncMonth(
+            'registration_date', output_field=DateField(), tzinfo=timezone.get_current_timezone()
+        ))
+        .values('street_id', 'industry_id', 'month')
+        .annotate(n=Count('pk'))
+        .values_list('street_id', 'industry_id', 'month', 'n')
+    )
+
+
+def rebuild_rollup():
+    """从商户表全量重建汇总表，返回单元格数"""
+    cells = [
+        MerchantMonthlyStat(street_id=street_id, industry_id=industry_id, month=month, registered=n)
+        for street_id, industry_id, month, n in monthly_counts(Merchant.objects.all())
+    ]
+    with transaction.atomic():
+        MerchantMonthlyStat.objects.all().delete()
+        MerchantMonthlyStat.objects.bulk_create(cells, batch_size=500)
+    cache.invalidate_on_commit(cache.STATISTICS)
+    return len(cells)
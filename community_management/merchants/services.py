@@ -0,0 +1,111 @@
+from datetime import date
+from django.db.models import Q
+from community_management.pagination import DEFAULT_PAGE_SIZE
+from .models import Merchant
+
+# 列表接口返回的字段
+MERCHANT_LIST_FIELDS = (
+    'id', 'merchants_name', 'credit_code', 'license_number', 'legal_person_name', 'phone_number', 'address',
+    'industry__industry_name', 'street__street_name', 'establishment_date',
+)
+
+def _parse_date(name, value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'参数 {name} 的值无效: {value}')
+
+
+def parse_merchant_filters(params):
+    """
+    从请求参数中解析筛选条件：street、industry 为id，established_from、established_to 为成立日期范围（含两端）
+
+    Raises:
+        ValueError: 参数值无法转换时抛出
+    """
+    filters = {}
+    for field in ('street', 'industry'):
+        value = params.get(field)
+        if value in (None, ''):
+            continue
+        try:
+            filters[f'{field}_id'] = int(value)
+        except ValueError:
+            raise ValueError(f'参数 {field} 的值无效: {value}')
+    for param, lookup in (('established_from', 'gte'), ('established_to', 'lte')):
+        value = params.get(param)
+        if value not in (None, ''):
+            filters[f'establishment_date__{lookup}'] = _parse_date(param, value)
+    return filters
+
+
+def encode_cursor(merchant):
+    return f'{merchant.establishment_date.isoformat()}_{merchant.id}'
+
+
+def decode_cursor(cursor):
+    """游标格式为 成立日期_id"""
+    established, _, pk = (cursor or '').partition('_')
+    try:
+        return date.fromisoformat(established), int(pk)
+    except ValueError:
+        raise ValueError(f'参数 cursor 的值无效: {cursor}')
+
+
+def merchant_queryset(filters=None, cursor=None):
+    """
+    商户列表查询，按成立日期倒序
+
+    排序键为 (成立日期, id)，筛选条件为街道/行业等值加成立日期范围，
+    与 (street, industry, establishment_date) 等组合索引的列顺序一致，
+    数据库沿索引倒序扫描即可得到结果，无需排序。
+
+    Args:
+        filters: parse_merchant_filters 返回的筛选条件
+        cursor: 上一页最后一条记录的游标，为空表示第一页
+    """
+    queryset = (
+        Merchant.objects.select_related('industry', 'street')
+        .only(*MERCHANT_LIST_FIELDS)
+        .filter(**(filters or {}))
+    )
+    if cursor is not None:
+        established, pk = decode_cursor(cursor)
+        # 单独的 <= 条件让数据库从游标位置开始范围扫描，OR 条件只用于排除同一天中已返回的记录
+        queryset = queryset.filter(
+            Q(establishment_date__lt=established) | Q(establishment_date=established, id__lt=pk),
+            establishment_date__lte=established,
+        )
+    return queryset.order_by('-establishment_date', '-id')
+
+
+def list_merchants(filters=None, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    键集分页获取商户列表
+
+    Returns:
+        (商户列表, 下一页游标)，没有下一页时游标为 None
+    """
+    merchants = list(merchant_queryset(filters, cursor)[:page_size + 1])
+
+    next_cursor = None
+    if len(merchants) > page_size:
+        merchants = merchants[:page_size]
+        next_cursor = encode_cursor(merchants[-1])
+    return merchants, next_cursor
+
+
+def serialize_merchant(merchant):
+    """商户列表项的JSON表示"""
+    return {
+        'id': merchant.id,
+        'merchants_name': merchant.merchants_name,
+        'credit_code': merchant.credit_code,
+        'license_number': merchant.license_number,
+        'legal_person_name': merchant.legal_person_name,
+        'phone_number': merchant.phone_number,
+        'address': merchant.address,
+        'industry': merchant.industry.industry_name,
+        'street': merchant.street.street_name,
+        'establishment_date': merchant.establishment_date.isoformat(),
+    }
@@ -0,0 +1,34 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .models import Merchant
+from .rollup import ROLLUP_FIELDS, apply_deltas, merchant_deltas
+
+
+def _rollup_values(instance):
+    return {field: getattr(instance, field) for field in ROLLUP_FIELDS}
+
+
+@receiver(pre_save, sender=Merchant)
+def remember_previous_cell(sender, instance, raw=False, **kwargs):
+    """保存前读取商户原来所属的汇总单元格，新增商户时为 None"""
+    instance._previous_cell = None
+    if raw or instance._state.adding:
+        return
+    instance._previous_cell = sender.objects.filter(pk=instance.pk).values(*ROLLUP_FIELDS).first()
+
+
+@receiver(post_save, sender=Merchant)
+def update_rollup(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = merchant_deltas(_rollup_values(instance))
+    previous = getattr(instance, '_previous_cell', None)
+    if not created and previous:
+        # 街道、行业未变化时增减相互抵消，不会写入汇总表
+        deltas.update(merchant_deltas(previous, sign=-1))
+    apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Merchant)
+def remove_from_rollup(sender, instance, **kwargs):
+    apply_deltas(merchant_deltas(_rollup_values(instance), sign=-1))
@@ -1,3 +1,154 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from unittest import skipUnless
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+from address.models import Street
+from index.views import get_statistics_data
+from .models import Industry, Merchant, MerchantMonthlyStat
+from .rollup import apply_deltas, monthly_counts, rebuild_rollup
+from .services import list_merchants, merchant_queryset
 
-# Create your tests here.
+
+def create_merchant(street, industry, index, **fields):
+    """创建测试用商户"""
+    return Merchant.objects.create(
+        merchants_name=f'商户{index}', credit_code=f'91{index:016d}', license_number=f'L{index}',
+        legal_person_name='法人', legal_person_id='110101199001010000', address='北京',
+        street=street, industry=industry, establishment_date=fields.pop('establishment_date', date(2020, 1, 1)),
+        **fields
+    )
+
+
+class MerchantListApiTests(TestCase):
+    """商户列表接口测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.streets = [Street.objects.create(street_name=f'街道{i}') for i in range(2)]
+        cls.industries = [Industry.objects.create(industry_name=f'行业{i}', industry_code=f'C{i}') for i in range(2)]
+        cls.merchants = [
+            create_merchant(
+                cls.streets[i % 4 // 2], cls.industries[i % 2], i,
+                # 每两家同一天成立，用于验证同日记录的翻页
+                establishment_date=date(2020, 1, 1) + timedelta(days=i // 2),
+            )
+            for i in range(12)
+        ]
+
+    def setUp(self):
+        session = self.client.session
+        session['admin_id'] = 1
+        session.save()
+
+    def test_keyset_pages_newest_first(self):
+        seen, cursor = [], None
+        while True:
+            params = {'page_size': 5}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get('/merchants/api/', params).json()
+            seen.extend(item['id'] for item in data['data'])
+            cursor = data['next_cursor']
+            if not data['has_more']:
+                break
+        expected = sorted(self.merchants, key=lambda m: (m.establishment_date, m.id), reverse=True)
+        self.assertEqual(seen, [m.id for m in expected])
+
+    def test_filters(self):
+        data = self.client.get('/merchants/api/', {
+            'street': self.streets[0].id, 'industry': self.industries[1].id,
+            'established_from': '2020-01-02', 'established_to': '2020-01-05',
+        }).json()
+        self.assertEqual([item['merchants_name'] for item in data['data']], ['商户9', '商户5'])
+        self.assertEqual(data['data'][0]['street'], '街道0')
+        self.assertEqual(data['data'][0]['industry'], '行业1')
+
+    def test_page_is_single_query(self):
+        with self.assertNumQueries(1):
+            merchants, _ = list_merchants({'street_id': self.streets[0].id}, page_size=3)
+            [(m.street.street_name, m.industry.industry_name) for m in merchants]
+
+    def test_invalid_params(self):
+        for params in ({'street': 'x'}, {'established_from': '2020-13-01'}, {'cursor': 'abc'}):
+            self.assertEqual(self.client.get('/merchants/api/', params).status_code, 400)
+
+    @skipUnless(connection.vendor == 'sqlite', '执行计划格式依赖SQLite')
+    def test_street_industry_query_uses_composite_index(self):
+        plan = merchant_queryset({'street_id': 1, 'industry_id': 1})[:20].explain()
+        self.assertIn('idx_street_industry_date', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class MerchantAnalyticsTests(TestCase):
+    """商户月度汇总及统计分析测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.streets = [Street.objects.create(street_name=f'街道{i}') for i in range(2)]
+        cls.industries = [Industry.objects.create(industry_name=f'行业{i}', industry_code=f'C{i}') for i in range(2)]
+        # 2024年1月街道0登记3家，3月街道1登记1家
+        months = [(0, 1), (0, 1), (0, 1), (1, 3)]
+        for i, (street, month) in enumerate(months):
+            merchant = create_merchant(cls.streets[street], cls.industries[i % 2], i)
+            registered = timezone.make_aware(datetime(2024, month, 15))
+            Merchant.objects.filter(pk=merchant.pk).update(registration_date=registered)
+        rebuild_rollup()
+
+    def setUp(self):
+        cache.clear()
+        session = self.client.session
+        session['admin_id'] = 1
+        session.save()
+
+    def assertRollupMatchesMerchants(self):
+        cells = set(
+            MerchantMonthlyStat.objects.filter(registered__gt=0)
+            .values_list('street_id', 'industry_id', 'month', 'registered')
+        )
+        self.assertEqual(cells, set(monthly_counts(Merchant.objects.all())))
+
+    def test_signals_keep_rollup_in_sync(self):
+        merchant = create_merchant(self.streets[1], self.industries[0], 10)
+        self.assertRollupMatchesMerchants()
+        merchant.street = self.streets[0]
+        merchant.save()
+        self.assertRollupMatchesMerchants()
+        Merchant.objects.filter(street=self.streets[1]).first().delete()
+        self.assertRollupMatchesMerchants()
+
+    def test_apply_deltas_updates_existing_cell_first(self):
+        month = timezone.localdate().replace(day=1)
+        cell = (self.streets[1].id, self.industries[0].id, month)
+        # 已有单元格：保存点两条 + 一条 UPDATE，不再先查询是否存在
+        apply_deltas(Counter({cell: 1}))
+        with self.assertNumQueries(3):
+            apply_deltas(Counter({cell: 2}))
+        self.assertEqual(MerchantMonthlyStat.objects.get(
+            street_id=cell[0], industry_id=cell[1], month=month,
+        ).registered, 3)
+
+    def test_time_series(self):
+        data = self.client.get('/merchants/analytics/series/', {'from': '2023-12', 'to': '2024-04'}).json()
+        self.assertEqual([(row['month'], row['new'], row['total']) for row in data['data']], [
+            ('2023-12', 0, 0), ('2024-01', 3, 3), ('2024-02', 0, 3), ('2024-03', 1, 4), ('2024-04', 0, 4),
+        ])
+        data = self.client.get('/merchants/analytics/series/', {'street': self.streets[1].id, 'from': '2024-02'}).json()
+        self.assertEqual(data['data'], [
+            {'month': '2024-02', 'new': 0, 'total': 0}, {'month': '2024-03', 'new': 1, 'total': 1},
+        ])
+
+    def test_top_n(self):
+        data = self.client.get('/merchants/analytics/top/', {'by': 'street', 'metric': 'total'}).json()
+        self.assertEqual([(row['name'], row['count']) for row in data['data']], [('街道0', 3), ('街道1', 1)])
+        data = self.client.get('/merchants/analytics/top/', {'metric': 'new', 'from': '2024-02', 'limit': 1}).json()
+        self.assertEqual([(row['name'], row['count']) for row in data['data']], [('街道1', 1)])
+        self.assertEqual(self.client.get('/merchants/analytics/top/', {'by': 'legal_person'}).status_code, 400)
+        self.assertEqual(self.client.get('/merchants/analytics/series/', {'from': '2024-13'}).status_code, 400)
+
+    def test_dashboard_merchants_from_rollup(self):
+        create_merchant(self.streets[0], self.industries[0], 10)
+        stats = get_statistics_data('year', merchant_source='rollup')
+        self.assertEqual((stats['total_merchants'], stats['new_merchants']), (5, 1))
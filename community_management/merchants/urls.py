@@ -1,6 +1,10 @@
 from django.urls import path
-from .views import merchants
+from .views import merchants, merchant_list_api, merchant_export, merchant_series, merchant_top
 
 urlpatterns = [
     path('', merchants, name='merchants'),
+    path('api/', merchant_list_api, name='merchant_list_api'),
+    path('export/', merchant_export, name='merchant_export'),
+    path('analytics/series/', merchant_series, name='merchant_series'),
+    path('analytics/top/', merchant_top, name='merchant_top'),
 ]
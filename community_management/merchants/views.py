@@ -1,6 +1,79 @@
-from django.shortcuts import render
+from django.http import JsonResponse
+from community_management import cache
+from community_management.export import export_response
+from community_management.pagination import parse_page_size
+from login.views import check_permission
+from .analytics import parse_analytics_params, parse_limit, time_series, top_n
+from .exports import MERCHANT_COLUMNS
+from .models import Merchant
+from .services import list_merchants, parse_merchant_filters, serialize_merchant
 
 # Create your views here.
 def merchants(request):
-    return render(request, 'merchants/merchants.html')
+    return cache.cached_render(request, 'merchants/merchants.html', cache.MERCHANT_PAGES)
 
+
+@check_permission()
+def merchant_list_api(request):
+    """
+    商户列表接口
+    支持 street、industry、established_from、established_to 筛选，按成立日期倒序，使用 cursor 参数进行键集分页
+    """
+    try:
+        filters = parse_merchant_filters(request.GET)
+        page_size = parse_page_size(request.GET.get('page_size'))
+        cursor = request.GET.get('cursor') or None
+        merchants, next_cursor = list_merchants(filters, cursor, page_size)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'data': [serialize_merchant(merchant) for merchant in merchants],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+    })
+
+
+@check_permission('merchants.export')
+def merchant_export(request):
+    """导出商户信息，format 参数可选 csv（默认）或 xlsx"""
+    try:
+        return export_response(Merchant.objects.all(), MERCHANT_COLUMNS, '商户信息', request.GET.get('format', 'csv'))
+    except (ValueError, ImportError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+
+@check_permission()
+def merchant_series(request):
+    """
+    商户月度时间序列
+    可选 street、industry 筛选，from、to 指定月份区间（YYYY-MM）
+    """
+    try:
+        params = parse_analytics_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({
+        'success': True,
+        'data': time_series(params.get('street'), params.get('industry'), params['from'], params['to']),
+    })
+
+
+@check_permission()
+def merchant_top(request):
+    """
+    商户数排行
+    by 为 street（默认）或 industry，metric 为 new（区间内新登记数，默认）或 total（区间结束时的总数），
+    limit 指定返回条数，其余参数同时间序列接口
+    """
+    try:
+        params = parse_analytics_params(request.GET)
+        limit = parse_limit(request.GET.get('limit'))
+        rows = top_n(
+            request.GET.get('by', 'street'), request.GET.get('metric', 'new'),
+            params.get('street'), params.get('industry'), params['from'], params['to'], limit,
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, 'data': rows})
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from properties.services import DEFAULT_BATCH_SIZE, reconcile_has_property
+
+
+class Command(BaseCommand):
+    help = '按物业经理记录修正小区的“是否有物业”标记'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='每批更新的行数')
+        parser.add_argument('--dry-run', action='store_true', help='只列出需要修正的小区，不写入数据库')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('batch-size 必须大于0')
+
+        changes = reconcile_has_property(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        for community_id, name, has_property in changes:
+            self.stdout.write(f'{community_id}\t{name}\t是否有物业 -> {"是" if has_property else "否"}')
+        action = '需要修正' if options['dry_run'] else '已修正'
+        self.stdout.write(self.style.SUCCESS(f'{action} {len(changes)} 个小区'))
@@ -0,0 +1,118 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from address.models import Community
+from community_management import cache
+from .models import PropertyManager
+
+# 覆盖情况筛选条件，propertymanager 为 PropertyManager 指向小区的反向一对一关系
+COVERAGE_STATUSES = {
+    # 有物业经理记录
+    'covered': Q(propertymanager__isnull=False),
+    # 无物业经理记录
+    'uncovered': Q(propertymanager__isnull=True),
+    # has_property 与物业经理记录不一致
+    'drift': Q(has_property=True, propertymanager__isnull=True) | Q(has_property=False, propertymanager__isnull=False),
+}
+
+# 报表加载的字段
+COVERAGE_FIELDS = (
+    'id', 'community_name', 'community_number', 'has_property', 'group__group_number',
+    'propertymanager__id', 'propertymanager__property__property_name',
+    'propertymanager__property__property_owner', 'propertymanager__property__property_contact_phone',
+)
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def coverage_queryset(status=None):
+    """
+    小区物业覆盖情况查询
+
+    小区、组别、物业经理、物业通过 select_related 在一条 LEFT JOIN 查询中取回。
+
+    Raises:
+        ValueError: status 无效时抛出
+    """
+    queryset = (
+        Community.objects.select_related('group', 'propertymanager__property')
+        .only(*COVERAGE_FIELDS)
+        .order_by('group_id', 'id')
+    )
+    if status:
+        if status not in COVERAGE_STATUSES:
+            raise ValueError(f'不支持的覆盖状态: {status}')
+        queryset = queryset.filter(COVERAGE_STATUSES[status])
+    return queryset
+
+
+def _manager(community):
+    """小区的物业经理记录，不存在时返回 None（select_related 已缓存，不会再次查询）"""
+    try:
+        return community.propertymanager
+    except PropertyManager.DoesNotExist:
+        return None
+
+
+def serialize_coverage(community):
+    manager = _manager(community)
+    prop = manager.property if manager else None
+    return {
+        'id': community.id,
+        'community_name': community.community_name,
+        'community_number': community.community_number,
+        'group': community.group.group_number,
+        'has_property': community.has_property,
+        'property': {
+            'id': prop.id,
+            'name': prop.property_name,
+            'owner': prop.property_owner,
+            'phone': prop.property_contact_phone,
+        } if prop else None,
+        'consistent': community.has_property == (manager is not None),
+    }
+
+
+def coverage_report(status=None):
+    """
+    小区物业覆盖报表
+
+    Returns:
+        (小区列表, 汇总)，汇总由同一批结果在内存中统计
+    """
+    rows = [serialize_coverage(community) for community in coverage_queryset(status)]
+    summary = {
+        'communities': len(rows),
+        'covered': sum(1 for row in rows if row['property']),
+        'uncovered': sum(1 for row in rows if not row['property']),
+        'drift': sum(1 for row in rows if not row['consistent']),
+    }
+    return rows, summary
+
+
+def reconcile_has_property(batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    按物业经理记录修正小区的 has_property 标记
+
+    只读取不一致的小区，按 batch_size 分批 bulk_update，不逐行 save()。
+    bulk_update 不触发信号，修正后手动使地址相关页面缓存失效。
+
+    Returns:
+        需要修正的 [(小区id, 小区名称, 修正后的值)]
+    """
+    drifted = (
+        Community.objects.filter(COVERAGE_STATUSES['drift'])
+        .annotate(managed=Exists(PropertyManager.objects.filter(community=OuterRef('pk'))))
+        .only('id', 'community_name', 'has_property')
+        .order_by('id')
+    )
+    communities = list(drifted)
+    now = timezone.now()
+    for community in communities:
+        community.has_property = community.managed
+        community.last_update_time = now
+    if communities and not dry_run:
+        with transaction.atomic():
+            Community.objects.bulk_update(communities, ['has_property', 'last_update_time'], batch_size=batch_size)
+        cache.invalidate_on_commit(cache.ADDRESS_PAGES, cache.MERCHANT_PAGES)
+    return [(community.id, community.community_name, community.has_property) for community in communities]
@@ -1,3 +1,56 @@
+from io import StringIO
+from django.core.management import call_command
 from django.test import TestCase
+from address.models import Group, Community
+from .models import Property, PropertyManager
+from .services import coverage_report
 
-# Create your tests here.
+
+class PropertyCoverageTests(TestCase):
+    """小区物业覆盖报表测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        group = Group.objects.create(group_number='1组')
+        prop = Property.objects.create(
+            property_name='阳光物业', property_address='北京', property_owner='王经理', property_contact_phone='13800000000',
+        )
+        # 一致：有物业且有记录 / 无物业且无记录；不一致：标记有物业但无记录 / 标记无物业但有记录
+        cls.covered = Community.objects.create(community_name='小区A', group=group, community_number='1', has_property=True)
+        cls.uncovered = Community.objects.create(community_name='小区B', group=group, community_number='2')
+        cls.flag_only = Community.objects.create(community_name='小区C', group=group, community_number='3', has_property=True)
+        cls.record_only = Community.objects.create(community_name='小区D', group=group, community_number='4')
+        PropertyManager.objects.create(property=prop, community=cls.covered)
+        PropertyManager.objects.create(property=prop, community=cls.record_only)
+
+    def setUp(self):
+        session = self.client.session
+        session['admin_id'] = 1
+        session.save()
+
+    def test_report_is_single_query(self):
+        with self.assertNumQueries(1):
+            rows, summary = coverage_report()
+        self.assertEqual(summary, {'communities': 4, 'covered': 2, 'uncovered': 2, 'drift': 2})
+        self.assertEqual(rows[0]['property'], {
+            'id': rows[0]['property']['id'], 'name': '阳光物业', 'owner': '王经理', 'phone': '13800000000',
+        })
+        self.assertEqual(rows[0]['group'], '1组')
+
+    def test_drift_filter(self):
+        data = self.client.get('/properties/coverage/', {'status': 'drift'}).json()
+        self.assertEqual([row['community_name'] for row in data['data']], ['小区C', '小区D'])
+        self.assertEqual(self.client.get('/properties/coverage/', {'status': 'x'}).status_code, 400)
+
+    def test_reconcile_command(self):
+        call_command('reconcile_has_property', '--dry-run', stdout=StringIO())
+        self.assertEqual(coverage_report()[1]['drift'], 2)
+
+        with self.assertNumQueries(4):
+            # 查询不一致小区 + 保存点两条 + bulk_update一条
+            call_command('reconcile_has_property', stdout=StringIO())
+        self.assertEqual(coverage_report()[1]['drift'], 0)
+        self.flag_only.refresh_from_db()
+        self.record_only.refresh_from_db()
+        self.assertFalse(self.flag_only.has_property)
+        self.assertTrue(self.record_only.has_property)
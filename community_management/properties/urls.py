@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import property
+from .views import property, property_coverage
 
 urlpatterns = [
     path('', property, name='property'),
+    path('coverage/', property_coverage, name='property_coverage'),
 ]
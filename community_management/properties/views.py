@@ -1,6 +1,21 @@
+from django.http import JsonResponse
 from django.shortcuts import render
+from login.views import check_permission
+from .services import coverage_report
 
 # Create your views here.
 def property(request):
     return render(request, 'properties/property.html')
 
+
+@check_permission()
+def property_coverage(request):
+    """
+    小区物业覆盖报表
+    status 可选 covered、uncovered、drift（has_property 与物业经理记录不一致）
+    """
+    try:
+        rows, summary = coverage_report(request.GET.get('status'))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, 'data': rows, 'summary': summary})
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ResidentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'residents'
+
+    def ready(self):
+        from community_management import cache
+        # 居民数据变更时使首页统计缓存失效；生日、年龄段统计按天过期，只在批量写入后失效
+        cache.invalidate_on_change(self, cache.STATISTICS)
+        # 注册居民原值记录及交叉统计增量更新信号
+        from . import signals  # noqa: F401
@@ -0,0 +1,221 @@
+"""
+居民生日及年龄段查询
+
+居民表的 birth_month_day 是数据库根据出生日期生成的月日数值（3月8日为308），
+在世居民按 (is_deceased, birth_month_day, birth_date) 索引查询：
+
+- 生日区间：转换为 birth_month_day 上的1-2个范围查询（跨年时拆成两段），按索引顺序读取；
+- 整寿：在生日区间的基础上按各整寿年龄限定出生日期，条件在索引内判断，只回表读取命中的居民；
+- 年龄段分布：沿 楼房 -> 户号 -> 单元 -> 楼栋 -> 小区 -> 组别 关联，在数据库中按小区或组别及年龄段分组计数。
+
+2月29日出生的居民在平年按2月28日过生日，与 crosstab.years_before 一致。
+整寿名单及年龄段分布按天缓存，在当地时间零点过期。单个居民或地址的修改不使其失效，
+当天的名单及分布可能滞后于这类修改；批量导入、标识一致性修复及合成数据生成后统一失效。
+"""
+import calendar
+from datetime import date, datetime, time, timedelta
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from address.models import Community, Group
+from community_management import cache
+from .crosstab import AGE_BANDS, age_band_expression, years_before
+from .models import Building, Resident
+
+# 生日区间的最大天数
+MAX_WINDOW_DAYS = 31
+
+DEFAULT_WINDOW_DAYS = 7
+
+# 整寿年龄
+MILESTONE_AGES = (60, 70, 80, 90, 100)
+
+# 整寿名单的默认天数
+MILESTONE_DAYS = 30
+
+# 生日查询返回的字段
+BIRTHDAY_FIELDS = ('id', 'name', 'gender', 'birth_date', 'phone_number')
+
+GENDER_LABELS = dict(Resident._meta.get_field('gender').flatchoices)
+
+# 年龄段分布的分组：参数值 -> (楼房表上的查询路径, 名称模型, 名称字段)
+DISTRIBUTION_GROUPS = {
+    'community': ('house_number__unit__apartment__community_id', Community, 'community_name'),
+    'group': ('house_number__unit__apartment__community__group_id', Group, 'group_number'),
+}
+
+
+def month_day(value):
+    return value.month * 100 + value.day
+
+
+def _window_end(start, days):
+    """
+    生日区间的最后一天，以及区间按月日的上限
+
+    平年区间以2月28日结束时，2月29日出生的居民也在区间内，上限取229
+    """
+    end = start + timedelta(days=days - 1)
+    upper = month_day(end)
+    if upper == 228 and not calendar.isleap(end.year):
+        upper = 229
+    return end, upper
+
+
+def birthday_ranges(start, days):
+    """生日区间对应的 birth_month_day 范围列表，按日期先后排列，跨年时为两段"""
+    end, upper = _window_end(start, days)
+    lower = month_day(start)
+    if end.year == start.year:
+        return [(lower, upper)]
+    return [(lower, 1231), (101, upper)]
+
+
+def next_birthday(birth_date, start):
+    """start 当天或之后的第一个生日"""
+    birthday = years_before(birth_date, birth_date.year - start.year)
+    if birthday < start:
+        birthday = years_before(birth_date, birth_date.year - start.year - 1)
+    return birthday
+
+
+def _serialize(row, today):
+    birthday = next_birthday(row['birth_date'], today)
+    return {
+        **row,
+        'gender': GENDER_LABELS.get(row['gender'], row['gender']),
+        'birth_date': row['birth_date'].isoformat(),
+        'birthday': birthday.isoformat(),
+        'age': birthday.year - row['birth_date'].year,
+        'days_until': (birthday - today).days,
+    }
+
+
+def birthday_window(start, days=DEFAULT_WINDOW_DAYS, limit=None, extra=None):
+    """
+    生日在 [start, start + days) 内的在世居民
+
+    Args:
+        start: 区间第一天
+        days: 区间天数，1 到 MAX_WINDOW_DAYS
+        limit: 最多返回的人数
+        extra: 附加的查询条件
+
+    Returns:
+        居民字典列表，按生日先后排列，包含 birthday（区间内的生日）、age（当天满的周岁）及 days_until
+    """
+    rows = []
+    for lower, upper in birthday_ranges(start, days):
+        queryset = (
+            Resident.objects.filter(is_deceased=0, birth_month_day__range=(lower, upper))
+            .filter(extra or Q())
+            .order_by('birth_month_day', 'birth_date', 'id')
+            .values(*BIRTHDAY_FIELDS)
+        )
+        if limit is not None:
+            queryset = queryset[:limit - len(rows)]
+        rows.extend(queryset)
+        if limit is not None and len(rows) >= limit:
+            break
+    return [_serialize(row, start) for row in rows]
+
+
+def milestones(start, days=MILESTONE_DAYS, ages=MILESTONE_AGES):
+    """生日在区间内且当天年满 ages 中某一整寿的在世居民"""
+    end, _ = _window_end(start, days)
+    # 平年2月28日结束的区间包含2月29日出生的居民，出生日期上限按次日前一天计算
+    leap_end = end.month == 2 and end.day == 28 and not calendar.isleap(end.year)
+    condition = Q()
+    for age in ages:
+        upper = years_before(end + timedelta(days=1), age) - timedelta(days=1) if leap_end else years_before(end, age)
+        condition |= Q(birth_date__range=(years_before(start, age), upper))
+    return birthday_window(start, days, extra=condition)
+
+
+def _seconds_until_midnight():
+    """距当地时间下一个零点的秒数，用作按天缓存的过期时间"""
+    now = timezone.localtime()
+    midnight = timezone.make_aware(datetime.combine(now.date() + timedelta(days=1), time.min))
+    return max(1, int((midnight - now).total_seconds()))
+
+
+def get_milestones(days=MILESTONE_DAYS):
+    """今天起 days 天内的整寿名单，按天缓存"""
+    today = timezone.localdate()
+    return cache.get_or_set(
+        cache.COHORTS, f'milestones:{today.isoformat()}:{days}', lambda: milestones(today, days),
+        _seconds_until_midnight(),
+    )
+
+
+def age_distribution(by='community', today=None):
+    """
+    按小区或组别统计在世居民的年龄段分布，一次分组查询完成
+
+    Returns:
+        [{'id', 'name', 'total', 'bands': {年龄段名称: 人数}}]，按人数倒序；
+        同一居民在多个小区有楼房时分别计入
+    """
+    path, model, name_field = DISTRIBUTION_GROUPS[by]
+    today = today or timezone.localdate()
+    rows = (
+        Building.objects.filter(resident__is_deceased=0)
+        .order_by()
+        .annotate(key=F(path), band=age_band_expression(today, 'resident__birth_date'))
+        .values('key', 'band')
+        .annotate(n=Count('resident_id', distinct=True))
+        .values_list('key', 'band', 'n')
+    )
+    names = dict(model.objects.values_list('id', name_field))
+    report = {}
+    for key, band, n in rows:
+        entry = report.setdefault(key, {
+            'id': key,
+            'name': names.get(key),
+            'total': 0,
+            'bands': {name: 0 for _, _, name in AGE_BANDS},
+        })
+        entry['bands'][AGE_BANDS[band][2]] += n
+        entry['total'] += n
+    return sorted(report.values(), key=lambda entry: entry['total'], reverse=True)
+
+
+def get_age_distribution(by='community'):
+    """按天缓存的年龄段分布"""
+    today = timezone.localdate()
+    return cache.get_or_set(
+        cache.COHORTS, f'ages:{by}:{today.isoformat()}', lambda: age_distribution(by, today),
+        _seconds_until_midnight(),
+    )
+
+
+def parse_start(value):
+    """
+    解析区间第一天（YYYY-MM-DD），默认今天
+
+    Raises:
+        ValueError: 日期无效时抛出
+    """
+    if not value:
+        return timezone.localdate()
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'参数 start 的值无效: {value}')
+
+
+def parse_days(value, default=DEFAULT_WINDOW_DAYS):
+    """
+    解析区间天数
+
+    Raises:
+        ValueError: 不是1到 MAX_WINDOW_DAYS 之间的整数时抛出
+    """
+    if value in (None, ''):
+        return default
+    try:
+        days = int(value)
+    except ValueError:
+        raise ValueError(f'参数 days 的值无效: {value}')
+    if not 1 <= days <= MAX_WINDOW_DAYS:
+        raise ValueError(f'days 需要在1-{MAX_WINDOW_DAYS}之间')
+    return days
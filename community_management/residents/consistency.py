@@ -0,0 +1,114 @@
+"""
+居民特殊标识与特殊人群明细表的一致性
+
+居民表的 is_low_income 等标识与低保户等明细表记录的是同一事实：首页的总数按标识统计，
+新增数按明细表统计。以明细表为准，两者不一致分为两类：
+
+- 有明细但未标记：从明细表出发，以 id IN (SELECT resident_id ...) 按主键回查居民，
+  明细表通常远小于居民表；
+- 已标记但无明细：标记的居民以 NOT EXISTS 反连接明细表，走明细表的 resident_id 索引。
+
+每类不一致只需一条查询统计、一条 UPDATE 修复，不逐行检查。
+明细记录增删时由信号同步标识，reconcile 用于修复批量写入或历史数据造成的偏差。
+"""
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from address.occupancy import apply_death_changes
+from community_management import cache
+from index import versions
+from index.snapshot import apply_deltas, flag_deltas, merge_deltas
+from .models import Deceased, Disabled, FiveGuarantees, LowIncome, Resident, SpecialNeeds, SpecialObjects
+
+# 居民标识 -> 对应的明细表
+FLAG_DETAILS = {
+    'is_low_income': LowIncome,
+    'is_beneficiary': FiveGuarantees,
+    'is_disabled': Disabled,
+    'is_special_support': SpecialNeeds,
+    'is_key_person': SpecialObjects,
+    'is_deceased': Deceased,
+}
+
+# 明细表 -> 居民标识
+DETAIL_FLAGS = {model: flag for flag, model in FLAG_DETAILS.items()}
+
+# 报告中每类不一致列出的居民id数
+SAMPLE_SIZE = 20
+
+
+def missing_flag(flag):
+    """有明细记录但标识为0的居民"""
+    return Resident.objects.filter(**{flag: 0}, id__in=FLAG_DETAILS[flag].objects.values('resident_id'))
+
+
+def missing_detail(flag):
+    """标识为1但没有明细记录的居民"""
+    details = FLAG_DETAILS[flag].objects.filter(resident_id=OuterRef('pk'))
+    return Resident.objects.filter(**{flag: 1}).filter(~Exists(details))
+
+
+def find_mismatches(sample_size=SAMPLE_SIZE):
+    """
+    统计各标识的不一致情况
+
+    Returns:
+        {标识: {'missing_flag': 数量, 'missing_detail': 数量,
+                'missing_flag_ids': [居民id], 'missing_detail_ids': [居民id]}}
+    """
+    report = {}
+    for flag in FLAG_DETAILS:
+        report[flag] = {}
+        for kind, queryset in (('missing_flag', missing_flag(flag)), ('missing_detail', missing_detail(flag))):
+            ids = list(queryset.order_by('id').values_list('id', flat=True)[:sample_size])
+            report[flag][kind] = len(ids) if len(ids) < sample_size else queryset.count()
+            report[flag][f'{kind}_ids'] = ids
+    return report
+
+
+def reconcile(clear=True):
+    """
+    以明细表为准修复居民标识，不修改数据的预览见 find_mismatches
+
+    update() 不触发居民信号，修复前按登记日期统计受影响的居民数，
+    把增量累加到首页统计汇总表，并递增交叉统计版本号使立方体重建；
+    修改已故标识的居民，修复前按其楼房/平房调整所在地址的居住人数。
+
+    Args:
+        clear: 是否清除没有明细记录的标识，为 False 时只补充缺失的标识
+
+    Returns:
+        {标识: {'set': 数量, 'cleared': 数量}}
+    """
+    counts = {}
+    deltas = []
+    with transaction.atomic():
+        for flag in FLAG_DETAILS:
+            repairs = [('set', missing_flag(flag), 1)]
+            if clear:
+                repairs.append(('cleared', missing_detail(flag), 0))
+            counts[flag] = {'set': 0, 'cleared': 0}
+            for kind, queryset, value in repairs:
+                deltas.append(flag_deltas(queryset, flag, value))
+                if flag == 'is_deceased':
+                    apply_death_changes(queryset, -1 if value else 1)
+                counts[flag][kind] = queryset.update(**{flag: value})
+        apply_deltas(merge_deltas(*deltas))
+        if any(n for row in counts.values() for n in row.values()):
+            versions.bump(versions.CROSSTAB)
+            cache.invalidate_on_commit(cache.STATISTICS, cache.COHORTS)
+    return counts
+
+
+def sync_flag(resident_id, flag, value):
+    """
+    把一名居民的标识设为 value
+
+    通过 save() 写入，首页统计汇总、交叉统计等依赖居民信号的数据随之更新；
+    标识已是 value 时不写入。
+    """
+    resident = Resident.objects.filter(pk=resident_id).first()
+    if resident is None or getattr(resident, flag) == value:
+        return False
+    setattr(resident, flag, value)
+    resident.save(update_fields=[flag, 'last_update_time'])
+    return True
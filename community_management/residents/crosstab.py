@@ -0,0 +1,232 @@
+"""
+居民交叉统计
+
+用一条 values(...).annotate(Count) 查询把在世居民按全部小基数维度分组，
+结果保存在进程内的计数立方体中，任意1-3个维度的透视表都通过对立方体求和得到，不再访问数据库。
+
+立方体以坐标元组为键稀疏存储，只保存非零单元格，透视时的遍历量与实际分组数相当，
+而不是各维度基数的乘积。居民变更时由信号在同一事务中递增数据库中的 crosstab 版本号，
+事务提交后再增量更新本进程的立方体，回滚的修改不会计入；
+其他进程通过版本号发现变更，在下次访问时重建。
+"""
+import threading
+from collections import defaultdict
+from datetime import date
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Value, When
+from django.utils import timezone
+from index import versions
+from .models import Ethnicity, Resident
+
+# 直接取自居民表的选项维度
+CHOICE_DIMENSIONS = (
+    'gender', 'political_affiliation', 'marital_status', 'education_level', 'population_type', 'residential_type',
+)
+
+# 年龄段：(下限, 上限, 名称)，上限不含
+AGE_BANDS = (
+    (0, 18, '0-17岁'),
+    (18, 35, '18-34岁'),
+    (35, 60, '35-59岁'),
+    (60, 70, '60-69岁'),
+    (70, 80, '70-79岁'),
+    (80, None, '80岁及以上'),
+)
+
+# 立方体的维度顺序
+DIMENSIONS = ('ethnicity',) + CHOICE_DIMENSIONS + ('age_band',)
+
+# 计算坐标所需的居民字段
+CUBE_FIELDS = ('ethnicity_id', 'birth_date', 'is_deceased') + CHOICE_DIMENSIONS
+
+MAX_PIVOT_DIMENSIONS = 3
+
+
+def years_before(today, years):
+    """today 往前推 years 年的日期，2月29日退到2月28日"""
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:
+        return date(today.year - years, 2, 28)
+
+
+def age_band_expression(today, field='birth_date'):
+    """按出生日期计算年龄段编号的SQL表达式，field 为出生日期的查询路径"""
+    whens = [
+        When(**{f'{field}__gt': years_before(today, upper)}, then=Value(index))
+        for index, (_, upper, _) in enumerate(AGE_BANDS)
+        if upper is not None
+    ]
+    return Case(*whens, default=Value(len(AGE_BANDS) - 1), output_field=IntegerField())
+
+
+def age_band(birth_date, today):
+    """与 age_band_expression 一致的Python实现"""
+    for index, (_, upper, _) in enumerate(AGE_BANDS):
+        if upper is not None and birth_date > years_before(today, upper):
+            return index
+    return len(AGE_BANDS) - 1
+
+
+class CrossTabCube:
+    """居民计数立方体"""
+
+    def __init__(self, cells, labels, built_on, version):
+        self.cells = cells
+        self.labels = labels
+        self.built_on = built_on
+        self.version = version
+
+    @classmethod
+    def build(cls, version=None):
+        today = timezone.localdate()
+        rows = (
+            Resident.objects.filter(is_deceased=0)
+            .order_by()
+            .annotate(age_band=age_band_expression(today))
+            .values(*DIMENSIONS)
+            .annotate(n=Count('pk'))
+            .values_list(*DIMENSIONS, 'n')
+        )
+        cells = defaultdict(int)
+        for row in rows:
+            cells[row[:-1]] = row[-1]
+
+        labels = {'ethnicity': dict(Ethnicity.objects.values_list('id', 'name'))}
+        for dimension in CHOICE_DIMENSIONS:
+            labels[dimension] = {value: str(label) for value, label in Resident._meta.get_field(dimension).flatchoices}
+        labels['age_band'] = {index: name for index, (_, _, name) in enumerate(AGE_BANDS)}
+        return cls(cells, labels, today, version)
+
+    def coordinates(self, values):
+        """居民字段值对应的单元格坐标，已故居民不计入立方体"""
+        if values['is_deceased']:
+            return None
+        return (
+            (values['ethnicity_id'],)
+            + tuple(values[dimension] for dimension in CHOICE_DIMENSIONS)
+            + (age_band(values['birth_date'], self.built_on),)
+        )
+
+    def add(self, values, sign=1):
+        coordinates = self.coordinates(values)
+        if coordinates is None:
+            return
+        if coordinates[0] not in self.labels['ethnicity']:
+            # 新增民族，标签表需要重建
+            raise LookupError(coordinates[0])
+        self.cells[coordinates] += sign
+        if not self.cells[coordinates]:
+            del self.cells[coordinates]
+
+    def pivot(self, dimensions, filters=None):
+        """
+        透视统计
+
+        Args:
+            dimensions: 1-3个维度名
+            filters: {维度名: 编码}，只统计满足条件的单元格
+
+        Returns:
+            [{维度名: 显示值, ..., 'count': 人数}]，按人数倒序
+        """
+        positions = [DIMENSIONS.index(dimension) for dimension in dimensions]
+        conditions = [(DIMENSIONS.index(dimension), value) for dimension, value in (filters or {}).items()]
+        totals = defaultdict(int)
+        for coordinates, n in self.cells.items():
+            if all(coordinates[position] == value for position, value in conditions):
+                totals[tuple(coordinates[position] for position in positions)] += n
+
+        result = []
+        for key, n in totals.items():
+            row = {
+                dimension: self.labels[dimension].get(code, code)
+                for dimension, code in zip(dimensions, key)
+            }
+            row['count'] = n
+            result.append(row)
+        result.sort(key=lambda row: row['count'], reverse=True)
+        return result
+
+
+_lock = threading.Lock()
+_cube = None
+
+
+def get_cube():
+    """返回最新的立方体，跨天或其他进程修改过居民数据时重建"""
+    global _cube
+    version, _ = versions.get_version(versions.CROSSTAB)
+    with _lock:
+        if _cube is None or _cube.version != version or _cube.built_on != timezone.localdate():
+            _cube = CrossTabCube.build(version)
+        return _cube
+
+
+def reset():
+    """丢弃本进程的立方体，下次访问时重建"""
+    global _cube
+    with _lock:
+        _cube = None
+
+
+def record_change(old_values=None, new_values=None):
+    """
+    记录一名居民的变更
+
+    在当前事务中递增版本号，并登记事务提交后对本进程立方体的增量更新；
+    事务回滚时版本号和增量一并丢弃。
+    """
+    with transaction.atomic():
+        versions.bump(versions.CROSSTAB)
+        version, _ = versions.get_version(versions.CROSSTAB)
+        transaction.on_commit(lambda: apply_change(version, old_values, new_values))
+
+
+def apply_change(version, old_values=None, new_values=None):
+    """
+    把已提交的变更增量更新到立方体
+
+    本进程的立方体正好是变更前的版本时直接加减计数并同步版本号，
+    否则（其他进程的变更未计入）丢弃立方体，等下次访问时重建。
+    """
+    global _cube
+    with _lock:
+        if _cube is None:
+            return
+        if _cube.version != version - 1:
+            _cube = None
+            return
+        try:
+            if old_values is not None:
+                _cube.add(old_values, sign=-1)
+            if new_values is not None:
+                _cube.add(new_values)
+        except LookupError:
+            _cube = None
+            return
+        _cube.version = version
+
+
+def parse_pivot_params(params):
+    """
+    解析透视参数：dims=维度1,维度2 以及按维度编码筛选
+
+    Raises:
+        ValueError: 参数无效时抛出
+    """
+    dimensions = [dimension for dimension in params.get('dims', '').split(',') if dimension]
+    if not 1 <= len(dimensions) <= MAX_PIVOT_DIMENSIONS:
+        raise ValueError(f'dims 需要1-{MAX_PIVOT_DIMENSIONS}个维度')
+    unknown = [dimension for dimension in dimensions if dimension not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f'不支持的维度: {", ".join(unknown)}')
+    filters = {}
+    for dimension in DIMENSIONS:
+        value = params.get(dimension)
+        if value not in (None, ''):
+            try:
+                filters[dimension] = int(value)
+            except ValueError:
+                raise ValueError(f'参数 {dimension} 的值无效: {value}')
+    return dimensions, filters
@@ -0,0 +1,36 @@
+from community_management.export import build_columns
+from .models import Resident, LowIncome, FiveGuarantees, Disabled, SpecialNeeds, Deceased, SpecialObjects
+
+# 特殊人群明细表共用的居民列
+_RESIDENT_COLUMNS = [
+    'resident_id',
+    ('resident__name', '居民姓名'),
+    ('resident__id_card', '身份证号'),
+    ('resident__phone_number', '联系方式'),
+]
+
+_BANK_COLUMNS = [
+    'authentication_date', 'bank_account_number', 'bank_account_name', 'registration_date',
+]
+
+# 导出表名 -> (模型, 导出列, 文件名)
+RESIDENT_EXPORTS = {
+    'residents': (Resident, build_columns(Resident, [
+        'id', 'name', 'id_card', 'gender', 'birth_date', ('ethnicity__name', '民族'), 'political_affiliation',
+        'household_address', 'phone_number', 'marital_status', 'education_level', 'population_type',
+        'residential_type', 'own_house', 'is_low_income', 'is_beneficiary', 'is_disabled',
+        'is_special_support', 'is_key_person', 'is_deceased', 'registration_date', 'last_update_time',
+    ]), '居民信息'),
+    'low_income': (LowIncome, build_columns(LowIncome, _RESIDENT_COLUMNS + _BANK_COLUMNS), '低保户信息'),
+    'five_guarantees': (FiveGuarantees, build_columns(FiveGuarantees, _RESIDENT_COLUMNS + _BANK_COLUMNS), '五保户信息'),
+    'disabled': (Disabled, build_columns(Disabled, _RESIDENT_COLUMNS + _BANK_COLUMNS), '残疾人信息'),
+    'special_needs': (SpecialNeeds, build_columns(SpecialNeeds, _RESIDENT_COLUMNS + _BANK_COLUMNS), '特扶户信息'),
+    'deceased': (Deceased, build_columns(Deceased, _RESIDENT_COLUMNS + [
+        'deceased_date', 'deceased_place', 'deceased_reason', 'deceased_contact_name',
+        'deceased_contact_phone', 'registration_date',
+    ]), '死亡户信息'),
+    'special_objects': (SpecialObjects, build_columns(SpecialObjects, _RESIDENT_COLUMNS + [
+        'object_type', 'object_name', 'object_contact_phone', 'object_address', 'object_responsible_name',
+        'object_responsible_phone', 'registration_date',
+    ]), '重点对象信息'),
+}
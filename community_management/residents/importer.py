@@ -0,0 +1,262 @@
+"""
+居民批量导入
+
+逐行读取CSV/XLSX文件，民族名称和身份证号查重均使用预先加载的内存表，
+合格的记录按批次在独立事务中 bulk_create，内存占用只与批次大小有关。
+"""
+import csv
+import io
+import os
+import zipfile
+from datetime import date, datetime
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from community_management import cache
+from index import versions
+from index.snapshot import RESIDENT_SNAPSHOT_FIELDS, apply_deltas, merge_deltas, resident_deltas
+from .models import Ethnicity, Resident
+from .search import index_residents
+
+# 可导入的字段
+IMPORT_FIELDS = (
+    'name', 'id_card', 'gender', 'birth_date', 'ethnicity', 'political_affiliation', 'household_address',
+    'phone_number', 'marital_status', 'education_level', 'population_type', 'residential_type', 'own_house',
+    'is_low_income', 'is_beneficiary', 'is_disabled', 'is_special_support', 'is_key_person', 'is_deceased',
+)
+
+# 必填字段
+REQUIRED_FIELDS = ('name', 'id_card', 'birth_date', 'ethnicity', 'household_address', 'phone_number')
+
+DEFAULT_BATCH_SIZE = 1000
+
+# 报告中最多保留的错误条数，超出部分只计数
+MAX_REPORTED_ERRORS = 1000
+
+
+def _build_header_map():
+    """表头 -> 字段名，同时支持字段名和中文名称"""
+    header_map = {}
+    for name in IMPORT_FIELDS:
+        field = Resident._meta.get_field(name)
+        header_map[name] = name
+        header_map[str(field.verbose_name)] = name
+    return header_map
+
+
+def _build_choice_maps():
+    """选项字段的取值表，同时支持数值和中文显示值"""
+    choice_maps = {}
+    for name in IMPORT_FIELDS:
+        field = Resident._meta.get_field(name)
+        if field.choices:
+            choice_maps[name] = {}
+            for value, label in field.choices:
+                choice_maps[name][str(value)] = value
+                choice_maps[name][str(label)] = value
+    return choice_maps
+
+
+HEADER_MAP = _build_header_map()
+CHOICE_MAPS = _build_choice_maps()
+
+
+def iter_csv_rows(stream):
+    """逐行读取CSV，stream 为二进制文件对象"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    headers = next(reader, [])
+    for row in reader:
+        yield dict(zip(headers, row))
+
+
+def iter_xlsx_rows(stream):
+    """以只读模式逐行读取XLSX的第一个工作表"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError('导入Excel文件需要安装openpyxl')
+    from openpyxl.utils.exceptions import InvalidFileException
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError, OSError):
+        # 文件损坏或不是XLSX格式时按文件内容错误处理，与表头错误一样返回校验失败
+        raise ValueError('无法读取Excel文件，请确认文件为有效的XLSX格式')
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        headers = [str(header).strip() if header is not None else '' for header in next(rows, ())]
+        for row in rows:
+            yield dict(zip(headers, row))
+    finally:
+        workbook.close()
+
+
+def iter_rows(stream, filename):
+    """根据文件扩展名选择读取方式"""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return iter_csv_rows(stream)
+    if extension in ('.xlsx', '.xlsm'):
+        return iter_xlsx_rows(stream)
+    raise ValueError(f'不支持的文件类型: {extension}')
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for fmt in ('%Y-%m-%d', '%Y/%m/%d', '%Y%m%d'):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f'出生日期格式错误: {text}')
+
+
+class ImportReport:
+    """导入结果"""
+
+    def __init__(self):
+        self.total = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row_number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'error': message})
+
+    def as_dict(self):
+        return {
+            'total': self.total,
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
+
+
+class ResidentImporter:
+    """
+    居民批量导入器
+
+    Args:
+        batch_size: 每批插入的行数，每批在独立事务中提交
+        on_error: 可选回调 on_error(row_number, message)，用于输出完整的错误明细
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, on_error=None):
+        self.batch_size = batch_size
+        self.on_error = on_error
+        self.ethnicities = dict(Ethnicity.objects.values_list('name', 'id'))
+        self.id_cards = set(Resident.objects.values_list('id_card', flat=True).iterator(chunk_size=10000))
+
+    def build_resident(self, row):
+        """
+        把一行数据转换为未保存的Resident
+
+        Raises:
+            ValueError: 数据不合法时抛出，异常信息即错误说明
+        """
+        values = {}
+        for header, raw in row.items():
+            field = HEADER_MAP.get(str(header).strip())
+            if field is None or raw is None:
+                continue
+            if isinstance(raw, str):
+                raw = raw.strip()
+                if raw == '':
+                    continue
+            values[field] = raw
+
+        missing = [field for field in REQUIRED_FIELDS if field not in values]
+        if missing:
+            raise ValueError(f'缺少必填字段: {", ".join(missing)}')
+
+        id_card = str(values['id_card']).upper()
+        if len(id_card) != 18:
+            raise ValueError(f'身份证号长度错误: {id_card}')
+        if id_card in self.id_cards:
+            raise ValueError(f'身份证号已存在: {id_card}')
+        values['id_card'] = id_card
+
+        ethnicity = str(values.pop('ethnicity'))
+        ethnicity_id = self.ethnicities.get(ethnicity)
+        if ethnicity_id is None:
+            raise ValueError(f'民族不存在: {ethnicity}')
+        values['ethnicity_id'] = ethnicity_id
+
+        values['birth_date'] = _parse_date(values['birth_date'])
+        for field, choices in CHOICE_MAPS.items():
+            if field in values:
+                choice = choices.get(str(values[field]))
+                if choice is None:
+                    raise ValueError(f'{Resident._meta.get_field(field).verbose_name}取值无效: {values[field]}')
+                values[field] = choice
+        for field in ('name', 'household_address', 'phone_number'):
+            values[field] = str(values[field])
+
+        resident = Resident(**values)
+        try:
+            resident.clean_fields(exclude=['ethnicity'])
+        except ValidationError as e:
+            raise ValueError('; '.join(f'{k}: {", ".join(v)}' for k, v in e.message_dict.items()))
+        return resident
+
+    def run(self, rows):
+        """导入可迭代的行数据（字典），返回 ImportReport"""
+        report = ImportReport()
+        batch = []
+        # 表头占第1行，数据从第2行开始
+        for row_number, row in enumerate(rows, start=2):
+            report.total += 1
+            try:
+                resident = self.build_resident(row)
+            except ValueError as e:
+                self._error(report, row_number, str(e))
+                continue
+            self.id_cards.add(resident.id_card)
+            batch.append((row_number, resident))
+            if len(batch) >= self.batch_size:
+                self._flush(batch, report)
+                batch = []
+        if batch:
+            self._flush(batch, report)
+        return report
+
+    def _error(self, report, row_number, message):
+        report.add_error(row_number, message)
+        if self.on_error:
+            self.on_error(row_number, message)
+
+    def _flush(self, batch, report):
+        """插入一批记录，批量插入失败时逐行重试以定位错误行"""
+        try:
+            with transaction.atomic():
+                created = Resident.objects.bulk_create([resident for _, resident in batch])
+                self._update_snapshot(created)
+                # 同理手动写入姓名检索表
+                index_residents((resident.pk, resident.name) for resident in created)
+        except IntegrityError:
+            created = []
+            for row_number, resident in batch:
+                try:
+                    with transaction.atomic():
+                        Resident.objects.bulk_create([resident])
+                        self._update_snapshot([resident])
+                        index_residents([(resident.pk, resident.name)])
+                    created.append(resident)
+                except IntegrityError as e:
+                    self._error(report, row_number, f'写入失败: {e}')
+        report.created += len(created)
+        if created:
+            cache.invalidate_on_commit(cache.STATISTICS, cache.COHORTS)
+
+    def _update_snapshot(self, residents):
+        """bulk_create 不触发信号，需要手动累加首页统计汇总，并递增交叉统计版本号使各进程的立方体重建"""
+        apply_deltas(merge_deltas(*(
+            resident_deltas({field: getattr(resident, field) for field in RESIDENT_SNAPSHOT_FIELDS})
+            for resident in residents
+        )))
+        versions.bump(versions.CROSSTAB)
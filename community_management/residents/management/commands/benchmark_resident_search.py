@@ -0,0 +1,42 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from residents.models import Resident
+from residents.search import search_by_id_card, search_by_name, search_by_phone_tail
+
+
+class Command(BaseCommand):
+    help = '对当前数据库中的居民数据测试检索耗时，按检索字段输出平均值、P50、P95和最大值（毫秒）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', type=int, default=200, help='每种检索抽样的查询词数量')
+        parser.add_argument('--seed', type=int, default=0, help='抽样随机种子')
+
+    def handle(self, *args, **options):
+        max_id = Resident.objects.order_by('-id').values_list('id', flat=True).first()
+        if max_id is None:
+            raise CommandError('居民表为空，请先导入数据')
+
+        rng = random.Random(options['seed'])
+        sample_ids = [rng.randint(1, max_id) for _ in range(options['samples'])]
+        samples = list(Resident.objects.filter(id__in=sample_ids).values_list('name', 'id_card', 'phone_number'))
+
+        cases = {
+            'name': (search_by_name, [name[-2:] for name, _, _ in samples]),
+            'id_card': (search_by_id_card, [id_card[:10] for _, id_card, _ in samples]),
+            'phone': (search_by_phone_tail, [phone[-4:] for _, _, phone in samples]),
+        }
+        self.stdout.write(f'居民总数 {Resident.objects.count()}，抽样 {len(samples)} 条')
+        for field, (search, terms) in cases.items():
+            timings = []
+            hits = 0
+            for term in terms:
+                started = time.perf_counter()
+                hits += bool(search(term))
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f'{field:8} 平均 {statistics.mean(timings):.2f}  P50 {timings[len(timings) // 2]:.2f}  '
+                f'P95 {timings[int(len(timings) * 0.95)]:.2f}  最大 {timings[-1]:.2f}  命中 {hits}/{len(terms)}'
+            )
@@ -0,0 +1,39 @@
+import csv
+from django.core.management.base import BaseCommand, CommandError
+from residents.importer import DEFAULT_BATCH_SIZE, ResidentImporter, iter_rows
+
+
+class Command(BaseCommand):
+    help = '从CSV/XLSX文件批量导入居民信息'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV或XLSX文件路径')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='每批插入的行数')
+        parser.add_argument('--errors', help='错误明细输出路径（CSV），默认输出到标准错误')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('batch-size 必须大于0')
+
+        error_file = open(options['errors'], 'w', newline='', encoding='utf-8-sig') if options['errors'] else None
+        try:
+            if error_file:
+                writer = csv.writer(error_file)
+                writer.writerow(['行号', '错误'])
+                on_error = lambda row, message: writer.writerow([row, message])
+            else:
+                on_error = lambda row, message: self.stderr.write(f'第{row}行: {message}')
+
+            importer = ResidentImporter(batch_size=options['batch_size'], on_error=on_error)
+            with open(options['path'], 'rb') as stream:
+                try:
+                    report = importer.run(iter_rows(stream, options['path']))
+                except (ValueError, ImportError) as e:
+                    raise CommandError(str(e))
+        finally:
+            if error_file:
+                error_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'导入完成：共 {report.total} 行，成功 {report.created} 行，失败 {report.failed} 行'
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from residents.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = '从居民表全量重建姓名检索表（仅SQLite使用FTS5表，PostgreSQL的三元组索引由数据库自动维护）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help='每批写入的行数')
+
+    def handle(self, *args, **options):
+        total = rebuild_index(chunk_size=options['chunk_size'])
+        if total is None:
+            self.stdout.write('当前数据库无需重建检索表')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'姓名检索表重建完成，共 {total} 名居民'))
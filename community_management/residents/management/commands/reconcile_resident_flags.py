@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from residents.consistency import find_mismatches, reconcile
+
+
+class Command(BaseCommand):
+    help = '以特殊人群明细表为准，检查并修复居民表的低保、五保、残疾、特扶、重点对象及死亡标识'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='只输出不一致情况，不修改数据')
+        parser.add_argument('--keep-flags', action='store_true', help='保留没有明细记录的标识，只补充缺失的标识')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            for flag, row in find_mismatches().items():
+                self.stdout.write(f'{flag:<20}有明细未标记 {row["missing_flag"]:>8}  已标记无明细 {row["missing_detail"]:>8}')
+                for kind, label in (('missing_flag_ids', '有明细未标记'), ('missing_detail_ids', '已标记无明细')):
+                    if row[kind]:
+                        self.stdout.write(f'    {label}: {", ".join(map(str, row[kind]))}')
+            return
+
+        counts = reconcile(clear=not options['keep_flags'])
+        for flag, row in counts.items():
+            self.stdout.write(f'{flag:<20}标记 {row["set"]:>8}  清除 {row["cleared"]:>8}')
+        total = sum(n for row in counts.values() for n in row.values())
+        self.stdout.write(self.style.SUCCESS(f'修复完成，共修改 {total} 个标识'))
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:55
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+# 迁移中的建表语句及姓名拆分规则按迁移时复制，不随 residents.search 的修改变化
+SEARCH_TABLE = 'resident_search'
+
+
+def name_tokens(name):
+    """姓名按字拆分，以空格分隔后写入 FTS 表"""
+    return ' '.join(char for char in name if not char.isspace())
+
+
+def create_resident_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_resident_name_trgm ON residents USING gin (name gin_trgm_ops)'
+        )
+    if vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(name, tokenize='unicode61')"
+    )
+    Resident = apps.get_model('residents', 'Resident')
+    rows = [(pk, name_tokens(name)) for pk, name in Resident.objects.values_list('id', 'name').iterator()]
+    if rows:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(f'INSERT INTO {SEARCH_TABLE} (rowid, name) VALUES (%s, %s)', rows)
+
+
+def drop_resident_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS idx_resident_name_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('residents', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resident',
+            name='phone_tail',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=django.db.models.functions.text.Right('phone_number', 4), output_field=models.CharField(max_length=4), verbose_name='手机号后四位'),
+        ),
+        migrations.RunPython(create_resident_search, drop_resident_search),
+    ]
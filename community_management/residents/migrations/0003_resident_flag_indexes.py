@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('residents', '0002_resident_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='resident',
+            index=models.Index(fields=['is_deceased', 'registration_date'], name='idx_resident_deceased_reg'),
+        ),
+        migrations.AddIndex(
+            model_name='resident',
+            index=models.Index(condition=models.Q(('is_disabled', 1)), fields=['is_disabled', 'registration_date'], name='idx_resident_disabled'),
+        ),
+        migrations.AddIndex(
+            model_name='resident',
+            index=models.Index(condition=models.Q(('is_special_support', 1)), fields=['is_special_support', 'registration_date'], name='idx_resident_special_support'),
+        ),
+        migrations.AddIndex(
+            model_name='resident',
+            index=models.Index(condition=models.Q(('is_low_income', 1)), fields=['is_low_income', 'registration_date'], name='idx_resident_low_income'),
+        ),
+        migrations.AddIndex(
+            model_name='resident',
+            index=models.Index(condition=models.Q(('is_beneficiary', 1)), fields=['is_beneficiary', 'registration_date'], name='idx_resident_beneficiary'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:48
+
+import residents.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('residents', '0003_resident_flag_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resident',
+            name='birth_month_day',
+            field=models.GeneratedField(db_persist=True, expression=residents.models.MonthDay('birth_date'), output_field=models.SmallIntegerField(), verbose_name='生日（月日）'),
+        ),
+        migrations.AddIndex(
+            model_name='resident',
+            index=models.Index(fields=['is_deceased', 'birth_month_day', 'birth_date'], name='idx_resident_birthday'),
+        ),
+    ]
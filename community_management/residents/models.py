@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Func, Q
+from django.db.models.functions import Right
 from django.utils import timezone
 
 # Create your models here.
@@ -20,6 +22,23 @@ class Ethnicity(models.Model):
         return self.name
 
 
+class MonthDay(Func):
+    """日期的月日数值，如3月8日为308，用于不区分年份地按生日查询"""
+    output_field = models.IntegerField()
+    template = 'CAST(EXTRACT(MONTH FROM %(expressions)s) * 100 + EXTRACT(DAY FROM %(expressions)s) AS integer)'
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, template="CAST(strftime('%%%%m%%%%d', %(expressions)s) AS integer)", **extra_context
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, template='(MONTH(%(expressions)s) * 100 + DAYOFMONTH(%(expressions)s))',
+            **extra_context
+        )
+
+
 class Resident(models.Model):
     """
     居民身份信息表
@@ -34,6 +53,13 @@ class Resident(models.Model):
         verbose_name='性别'
     )
     birth_date = models.DateField(verbose_name='出生日期')
+    # 由数据库根据出生日期生成，用于生日区间及整寿查询（见 Meta.indexes 中的 idx_resident_birthday）
+    birth_month_day = models.GeneratedField(
+        expression=MonthDay('birth_date'),
+        output_field=models.SmallIntegerField(),
+        db_persist=True,
+        verbose_name='生日（月日）'
+    )
     ethnicity = models.ForeignKey(
         Ethnicity,
         on_delete=models.CASCADE,
@@ -59,6 +85,14 @@ class Resident(models.Model):
     )
     household_address = models.CharField(max_length=255, verbose_name='户籍地址')
     phone_number = models.CharField(max_length=20, verbose_name='联系方式')
+    # 由数据库根据联系方式生成，用于按后四位检索
+    phone_tail = models.GeneratedField(
+        expression=Right('phone_number', 4),
+        output_field=models.CharField(max_length=4),
+        db_persist=True,
+        db_index=True,
+        verbose_name='手机号后四位'
+    )
     
     # 状态信息
     marital_status = models.SmallIntegerField(
@@ -136,11 +170,39 @@ class Resident(models.Model):
             models.Index(fields=['residential_type']),
             models.Index(fields=['marital_status']),
             models.Index(fields=['education_level']),
+            # 在世/死亡人口总数及新增人口按登记时间的范围计数，只读索引即可完成
+            models.Index(fields=['is_deceased', 'registration_date'], name='idx_resident_deceased_reg'),
+            # 生日区间及整寿查询只查在世居民，is_deceased 放在首列，按生日排序时直接按索引顺序读取
+            models.Index(fields=['is_deceased', 'birth_month_day', 'birth_date'], name='idx_resident_birthday'),
+            # 特殊人群标识为1的居民很少，只为这部分行建立部分索引；索引包含标识列，计数时无需回表
+            models.Index(
+                fields=['is_disabled', 'registration_date'], condition=Q(is_disabled=1),
+                name='idx_resident_disabled',
+            ),
+            models.Index(
+                fields=['is_special_support', 'registration_date'], condition=Q(is_special_support=1),
+                name='idx_resident_special_support',
+            ),
+            models.Index(
+                fields=['is_low_income', 'registration_date'], condition=Q(is_low_income=1),
+                name='idx_resident_low_income',
+            ),
+            models.Index(
+                fields=['is_beneficiary', 'registration_date'], condition=Q(is_beneficiary=1),
+                name='idx_resident_beneficiary',
+            ),
         ]
 
     def __str__(self):
         return self.name
 
+class BuildingManager(models.Manager):
+    """默认同时读取居民及户号，__str__ 使用居民姓名和户号的完整地址，列表显示时不再逐条查询"""
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('resident', 'house_number')
+
+
 class Building(models.Model):
     """楼房信息模型"""
     # 居民ID，外键关联到residents表
@@ -154,6 +216,8 @@ class Building(models.Model):
     # 最后更新时间
     last_update_time = models.DateTimeField(auto_now=True, verbose_name='最后更新时间')
 
+    objects = BuildingManager()
+
     class Meta:
         # 设置表名
         db_table = 'building'
@@ -0,0 +1,137 @@
+"""
+居民档案
+
+一个居民的完整信息分布在居民表、楼房/平房关联及各特殊人群明细表中。
+每个关联只按 resident_id IN (...) 批量查询一次，并只读取输出字段，
+单个居民与一批居民的查询次数相同；不使用 prefetch_related，避免为每个居民的每个关联构造一个查询集。
+银行账户字段只对具备 residents.view_sensitive 权限的角色输出，其他角色的档案不查询这些字段。
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from .models import (
+    Building, Bungalow, Deceased, Disabled, FiveGuarantees, LowIncome, Resident, SpecialNeeds, SpecialObjects,
+)
+from .services import serialize_resident
+
+# 批量查询的居民数上限
+MAX_PROFILE_BATCH = 1000
+
+_BANK_FIELDS = ('id', 'authentication_date', 'bank_account_number', 'bank_account_name')
+
+# 查看敏感字段所需的权限代码及敏感字段
+SENSITIVE_PERMISSION = 'residents.view_sensitive'
+SENSITIVE_FIELDS = frozenset({'bank_account_number', 'bank_account_name'})
+
+# 档案中的关联：键 -> (模型, 输出字段)，字段为 (查询路径, 输出键) 时通过 JOIN 读取关联表字段
+PROFILE_RELATIONS = {
+    'buildings': (Building, ('id', 'building_number', 'house_number_id', ('house_number__full_address', 'address'))),
+    'bungalows': (Bungalow, ('id', 'bungalow_number', 'hutong_id', ('hutong__hutong_name', 'hutong'))),
+    'low_income': (LowIncome, _BANK_FIELDS),
+    'five_guarantees': (FiveGuarantees, _BANK_FIELDS),
+    'disabled': (Disabled, _BANK_FIELDS),
+    'special_needs': (SpecialNeeds, _BANK_FIELDS),
+    'special_objects': (SpecialObjects, (
+        'id', 'object_type', 'object_name', 'object_contact_phone', 'object_address',
+        'object_responsible_name', 'object_responsible_phone',
+    )),
+    'deceased': (Deceased, (
+        'id', 'deceased_date', 'deceased_place', 'deceased_reason', 'deceased_contact_name',
+        'deceased_contact_phone',
+    )),
+}
+
+# 居民特殊标识
+PROFILE_FLAGS = (
+    'is_low_income', 'is_beneficiary', 'is_disabled', 'is_special_support', 'is_key_person', 'is_deceased',
+)
+
+# 输出显示值的选项字段
+_DISPLAY_CHOICES = {
+    'object_type': dict(SpecialObjects.OBJECT_TYPE_CHOICES),
+}
+
+
+def parse_profile_ids(value):
+    """
+    解析逗号分隔的居民id列表，保持顺序并去重
+
+    Raises:
+        ValueError: id 无效、为空或超过 MAX_PROFILE_BATCH 个时抛出
+    """
+    ids = []
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            ids.append(int(item))
+        except ValueError:
+            raise ValueError(f'参数 ids 的值无效: {item}')
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValueError('请提供居民id')
+    if len(ids) > MAX_PROFILE_BATCH:
+        raise ValueError(f'一次最多查询 {MAX_PROFILE_BATCH} 个居民')
+    return ids
+
+
+def _format(key, value):
+    if key in _DISPLAY_CHOICES:
+        return _DISPLAY_CHOICES[key].get(value, value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def load_relation(model, fields, ids):
+    """
+    一次查询读取一批居民的关联记录
+
+    Returns:
+        {居民id: [记录字典]}，按记录id排序
+    """
+    paths = [field[0] if isinstance(field, tuple) else field for field in fields]
+    keys = [field[1] if isinstance(field, tuple) else field for field in fields]
+    rows = defaultdict(list)
+    for resident_id, *values in (
+        model.objects.filter(resident_id__in=ids).order_by('id').values_list('resident_id', *paths)
+    ):
+        rows[resident_id].append({key: _format(key, value) for key, value in zip(keys, values)})
+    return rows
+
+
+def get_profiles(ids, include_sensitive=False):
+    """
+    批量获取居民档案
+
+    查询次数固定为 1 + len(PROFILE_RELATIONS)，与居民数无关。
+    include_sensitive 为 False 时不输出 SENSITIVE_FIELDS 中的字段。
+
+    Returns:
+        {居民id: 档案}，不存在的id不包含在结果中
+    """
+    residents = list(Resident.objects.select_related('ethnicity').filter(id__in=ids))
+    if not residents:
+        return {}
+    ids = [resident.id for resident in residents]
+    relations = {
+        key: load_relation(
+            model, fields if include_sensitive else [field for field in fields if field not in SENSITIVE_FIELDS], ids,
+        )
+        for key, (model, fields) in PROFILE_RELATIONS.items()
+    }
+    return {resident.id: serialize_profile(resident, relations) for resident in residents}
+
+
+def serialize_profile(resident, relations):
+    """居民档案的JSON表示，relations 为 {关联键: load_relation 的结果}"""
+    profile = serialize_resident(resident)
+    profile.update({
+        'household_address': resident.household_address,
+        'own_house': resident.get_own_house_display(),
+        'registration_date': resident.registration_date.isoformat(),
+        'flags': {flag: bool(getattr(resident, flag)) for flag in PROFILE_FLAGS},
+    })
+    for key, rows in relations.items():
+        profile[key] = rows.get(resident.id, [])
+    return profile
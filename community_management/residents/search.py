@@ -0,0 +1,194 @@
+"""
+居民快速检索
+
+- 姓名：结果依次为完全匹配、前缀匹配、包含匹配。前两类使用姓名上的普通索引；
+  包含匹配在 SQLite 上使用 FTS5 虚拟表 resident_search，姓名按字拆分为词元建立索引，
+  以短语匹配连续的字。每一类都只读取到凑满条数为止，常见字也不会扫描全部匹配行。
+  PostgreSQL 使用 pg_trgm 的 GIN 索引，按相似度排序；其他数据库的包含匹配退化为 LIKE 查询。
+- 身份证号前缀：转换为 id_card 唯一索引上的范围查询。
+- 手机号后四位：使用数据库生成的 phone_tail 列及其索引。
+
+FTS 表不是 Django 模型，由迁移 0002_resident_search 创建，居民增删改时由信号同步，
+批量导入时由导入器同步，也可以通过 rebuild_resident_search 命令全量重建。
+"""
+import re
+from django.db import connection, transaction
+from .models import Resident
+from .services import RESIDENT_LIST_FIELDS
+
+SEARCH_TABLE = 'resident_search'
+
+DEFAULT_LIMIT = 20
+
+# 检索字段
+SEARCH_FIELDS = ('name', 'id_card', 'phone')
+
+PHONE_TAIL_PATTERN = re.compile(r'\d{4}')
+ID_CARD_PREFIX_PATTERN = re.compile(r'\d{6,17}[\dX]?')
+
+
+def uses_fts(using=None):
+    """当前数据库是否使用 FTS5 表检索姓名"""
+    return (using or connection).vendor == 'sqlite'
+
+
+def name_tokens(name):
+    """姓名按字拆分，以空格分隔后写入 FTS 表"""
+    return ' '.join(char for char in name if not char.isspace())
+
+
+def _match_expression(query):
+    """把查询词转换为 FTS5 短语，双引号在短语中无法转义，直接去掉"""
+    return '"{}"'.format(name_tokens(query.replace('"', '')))
+
+
+def index_residents(rows):
+    """
+    写入或更新 FTS 表中的居民姓名，非 SQLite 数据库无需处理
+
+    Args:
+        rows: (居民id, 姓名) 序列
+    """
+    if not uses_fts():
+        return
+    params = [(pk, name_tokens(name)) for pk, name in rows]
+    if params:
+        with connection.cursor() as cursor:
+            cursor.executemany(f'INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, name) VALUES (%s, %s)', params)
+
+
+def remove_residents(ids):
+    """从 FTS 表中删除居民"""
+    ids = list(ids)
+    if not uses_fts() or not ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({", ".join(["%s"] * len(ids))})', ids
+        )
+
+
+def rebuild_index(chunk_size=5000):
+    """
+    从居民表全量重建 FTS 表
+
+    Returns:
+        写入的居民数，非 SQLite 数据库返回 None
+    """
+    if not uses_fts():
+        return None
+    total = 0
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        chunk = []
+        for row in Resident.objects.order_by().values_list('id', 'name').iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                index_residents(chunk)
+                total += len(chunk)
+                chunk = []
+        index_residents(chunk)
+        total += len(chunk)
+    return total
+
+
+def _result_queryset():
+    return Resident.objects.select_related('ethnicity').only(*RESIDENT_LIST_FIELDS)
+
+
+def _prefix_range(prefix):
+    """
+    前缀对应的 [下界, 上界) 范围
+
+    startswith 在 SQLite 上会生成带 ESCAPE 的 LIKE，无法使用索引，改写为范围查询。
+    """
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _fts_ids(query, limit, exclude):
+    where = f'{SEARCH_TABLE} MATCH %s'
+    params = [_match_expression(query)]
+    if exclude:
+        where += f' AND rowid NOT IN ({", ".join(["%s"] * len(exclude))})'
+        params.extend(exclude)
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT rowid FROM {SEARCH_TABLE} WHERE {where} LIMIT %s', params + [limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_by_name(query, limit=DEFAULT_LIMIT):
+    """按姓名检索，依次返回完全匹配、前缀匹配、包含匹配的居民"""
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramSimilarity
+        return list(
+            _result_queryset().filter(name__icontains=query)
+            .annotate(similarity=TrigramSimilarity('name', query))
+            .order_by('-similarity', 'id')[:limit]
+        )
+
+    ids = list(Resident.objects.filter(name=query).order_by('id').values_list('id', flat=True)[:limit])
+    if len(ids) < limit:
+        lower, upper = _prefix_range(query)
+        ids += Resident.objects.filter(name__gt=lower, name__lt=upper).order_by('name', 'id').values_list(
+            'id', flat=True
+        )[:limit - len(ids)]
+    if len(ids) < limit:
+        if uses_fts():
+            ids += _fts_ids(query, limit - len(ids), ids)
+        else:
+            ids += Resident.objects.filter(name__contains=query).exclude(id__in=ids).order_by('id').values_list(
+                'id', flat=True
+            )[:limit - len(ids)]
+    residents = _result_queryset().in_bulk(ids)
+    return [residents[pk] for pk in ids if pk in residents]
+
+
+def search_by_id_card(prefix, limit=DEFAULT_LIMIT):
+    """按身份证号前缀检索"""
+    lower, upper = _prefix_range(prefix.upper())
+    return list(_result_queryset().filter(id_card__gte=lower, id_card__lt=upper).order_by('id_card')[:limit])
+
+
+def search_by_phone_tail(tail, limit=DEFAULT_LIMIT):
+    """按手机号后四位检索"""
+    return list(_result_queryset().filter(phone_tail=tail).order_by('-id')[:limit])
+
+
+def detect_field(query):
+    """根据查询词的形式判断检索字段：4位数字为手机号后四位，6位以上数字为身份证号前缀，其余为姓名"""
+    if PHONE_TAIL_PATTERN.fullmatch(query):
+        return 'phone'
+    if ID_CARD_PREFIX_PATTERN.fullmatch(query.upper()):
+        return 'id_card'
+    return 'name'
+
+
+def search_residents(query, field=None, limit=DEFAULT_LIMIT):
+    """
+    居民检索
+
+    Args:
+        query: 查询词
+        field: 检索字段，取值见 SEARCH_FIELDS，为空时由 detect_field 判断
+        limit: 最多返回条数
+
+    Returns:
+        (检索字段, 居民列表)
+
+    Raises:
+        ValueError: 查询词或检索字段无效时抛出
+    """
+    query = (query or '').strip()
+    if not query:
+        raise ValueError('请输入查询内容')
+    field = field or detect_field(query)
+    if field not in SEARCH_FIELDS:
+        raise ValueError(f'不支持的检索字段: {field}')
+    if field == 'phone':
+        if not PHONE_TAIL_PATTERN.fullmatch(query):
+            raise ValueError('手机号检索需要输入后四位数字')
+        return field, search_by_phone_tail(query, limit)
+    if field == 'id_card':
+        return field, search_by_id_card(query, limit)
+    return field, search_by_name(query, limit)
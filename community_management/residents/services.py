@@ -0,0 +1,87 @@
+from community_management.pagination import DEFAULT_PAGE_SIZE
+from .models import Resident
+
+# 列表接口允许的筛选字段（均已建立索引），值为参数转换函数
+RESIDENT_FILTERS = {
+    'name': str,
+    'ethnicity': int,
+    'political_affiliation': int,
+    'population_type': int,
+    'residential_type': int,
+    'marital_status': int,
+    'education_level': int,
+}
+
+# 列表接口返回的字段
+RESIDENT_LIST_FIELDS = (
+    'id', 'name', 'id_card', 'gender', 'birth_date', 'ethnicity__name', 'political_affiliation',
+    'phone_number', 'marital_status', 'education_level', 'population_type', 'residential_type',
+    'last_update_time',
+)
+
+def parse_resident_filters(params):
+    """
+    从请求参数中解析筛选条件
+
+    Raises:
+        ValueError: 参数值无法转换时抛出
+    """
+    filters = {}
+    for field, convert in RESIDENT_FILTERS.items():
+        value = params.get(field)
+        if value in (None, ''):
+            continue
+        try:
+            filters[field] = convert(value)
+        except ValueError:
+            raise ValueError(f'参数 {field} 的值无效: {value}')
+    return filters
+
+
+def list_residents(filters=None, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    按主键倒序分页获取居民列表（键集分页）
+
+    通过 id < cursor 定位下一页而不是OFFSET，任意深度的翻页都只读取 page_size+1 行。
+
+    Args:
+        filters: parse_resident_filters 返回的筛选条件
+        cursor: 上一页最后一条记录的id，为空表示第一页
+        page_size: 每页条数
+
+    Returns:
+        (居民列表, 下一页游标)，没有下一页时游标为 None
+    """
+    queryset = (
+        Resident.objects.select_related('ethnicity')
+        .only(*RESIDENT_LIST_FIELDS)
+        .filter(**(filters or {}))
+    )
+    if cursor is not None:
+        queryset = queryset.filter(id__lt=cursor)
+    residents = list(queryset.order_by('-id')[:page_size + 1])
+
+    next_cursor = None
+    if len(residents) > page_size:
+        residents = residents[:page_size]
+        next_cursor = residents[-1].id
+    return residents, next_cursor
+
+
+def serialize_resident(resident):
+    """居民列表项的JSON表示"""
+    return {
+        'id': resident.id,
+        'name': resident.name,
+        'id_card': resident.id_card,
+        'gender': resident.get_gender_display(),
+        'birth_date': resident.birth_date.isoformat(),
+        'ethnicity': resident.ethnicity.name,
+        'political_affiliation': resident.get_political_affiliation_display(),
+        'phone_number': resident.phone_number,
+        'marital_status': resident.get_marital_status_display(),
+        'education_level': resident.get_education_level_display(),
+        'population_type': resident.get_population_type_display(),
+        'residential_type': resident.get_residential_type_display(),
+        'last_update_time': resident.last_update_time.isoformat(),
+    }
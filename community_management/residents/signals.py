@@ -0,0 +1,107 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from index import versions
+from . import crosstab, search
+from .consistency import DETAIL_FLAGS, sync_flag
+from .models import Ethnicity, Resident
+
+
+def resident_values(instance, fields):
+    return {field: getattr(instance, field) for field in fields}
+
+
+@receiver(pre_save, sender=Resident)
+def remember_previous_values(sender, instance, raw=False, **kwargs):
+    """
+    保存前读取居民在数据库中的原值，存放在 instance._previous_values 中，
+    供各汇总数据的 post_save 处理函数计算增量，新增居民时为 None
+    """
+    instance._previous_values = None
+    if raw or instance._state.adding:
+        return
+    instance._previous_values = (
+        sender.objects.filter(pk=instance.pk).values(*[field.attname for field in sender._meta.concrete_fields]).first()
+    )
+
+
+@receiver(post_save, sender=Resident)
+def update_crosstab(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    crosstab.record_change(
+        old_values=getattr(instance, '_previous_values', None),
+        new_values=resident_values(instance, crosstab.CUBE_FIELDS),
+    )
+
+
+@receiver(post_delete, sender=Resident)
+def remove_from_crosstab(sender, instance, **kwargs):
+    crosstab.record_change(old_values=resident_values(instance, crosstab.CUBE_FIELDS))
+
+
+@receiver(post_save, sender=Resident)
+def update_search_index(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_values', None)
+    if created or previous is None or previous['name'] != instance.name:
+        search.index_residents([(instance.pk, instance.name)])
+
+
+@receiver(post_delete, sender=Resident)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_residents([instance.pk])
+
+
+@receiver(post_save, sender=Ethnicity)
+@receiver(post_delete, sender=Ethnicity)
+def refresh_crosstab_labels(sender, **kwargs):
+    """民族名称变化后重建交叉统计立方体"""
+    versions.bump(versions.CROSSTAB)
+
+
+def _sync_detail_flag(sender, instance, value, resident_id=None):
+    flag = DETAIL_FLAGS[sender]
+    with transaction.atomic():
+        sync_flag(resident_id or instance.resident_id, flag, value)
+    # 调用方持有的居民对象同步新值，避免其后续保存或删除时按旧值计算统计增量
+    if resident_id is None and sender.resident.is_cached(instance):
+        setattr(instance.resident, flag, value)
+
+
+def remember_previous_resident(sender, instance, raw=False, update_fields=None, **kwargs):
+    """保存前读取明细原来所属的居民，存放在 instance._previous_resident_id 中，新增或未改写居民时为 None"""
+    instance._previous_resident_id = None
+    if raw or instance._state.adding or (update_fields is not None and 'resident' not in update_fields):
+        return
+    instance._previous_resident_id = (
+        sender.objects.filter(pk=instance.pk).values_list('resident_id', flat=True).first()
+    )
+
+
+def set_detail_flag(sender, instance, created, raw=False, **kwargs):
+    """
+    新增特殊人群明细时标记居民，调用方在事务中写入明细时随之提交或回滚；
+    明细改为属于另一名居民时标记新居民，原居民没有其他该类明细时清除其标识
+    """
+    if raw:
+        return
+    previous = getattr(instance, '_previous_resident_id', None)
+    moved = previous is not None and previous != instance.resident_id
+    if created or moved:
+        _sync_detail_flag(sender, instance, 1)
+    if moved and not sender.objects.filter(resident_id=previous).exists():
+        _sync_detail_flag(sender, instance, 0, resident_id=previous)
+
+
+def clear_detail_flag(sender, instance, origin=None, **kwargs):
+    """删除居民最后一条该类明细时清除标识，随居民级联删除时跳过"""
+    if isinstance(origin, Resident) or getattr(origin, 'model', None) is Resident:
+        return
+    if not sender.objects.filter(resident_id=instance.resident_id).exists():
+        _sync_detail_flag(sender, instance, 0)
+
+
+for detail_model in DETAIL_FLAGS:
+    pre_save.connect(remember_previous_resident, sender=detail_model)
+    post_save.connect(set_detail_flag, sender=detail_model)
+    post_delete.connect(clear_detail_flag, sender=detail_model)
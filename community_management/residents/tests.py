@@ -1,3 +1,556 @@
+import importlib.util
+from datetime import date, datetime
+from unittest import mock, skipUnless
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
 from django.test import TestCase
+from django.utils import timezone
+from admins import permissions
+from admins.models import Permission, Role
+from index import versions
+from index.models import DashboardSnapshot
+from .cohorts import _seconds_until_midnight, age_distribution, birthday_ranges, birthday_window, get_milestones, milestones
+from .consistency import find_mismatches, reconcile
+from . import crosstab
+from .crosstab import get_cube
+from .importer import ResidentImporter
+from address.models import Apartment, Community, Group, House, Hutong, Unit
+from .models import Building, Bungalow, Deceased, Ethnicity, LowIncome, Resident, Disabled, SpecialObjects
+from .profiles import MAX_PROFILE_BATCH, PROFILE_RELATIONS, get_profiles
+from .services import list_residents
 
-# Create your tests here.
+
+def create_resident(ethnicity, index, **fields):
+    """创建测试用居民"""
+    return Resident.objects.create(
+        name=fields.pop('name', f'居民{index}'),
+        id_card=f'11010119900101{index:04d}',
+        birth_date=fields.pop('birth_date', date(1990, 1, 1)),
+        ethnicity=ethnicity,
+        household_address='北京',
+        phone_number=fields.pop('phone_number', f'1380000{index:04d}'),
+        **fields
+    )
+
+
+class ResidentListApiTests(TestCase):
+    """居民列表接口测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.han = Ethnicity.objects.create(name='汉族')
+        cls.hui = Ethnicity.objects.create(name='回族')
+        cls.residents = [
+            create_resident(cls.han if i % 2 else cls.hui, i, education_level=i % 3)
+            for i in range(7)
+        ]
+
+    def setUp(self):
+        session = self.client.session
+        session['admin_id'] = 1
+        session.save()
+
+    def test_keyset_pages_cover_all_rows(self):
+        seen, cursor = [], None
+        while True:
+            params = {'page_size': 3}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get('/residents/api/', params).json()
+            seen.extend(item['id'] for item in data['data'])
+            cursor = data['next_cursor']
+            if not data['has_more']:
+                break
+        self.assertEqual(seen, sorted((r.id for r in self.residents), reverse=True))
+
+    def test_filters(self):
+        data = self.client.get(
+            '/residents/api/', {'ethnicity': self.han.id, 'education_level': 1}
+        ).json()
+        self.assertEqual([item['name'] for item in data['data']], ['居民1'])
+        self.assertEqual(data['data'][0]['ethnicity'], '汉族')
+
+    def test_invalid_filter(self):
+        response = self.client.get('/residents/api/', {'marital_status': 'x'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+
+    def test_page_is_single_query(self):
+        with self.assertNumQueries(1):
+            items, cursor = list_residents({'education_level': 0}, cursor=self.residents[-1].id, page_size=2)
+            [item.ethnicity.name for item in items]
+        self.assertEqual(len(items), 2)
+
+
+class ResidentImportTests(TestCase):
+    """居民批量导入测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.han = Ethnicity.objects.create(name='汉族')
+        create_resident(cls.han, 1)
+        cls.role = Role.objects.create(name='录入员')
+        cls.role.permissions.set(Permission.objects.filter(codename='residents.import'))
+
+    def setUp(self):
+        permissions.invalidate()
+        session = self.client.session
+        session['admin_id'] = 1
+        session['role_id'] = self.role.id
+        session.save()
+
+    def test_import_csv_upload(self):
+        content = '\n'.join([
+            '居民姓名,身份证号,出生日期,民族,户籍地址,联系方式,性别,学历',
+            '张三,110101199001010011,1990-01-01,汉族,北京,13800000011,男,本科',
+            '李四,110101199001010012,1990/02/01,汉族,北京,13800000012,女,5',
+            '重复,110101199001010001,1990-01-01,汉族,北京,13800000013,男,本科',
+            '王五,110101199001010014,1990-01-01,火星族,北京,13800000014,男,本科',
+            '赵六,110101199001010012,1990-01-01,汉族,北京,13800000015,男,博士',
+        ]).encode('utf-8')
+        response = self.client.post('/residents/import/', {
+            'file': SimpleUploadedFile('residents.csv', content, content_type='text/csv'),
+            'batch_size': 1,
+        })
+        data = response.json()['data']
+        self.assertEqual((data['total'], data['created'], data['failed']), (5, 2, 3))
+        self.assertEqual([error['row'] for error in data['errors']], [4, 5, 6])
+        self.assertEqual(Resident.objects.get(id_card='110101199001010012').education_level, 5)
+        self.assertEqual(Resident.objects.get(name='李四').gender, 1)
+
+    @skipUnless(importlib.util.find_spec('openpyxl'), '需要安装openpyxl')
+    def test_import_rejects_corrupt_xlsx(self):
+        for content in (b'not a workbook', b'PK\x03\x04broken'):
+            response = self.client.post('/residents/import/', {
+                'file': SimpleUploadedFile('residents.xlsx', content),
+            })
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['success'], False)
+            self.assertIn('XLSX', response.json()['error'])
+
+    def test_batches_use_bulk_create(self):
+        rows = [
+            {'name': f'居民{i}', 'id_card': f'1101011990010120{i:02d}', 'birth_date': '1990-01-01',
+             'ethnicity': '汉族', 'household_address': '北京', 'phone_number': '13800000000'}
+            for i in range(10)
+        ]
+        importer = ResidentImporter(batch_size=4)
+        # 每批：保存点四条 + bulk_create一条 + 日汇总行及总数表更新两条 + 交叉统计版本号一条 + 写入检索表一条
+        with self.assertNumQueries(3 * 9):
+            report = importer.run(rows)
+        self.assertEqual(report.created, 10)
+
+
+class ResidentExportTests(TestCase):
+    """居民数据导出测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        han = Ethnicity.objects.create(name='汉族')
+        for i in range(5):
+            create_resident(han, i, political_affiliation=1, education_level=5)
+        Disabled.objects.create(
+            resident=Resident.objects.get(name='居民2'), authentication_date=timezone.now(),
+            bank_account_number='6222000000000001', bank_account_name='居民2',
+        )
+        cls.role = Role.objects.create(name='统计员')
+        cls.role.permissions.set(Permission.objects.filter(codename='residents.export'))
+
+    def setUp(self):
+        permissions.invalidate()
+        session = self.client.session
+        session['admin_id'] = 1
+        session['role_id'] = self.role.id
+        session.save()
+
+    def test_csv_export_decodes_choices(self):
+        response = self.client.get('/residents/export/residents/')
+        with self.assertNumQueries(1):
+            content = b''.join(response.streaming_content).decode('utf-8-sig')
+        lines = content.splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(lines[0].startswith('ID,居民姓名,身份证号,性别,出生日期,民族,政治面貌'))
+        self.assertIn(',男,1990-01-01,汉族,中共党员,', lines[1])
+        self.assertIn(',本科,', lines[1])
+
+    def test_detail_export_joins_resident(self):
+        response = self.client.get('/residents/export/disabled/')
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['居民ID', '居民姓名', '身份证号'])
+        self.assertIn('居民2', lines[1])
+
+    def test_unknown_table(self):
+        self.assertEqual(self.client.get('/residents/export/unknown/').status_code, 404)
+
+
+class ResidentCrossTabTests(TestCase):
+    """居民交叉统计测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.han = Ethnicity.objects.create(name='汉族')
+        cls.hui = Ethnicity.objects.create(name='回族')
+        today = timezone.localdate()
+        create_resident(cls.han, 1, education_level=5, birth_date=today.replace(year=today.year - 30))
+        create_resident(cls.han, 2, education_level=5, birth_date=today.replace(year=today.year - 65))
+        create_resident(cls.hui, 3, education_level=2, birth_date=today.replace(year=today.year - 10))
+        create_resident(cls.hui, 4, education_level=2, is_deceased=1)
+
+    def setUp(self):
+        # 测试之间数据库及版本号会回滚，丢弃本进程的立方体
+        crosstab.reset()
+        session = self.client.session
+        session['admin_id'] = 1
+        session.save()
+
+    def test_pivot_from_cube(self):
+        cube = get_cube()
+        with self.assertNumQueries(0):
+            rows = cube.pivot(['ethnicity', 'education_level'])
+        self.assertEqual(sorted((row['ethnicity'], row['education_level'], row['count']) for row in rows), [
+            ('回族', '初中', 1), ('汉族', '本科', 2),
+        ])
+        self.assertEqual(
+            [(row['age_band'], row['count']) for row in cube.pivot(['age_band'], {'ethnicity': self.han.id})],
+            [('18-34岁', 1), ('60-69岁', 1)],
+        )
+
+    def test_incremental_refresh(self):
+        cube = get_cube()
+        resident = Resident.objects.get(name='居民1')
+        resident.education_level = 6
+        with self.captureOnCommitCallbacks(execute=True):
+            resident.save()
+            Resident.objects.get(name='居民3').delete()
+        # 只读取版本号，增量已在提交后计入
+        with self.assertNumQueries(1):
+            self.assertIs(get_cube(), cube)
+        rows = cube.pivot(['education_level'])
+        self.assertEqual(sorted((row['education_level'], row['count']) for row in rows), [('本科', 1), ('研究生', 1)])
+
+    def test_rolled_back_change_not_counted(self):
+        cube = get_cube()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, transaction.atomic():
+            Resident.objects.get(name='居民1').delete()
+            transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+        self.assertIs(get_cube(), cube)
+        self.assertEqual(sum(row['count'] for row in cube.pivot(['gender'])), 3)
+
+    def test_version_change_rebuilds_cube(self):
+        # 其他进程提交的变更只体现为版本号递增
+        cube = get_cube()
+        versions.bump(versions.CROSSTAB)
+        self.assertIsNot(get_cube(), cube)
+
+    def test_crosstab_api(self):
+        data = self.client.get('/residents/crosstab/', {'dims': 'gender,population_type'}).json()
+        self.assertEqual(data['total'], 3)
+        response = self.client.get('/residents/crosstab/', {'dims': 'a,b,c,d'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ResidentSearchTests(TestCase):
+    """居民快速检索测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        han = Ethnicity.objects.create(name='汉族')
+        create_resident(han, 1, name='张三丰')
+        create_resident(han, 2, name='张三', phone_number='13900001234')
+        create_resident(han, 3, name='李四')
+
+    def setUp(self):
+        session = self.client.session
+        session['admin_id'] = 1
+        session.save()
+
+    def search(self, q, **params):
+        return self.client.get('/residents/search/', {'q': q, **params}).json()
+
+    def test_name_substring_ranked(self):
+        data = self.search('张三')
+        self.assertEqual(data['field'], 'name')
+        self.assertEqual([row['name'] for row in data['data']], ['张三', '张三丰'])
+        self.assertEqual([row['name'] for row in self.search('三丰')['data']], ['张三丰'])
+
+    def test_id_card_prefix_and_phone_tail(self):
+        data = self.search('1101011990010100')
+        self.assertEqual(data['field'], 'id_card')
+        self.assertEqual(len(data['data']), 3)
+        data = self.search('1234')
+        self.assertEqual(data['field'], 'phone')
+        self.assertEqual([row['name'] for row in data['data']], ['张三'])
+
+    def test_index_follows_changes(self):
+        resident = Resident.objects.get(name='李四')
+        resident.name = '王五'
+        resident.save()
+        self.assertEqual(self.search('李四')['data'], [])
+        self.assertEqual([row['name'] for row in self.search('王五')['data']], ['王五'])
+        resident.delete()
+        self.assertEqual(self.search('王五')['data'], [])
+
+    def test_invalid_query(self):
+        self.assertEqual(self.client.get('/residents/search/', {'q': ' '}).status_code, 400)
+        self.assertEqual(self.client.get('/residents/search/', {'q': '张', 'field': 'x'}).status_code, 400)
+
+
+class ResidentProfileTests(TestCase):
+    """居民档案接口测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        han = Ethnicity.objects.create(name='汉族')
+        group = Group.objects.create(group_number='1组')
+        community = Community.objects.create(community_name='幸福小区', community_number='1', group=group)
+        apartment = Apartment.objects.create(community=community, apartment_number=3)
+        unit = Unit.objects.create(apartment=apartment, unit_number=2)
+        house = House.objects.create(unit=unit, house_number='101')
+        hutong = Hutong.objects.create(hutong_name='东四胡同', group=group, hutong_number='1')
+        now = timezone.now()
+        cls.residents = []
+        for i in range(4):
+            resident = create_resident(han, i, is_low_income=1, is_key_person=1, is_deceased=int(i == 0))
+            Building.objects.create(resident=resident, building_number=3, house_number=house)
+            Bungalow.objects.create(resident=resident, bungalow_number=f'{i}号', hutong=hutong)
+            LowIncome.objects.create(
+                resident=resident, authentication_date=now, bank_account_number=f'621{i}', bank_account_name=resident.name,
+            )
+            SpecialObjects.objects.create(
+                resident=resident, object_type=1, object_name=resident.name, object_contact_phone='1',
+                object_address='北京', object_responsible_name='李四', object_responsible_phone='2',
+            )
+            cls.residents.append(resident)
+        Deceased.objects.create(
+            resident=cls.residents[0], deceased_date=now, deceased_place='医院', deceased_reason='疾病',
+            deceased_contact_name='王五', deceased_contact_phone='3',
+        )
+
+    def setUp(self):
+        permissions.invalidate()
+        session = self.client.session
+        session['admin_id'] = 1
+        session.save()
+
+    def test_profile(self):
+        resident = self.residents[0]
+        data = self.client.get(f'/residents/api/{resident.id}/').json()['data']
+        self.assertEqual(data['name'], '居民0')
+        self.assertTrue(data['flags']['is_deceased'])
+        self.assertEqual(data['buildings'][0]['address'], '幸福小区 - 3栋-2单元-101')
+        self.assertEqual(data['bungalows'][0]['hutong'], '东四胡同')
+        self.assertEqual(set(data['low_income'][0]), {'id', 'authentication_date'})
+        self.assertEqual(data['special_objects'][0]['object_type'], '新疆')
+        self.assertEqual(data['deceased'][0]['deceased_place'], '医院')
+        self.assertEqual(data['disabled'], [])
+        self.assertEqual(self.client.get('/residents/api/999999/').status_code, 404)
+
+    def test_bank_accounts_require_permission(self):
+        role = Role.objects.create(name='民政专员')
+        role.permissions.set(Permission.objects.filter(codename='residents.view_sensitive'))
+        session = self.client.session
+        session['role_id'] = role.id
+        session.save()
+        resident = self.residents[0]
+        data = self.client.get(f'/residents/api/{resident.id}/').json()['data']
+        self.assertEqual(data['low_income'][0]['bank_account_number'], '6210')
+        data = self.client.get('/residents/api/profiles/', {'ids': resident.id}).json()['data']
+        self.assertEqual(data[0]['low_income'][0]['bank_account_name'], '居民0')
+
+    def test_batch_queries_fixed(self):
+        ids = [resident.id for resident in self.residents]
+        with self.assertNumQueries(1 + len(PROFILE_RELATIONS)):
+            get_profiles(ids[:1])
+        with self.assertNumQueries(1 + len(PROFILE_RELATIONS)):
+            profiles = get_profiles(ids)
+        self.assertEqual(len(profiles), 4)
+
+    def test_batch_api(self):
+        ids = [resident.id for resident in reversed(self.residents)]
+        data = self.client.get('/residents/api/profiles/', {'ids': ','.join(map(str, ids + [999999]))}).json()
+        self.assertEqual([profile['id'] for profile in data['data']], ids)
+        self.assertEqual(data['missing'], [999999])
+
+        too_many = ','.join(str(i) for i in range(MAX_PROFILE_BATCH + 1))
+        self.assertEqual(self.client.get('/residents/api/profiles/', {'ids': too_many}).status_code, 400)
+        self.assertEqual(self.client.get('/residents/api/profiles/', {'ids': 'a'}).status_code, 400)
+
+
+class ResidentConsistencyTests(TestCase):
+    """居民标识与特殊人群明细一致性测试"""
+
+    def setUp(self):
+        cache.clear()
+        han = Ethnicity.objects.create(name='汉族')
+        self.residents = [create_resident(han, i) for i in range(3)]
+
+    def create_disabled(self, resident):
+        return Disabled.objects.create(
+            resident=resident, authentication_date=timezone.now(),
+            bank_account_number=f'623{resident.id}', bank_account_name=resident.name,
+        )
+
+    def disabled_total(self):
+        return sum(DashboardSnapshot.objects.values_list('disabled', flat=True))
+
+    def test_hooks_sync_flag(self):
+        resident = self.residents[0]
+        first = self.create_disabled(resident)
+        resident.refresh_from_db()
+        self.assertEqual(resident.is_disabled, 1)
+        self.assertEqual(self.disabled_total(), 1)
+
+        first.delete()
+        resident.refresh_from_db()
+        self.assertEqual(resident.is_disabled, 0)
+        self.assertEqual(self.disabled_total(), 0)
+
+        # 随居民级联删除明细时不再单独修改居民
+        self.create_disabled(resident)
+        resident.delete()
+        self.assertEqual(self.disabled_total(), 0)
+        self.assertFalse(Disabled.objects.exists())
+
+    def test_moving_detail_moves_flag(self):
+        first, second, third = self.residents
+        detail = self.create_disabled(first)
+        other = self.create_disabled(third)
+        detail.resident = second
+        detail.save()
+        self.assertEqual(
+            list(Resident.objects.order_by('id').values_list('is_disabled', flat=True)), [0, 1, 1],
+        )
+        self.assertEqual(self.disabled_total(), 2)
+
+        # 原居民还有其他明细时保留标识
+        detail.resident = third
+        detail.save()
+        other.resident = first
+        other.save()
+        self.assertEqual(
+            list(Resident.objects.order_by('id').values_list('is_disabled', flat=True)), [1, 0, 1],
+        )
+        self.assertEqual(self.disabled_total(), 2)
+        # 未改写居民的保存不读取原值
+        with self.assertNumQueries(1):
+            detail.save(update_fields=['bank_account_name'])
+
+    def test_reconcile(self):
+        with_detail, flagged, consistent = self.residents
+        self.create_disabled(with_detail)
+        self.create_disabled(consistent)
+        Resident.objects.filter(pk=with_detail.pk).update(is_disabled=0)
+        Resident.objects.filter(pk=flagged.pk).update(is_disabled=1, is_deceased=1)
+
+        report = find_mismatches()
+        self.assertEqual(report['is_disabled']['missing_flag_ids'], [with_detail.id])
+        self.assertEqual(report['is_disabled']['missing_detail_ids'], [flagged.id])
+        self.assertEqual(report['is_deceased']['missing_detail'], 1)
+        self.assertEqual(report['is_low_income']['missing_flag'], 0)
+
+        self.assertEqual(reconcile(clear=False)['is_disabled'], {'set': 1, 'cleared': 0})
+        counts = reconcile()
+        self.assertEqual(counts['is_disabled'], {'set': 0, 'cleared': 1})
+        self.assertEqual(counts['is_deceased'], {'set': 0, 'cleared': 1})
+        self.assertEqual(
+            list(Resident.objects.order_by('id').values_list('is_disabled', flat=True)), [1, 0, 1],
+        )
+        self.assertEqual(self.disabled_total(), 2)
+        self.assertFalse(any(row['missing_flag'] or row['missing_detail'] for row in find_mismatches().values()))
+
+
+class ResidentCohortTests(TestCase):
+    """居民生日及年龄段查询测试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        han = Ethnicity.objects.create(name='汉族')
+        births = [
+            date(1965, 12, 30), date(1966, 1, 2), date(1964, 2, 29), date(1990, 3, 1), date(1965, 12, 31),
+        ]
+        cls.residents = [
+            create_resident(han, i, birth_date=birth, is_deceased=int(i == 4)) for i, birth in enumerate(births)
+        ]
+        groups = [Group.objects.create(group_number=f'{i}组') for i in range(2)]
+        for i, resident in enumerate(cls.residents[:4]):
+            community, _ = Community.objects.get_or_create(
+                community_name=f'小区{i % 3}', defaults={'community_number': str(i % 3), 'group': groups[i % 3 // 2]},
+            )
+            apartment = Apartment.objects.create(community=community, apartment_number=i)
+            house = House.objects.create(unit=Unit.objects.create(apartment=apartment, unit_number=1), house_number='101')
+            Building.objects.create(resident=resident, building_number=i, house_number=house)
+
+    def setUp(self):
+        cache.clear()
+        session = self.client.session
+        session['admin_id'] = 1
+        session.save()
+
+    def test_birthday_window_across_year_end(self):
+        self.assertEqual(birthday_ranges(date(2025, 12, 28), 7), [(1228, 1231), (101, 103)])
+        rows = birthday_window(date(2025, 12, 28), 7)
+        # 已故居民不计入，按生日先后排列
+        self.assertEqual([row['id'] for row in rows], [self.residents[0].id, self.residents[1].id])
+        self.assertEqual((rows[0]['birthday'], rows[0]['age'], rows[0]['days_until']), ('2025-12-30', 60, 2))
+        self.assertEqual((rows[1]['birthday'], rows[1]['age']), ('2026-01-02', 60))
+        self.assertEqual(len(birthday_window(date(2025, 12, 28), 7, limit=1)), 1)
+
+    def test_leap_day_birthday(self):
+        self.assertEqual(birthday_ranges(date(2025, 2, 25), 4), [(225, 229)])
+        rows = milestones(date(2025, 2, 25), 4, ages=(61,))
+        self.assertEqual([(row['id'], row['birthday']) for row in rows], [(self.residents[2].id, '2025-02-28')])
+        self.assertEqual(milestones(date(2025, 3, 1), 1, ages=(61,)), [])
+        self.assertEqual([row['id'] for row in milestones(date(2024, 2, 29), 1, ages=(60,))], [self.residents[2].id])
+
+    def test_milestones(self):
+        rows = milestones(date(2025, 12, 1), 31)
+        self.assertEqual([row['id'] for row in rows], [self.residents[0].id])
+        self.assertEqual(milestones(date(2026, 12, 1), 31), [])
+
+    @skipUnless(connection.vendor == 'sqlite', '执行计划格式依赖SQLite')
+    def test_window_uses_birthday_index(self):
+        queryset = Resident.objects.filter(is_deceased=0, birth_month_day__range=(1201, 1231), birth_date__range=(
+            date(1965, 12, 1), date(1965, 12, 31),
+        )).order_by('birth_month_day', 'birth_date', 'id')
+        plan = queryset.explain()
+        self.assertIn('idx_resident_birthday', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_milestones_api_cached_daily(self):
+        today = timezone.localdate()
+        turning = create_resident(Ethnicity.objects.first(), 9, birth_date=today.replace(year=today.year - 70))
+        data = self.client.get('/residents/milestones/', {'days': 1}).json()
+        self.assertEqual([(row['id'], row['age'], row['days_until']) for row in data['data']], [(turning.id, 70, 0)])
+        with self.assertNumQueries(0):
+            get_milestones(1)
+        # 单个居民修改不使按天缓存失效
+        with self.captureOnCommitCallbacks(execute=True):
+            turning.save()
+        with self.assertNumQueries(0):
+            get_milestones(1)
+        self.assertEqual(self.client.get('/residents/milestones/', {'days': 40}).status_code, 400)
+
+    def test_daily_cache_expires_at_midnight(self):
+        now = timezone.make_aware(datetime(2025, 6, 1, 23, 59, 30))
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            self.assertEqual(_seconds_until_midnight(), 30)
+
+    def test_birthdays_api(self):
+        data = self.client.get('/residents/birthdays/', {'start': '2025-12-28', 'days': 7}).json()
+        self.assertEqual(len(data['data']), 2)
+        self.assertEqual(self.client.get('/residents/birthdays/', {'start': '2025-13-01'}).status_code, 400)
+
+    def test_age_distribution(self):
+        today = date(2025, 6, 1)
+        by_community = {row['name']: row for row in age_distribution('community', today)}
+        self.assertEqual(by_community['小区0']['total'], 2)
+        self.assertEqual(by_community['小区0']['bands']['35-59岁'], 2)
+        self.assertEqual(by_community['小区2']['bands']['60-69岁'], 1)
+        by_group = {row['name']: row['total'] for row in age_distribution('group', today)}
+        self.assertEqual(by_group, {'0组': 3, '1组': 1})
+
+        data = self.client.get('/residents/age-distribution/', {'by': 'group'}).json()
+        self.assertEqual(sum(row['total'] for row in data['data']), 4)
+        self.assertEqual(self.client.get('/residents/age-distribution/', {'by': 'street'}).status_code, 400)
@@ -1,6 +1,19 @@
 from django.urls import path
-from .views import residents
+from .views import (
+    residents, resident_list_api, resident_import, resident_export, resident_crosstab, resident_search,
+    resident_profile, resident_profiles, resident_birthdays, resident_milestones, resident_age_distribution,
+)
 
 urlpatterns = [
     path('', residents, name='residents'),
+    path('api/', resident_list_api, name='resident_list_api'),
+    path('api/<int:resident_id>/', resident_profile, name='resident_profile'),
+    path('api/profiles/', resident_profiles, name='resident_profiles'),
+    path('import/', resident_import, name='resident_import'),
+    path('export/<str:table>/', resident_export, name='resident_export'),
+    path('crosstab/', resident_crosstab, name='resident_crosstab'),
+    path('search/', resident_search, name='resident_search'),
+    path('birthdays/', resident_birthdays, name='resident_birthdays'),
+    path('milestones/', resident_milestones, name='resident_milestones'),
+    path('age-distribution/', resident_age_distribution, name='resident_age_distribution'),
 ]
@@ -1,6 +1,185 @@
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.views.decorators.http import require_POST
+from admins.permissions import has_permissions
+from community_management.export import export_response
+from community_management.pagination import parse_page_size
+from login.views import check_permission
+from .cohorts import (
+    DISTRIBUTION_GROUPS, MILESTONE_DAYS, birthday_window, get_age_distribution, get_milestones, parse_days, parse_start,
+)
+from .crosstab import get_cube, parse_pivot_params
+from .exports import RESIDENT_EXPORTS
+from .importer import DEFAULT_BATCH_SIZE, ResidentImporter, iter_rows
+from .profiles import SENSITIVE_PERMISSION, get_profiles, parse_profile_ids
+from .search import search_residents
+from .services import list_residents, parse_resident_filters, serialize_resident
 
 # Create your views here.
 def residents(request):
     return render(request, 'residents/residents.html')
 
+
+@check_permission()
+def resident_list_api(request):
+    """
+    居民列表接口
+    支持按已建索引的字段筛选，使用 cursor 参数进行键集分页
+    """
+    try:
+        filters = parse_resident_filters(request.GET)
+        page_size = parse_page_size(request.GET.get('page_size'))
+        cursor = request.GET.get('cursor')
+        cursor = int(cursor) if cursor else None
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    items, next_cursor = list_residents(filters, cursor, page_size)
+    return JsonResponse({
+        'success': True,
+        'data': [serialize_resident(resident) for resident in items],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+    })
+
+
+def _can_view_sensitive(request):
+    return has_permissions(request.session.get('role_id'), {SENSITIVE_PERMISSION})
+
+
+@check_permission()
+def resident_profile(request, resident_id):
+    """居民档案：基本信息、住址关联及各特殊人群明细，银行账户仅对有查看敏感信息权限的角色输出"""
+    profile = get_profiles([resident_id], _can_view_sensitive(request)).get(resident_id)
+    if profile is None:
+        return JsonResponse({'success': False, 'error': '居民不存在'}, status=404)
+    return JsonResponse({'success': True, 'data': profile})
+
+
+@check_permission()
+def resident_profiles(request):
+    """
+    批量获取居民档案
+    ids 为逗号分隔的居民id，最多1000个；结果按 ids 的顺序返回，不存在的id列在 missing 中
+    """
+    try:
+        ids = parse_profile_ids(request.GET.get('ids'))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    profiles = get_profiles(ids, _can_view_sensitive(request))
+    return JsonResponse({
+        'success': True,
+        'data': [profiles[resident_id] for resident_id in ids if resident_id in profiles],
+        'missing': [resident_id for resident_id in ids if resident_id not in profiles],
+    })
+
+
+@require_POST
+@check_permission('residents.import')
+def resident_import(request):
+    """
+    居民批量导入
+    上传字段 file 为CSV或XLSX文件，可选参数 batch_size 指定每批插入行数
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'success': False, 'error': '请上传文件'}, status=400)
+    try:
+        batch_size = int(request.POST.get('batch_size') or DEFAULT_BATCH_SIZE)
+        if batch_size < 1:
+            raise ValueError
+    except ValueError:
+        return JsonResponse({'success': False, 'error': '参数 batch_size 的值无效'}, status=400)
+
+    try:
+        report = ResidentImporter(batch_size=batch_size).run(iter_rows(upload, upload.name))
+    except (ValueError, ImportError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, 'data': report.as_dict()})
+
+
+@check_permission('residents.export')
+def resident_export(request, table):
+    """
+    导出居民及特殊人群明细表
+    table 取值见 RESIDENT_EXPORTS，format 参数可选 csv（默认）或 xlsx
+    """
+    if table not in RESIDENT_EXPORTS:
+        return JsonResponse({'success': False, 'error': f'不支持导出的数据表: {table}'}, status=404)
+    model, columns, filename = RESIDENT_EXPORTS[table]
+    try:
+        return export_response(model.objects.all(), columns, filename, request.GET.get('format', 'csv'))
+    except (ValueError, ImportError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+
+@check_permission()
+def resident_crosstab(request):
+    """
+    居民交叉统计
+    dims 为1-3个逗号分隔的维度，其余维度名参数按编码筛选，如 ?dims=ethnicity,education_level&population_type=0
+    """
+    try:
+        dimensions, filters = parse_pivot_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    rows = get_cube().pivot(dimensions, filters)
+    return JsonResponse({
+        'success': True,
+        'data': rows,
+        'total': sum(row['count'] for row in rows),
+    })
+
+
+@check_permission()
+def resident_search(request):
+    """
+    居民快速检索
+    q 为查询词：4位数字按手机号后四位，6位以上数字按身份证号前缀，其余按姓名检索；
+    可用 field 参数（name/id_card/phone）指定检索字段，page_size 指定返回条数
+    """
+    try:
+        limit = parse_page_size(request.GET.get('page_size'))
+        field, results = search_residents(request.GET.get('q'), request.GET.get('field'), limit)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({
+        'success': True,
+        'field': field,
+        'data': [serialize_resident(resident) for resident in results],
+    })
+
+
+@check_permission()
+def resident_birthdays(request):
+    """
+    生日在区间内的在世居民
+    start 为区间第一天（默认今天），days 为天数（默认7，最多31），page_size 指定返回条数
+    """
+    try:
+        start = parse_start(request.GET.get('start'))
+        days = parse_days(request.GET.get('days'))
+        limit = parse_page_size(request.GET.get('page_size'))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, 'data': birthday_window(start, days, limit)})
+
+
+@check_permission()
+def resident_milestones(request):
+    """今天起 days 天内（默认30）满60、70、80、90、100岁的在世居民，名单按天缓存"""
+    try:
+        days = parse_days(request.GET.get('days'), MILESTONE_DAYS)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    rows = get_milestones(days)
+    return JsonResponse({'success': True, 'data': rows, 'total': len(rows)})
+
+
+@check_permission()
+def resident_age_distribution(request):
+    """按小区（by=community，默认）或组别（by=group）统计在世居民的年龄段分布"""
+    by = request.GET.get('by', 'community')
+    if by not in DISTRIBUTION_GROUPS:
+        return JsonResponse({'success': False, 'error': f'参数 by 的值无效: {by}'}, status=400)
+    return JsonResponse({'success': True, 'data': get_age_distribution(by)})